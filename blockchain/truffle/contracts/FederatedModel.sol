@@ -14,22 +14,31 @@ contract FederatedModel {
     uint256 private outputDimension;
     uint256 private inputDimension;
     bool private isTraining = true;
-    address[] private participating_devices;
+    // round bookkeeping: the round number doubles as the generation of the
+    // per-round state, so starting a new round does not need to clear anything
+    mapping(address => uint256) private lastSubmittedRound;
+    mapping(uint256 => uint256) private roundParticipantCount;
     uint256 private intervalEnd;
     uint256 private updateInterval;
     uint256 private batchSize;
     Verifier private verifier;
     VerifierAggregator private verifier_aggregator;
     bool private initialized = false;
-    string public global_weights_ipfs_link = "";
-    string public global_bias_ipfs_link = "";
-    string public weight_bias_hash = "";
+    // fixed-size content identifiers: the sha256 content id of the stored
+    // object for the local stores (64 hex digit links), from which the devices
+    // recover the link; otherwise the sha256 of the link text (e.g. an IPFS
+    // CID), which is one-way: such a link has to reach the devices off-chain
+    bytes32 public global_weights_ipfs_link;
+    bytes32 public global_bias_ipfs_link;
+    // MiMC digest of the global weights and bias:
+    uint256 public weight_bias_hash;
     bool is_no_proof;
     uint256 public constant numberOfBlocksAgg = 2; // Number of blocks each aggregator handles
     uint256 public constant totalAgg = 2; // Total number of aggregators
 
     address private stake_winner_aggregator;
-    address[] private stake_winners_clients;
+    uint256 private stakeGeneration;
+    mapping(uint256 => address[]) private stake_winners_clients;
 
     constructor(
         uint256 id,
@@ -61,10 +70,14 @@ contract FederatedModel {
     function initModel(
         int256[][] calldata local_weights,
         int256[] calldata local_bias,
-        bool IsNoProof
+        bool IsNoProof,
+        bytes32 gw_ipfs_link,
+        bytes32 gb_ipfs_link
     ) external {
         initialized = true;
         is_no_proof = IsNoProof;
+        global_weights_ipfs_link = gw_ipfs_link;
+        global_bias_ipfs_link = gb_ipfs_link;
     }
 
     function time_until_next_update_round() external returns (int256) {
@@ -74,11 +87,8 @@ contract FederatedModel {
     function end_update_round() external {
         if (block.timestamp >= intervalEnd) {
             intervalEnd = block.timestamp + updateInterval;
-            delete participating_devices;
+            // moving to the next generation resets participants and hashes:
             round_Number = round_Number + 1;
-
-            // delete all the hashes:
-            deleteAllHashValues();
         }
     }
 
@@ -88,91 +98,66 @@ contract FederatedModel {
 
     function roundUpdateOutstanding() external returns (bool) {
         if (initialized) {
-            address user = tx.origin;
-            bool new_user = true;
-            for (uint256 i = 0; i < this.participantsCount(); i++) {
-                if (user == participating_devices[i]) {
-                    new_user = false;
-                }
-            }
-            return new_user;
+            return lastSubmittedRound[tx.origin] != round_Number;
         } else {
             return false;
         }
     }
 
-    mapping(address => string) public hashDynamicMapping;
-    address[] public hashKeys;
+    // round number => sender => hash
+    mapping(uint256 => mapping(address => uint256)) private hashDynamicMapping;
+    // round number => senders
+    mapping(uint256 => address[]) private hashKeys;
 
-    function setHashValue(address sender, string memory _value) internal {
+    function setHashValue(address sender, uint256 _value) internal {
         // if the hash value is already set, ignore it:
-        if (bytes(hashDynamicMapping[sender]).length != 0) {
+        if (hashDynamicMapping[round_Number][sender] != 0) {
             return;
         }
-        hashDynamicMapping[sender] = _value;
-        hashKeys.push(sender);
+        hashDynamicMapping[round_Number][sender] = _value;
+        hashKeys[round_Number].push(sender);
     }
 
-    function getHashValue(address sender) public view returns (string memory) {
-        return hashDynamicMapping[sender];
+    function getHashValue(address sender) public view returns (uint256) {
+        return hashDynamicMapping[round_Number][sender];
     }
 
     function getAllHashKeys() public view returns (address[] memory) {
-        return hashKeys;
+        return hashKeys[round_Number];
     }
 
-    function getAllHashValues() public view returns (string[] memory) {
-        uint size = hashKeys.length;
-        string[] memory ret = new string[](size);
+    function getAllHashValues() public view returns (uint256[] memory) {
+        address[] storage keys = hashKeys[round_Number];
+        uint size = keys.length;
+        uint256[] memory ret = new uint256[](size);
         for (uint i = 0; i < size; i++) {
-            address sender_hash = hashKeys[i];
-            ret[i] = getHashValue(sender_hash);
+            ret[i] = hashDynamicMapping[round_Number][keys[i]];
         }
         return ret;
     }
 
-    function deleteAllHashValues() internal {
-        for (uint i = 0; i < hashKeys.length; i++) {
-            address key = hashKeys[i];
-            hashDynamicMapping[key] = "";
-        }
-        delete hashKeys;
-    }
-
     function send_wb_hash(
-        string memory wb_hash,
+        uint256 wb_hash,
         uint[2] calldata a,
         uint[2][2] calldata b,
         uint[2] calldata c,
         uint[5] calldata input
     ) external TrainingMode {
         require(this.checkWBHashZKP(a, b, c, input), "check wb hash failed");
-        bool newUser = true;
         address user = tx.origin;
-        if (this.participantsCount() == 0) {
-            participating_devices.push(user);
+        if (lastSubmittedRound[user] != round_Number) {
+            lastSubmittedRound[user] = round_Number;
+            roundParticipantCount[round_Number] += 1;
             setHashValue(user, wb_hash);
             // set for stake:
-            stake_winners_clients.push(tx.origin);
-        } else {
-            for (uint256 i = 0; i < this.participantsCount(); i++) {
-                if (user == participating_devices[i]) {
-                    newUser = false;
-                }
-            }
-            if (newUser) {
-                participating_devices.push(user);
-                setHashValue(user, wb_hash);
-                // set for stake:
-                stake_winners_clients.push(tx.origin);
-            }
+            stake_winners_clients[stakeGeneration].push(user);
         }
     }
 
     function send_aggregator_wb(
-        string memory wb_hash,
-        string memory gw_ipfs_link,
-        string memory gb_ipfs_link,
+        uint256 wb_hash,
+        bytes32 gw_ipfs_link,
+        bytes32 gb_ipfs_link,
         uint[2] calldata a,
         uint[2][2] calldata b,
         uint[2] calldata c,
@@ -190,21 +175,20 @@ contract FederatedModel {
         stake_winner_aggregator = tx.origin;
     }
 
-    function get_global_weights_ipfs_link()
-        external
-        view
-        returns (string memory)
-    {
+    function get_global_weights_ipfs_link() external view returns (bytes32) {
         return global_weights_ipfs_link;
     }
 
-    function get_weight_bias_hash() external view returns (string memory) {
+    function get_global_bias_ipfs_link() external view returns (bytes32) {
+        return global_bias_ipfs_link;
+    }
+
+    function get_weight_bias_hash() external view returns (uint256) {
         return weight_bias_hash;
     }
 
     function participantsCount() external view returns (uint) {
-        uint x = participating_devices.length;
-        return x;
+        return roundParticipantCount[round_Number];
     }
 
     function changeLearningRate(int256 newLearnignRate) external onlyAdmin {
@@ -320,13 +304,14 @@ contract FederatedModel {
 
         return (
             stake_winner_aggregator,
-            stake_winners_clients,
+            stake_winners_clients[stakeGeneration],
             new_aggregator_index
         );
     }
 
     function clearStakeWinners() external {
         stake_winner_aggregator = address(0);
-        delete stake_winners_clients;
+        // start a new (empty) generation instead of deleting the old list:
+        stakeGeneration = stakeGeneration + 1;
     }
 }
@@ -1,84 +1,117 @@
+import csv
 import os.path
+import threading
 
-import pandas as pd
+
+class MetricRecorder:
+    # Appends rows to a csv file in the format of DataFrame.to_csv (an unnamed
+    # index column, always 0 here). Rows are buffered and written on flush.
+    def __init__(self, file_path, columns):
+        self.file_path = file_path
+        self.lock = threading.Lock()
+        self.pending = []
+        self.file = open(file_path, "w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(["", *columns])
+        self.file.flush()
+
+    def add(self, *values):
+        with self.lock:
+            self.pending.append([0, *values])
+
+    def flush(self):
+        with self.lock:
+            self.writer.writerows(self.pending)
+            self.pending = []
+            self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
 
 
 class Analytics:
     def __init__(self, deviceName, config_file):
         self.config = config_file
         self.deviceName = deviceName
-        self.round_time = pd.DataFrame()
-        self.round_gas = pd.DataFrame()
-        self.round_proof_times = pd.DataFrame()
-        self.round_training_local_time = pd.DataFrame()
-        self.round_update_blockchain_time = pd.DataFrame()
-        self.round_score = pd.DataFrame()
-        self.round_classification_report = pd.DataFrame()
+        path = self.get_output_path()
+        if not os.path.exists(path):
+            os.makedirs(path)
+        self.targets = self.config["DEFAULT"]["ActivitiesEncoded"]
+        time_columns = ["Round-Number", "Time-Taken"]
+        self.round_time = MetricRecorder(os.path.join(path, "Round_Time"), time_columns)
+        self.round_gas = MetricRecorder(
+            os.path.join(path, "Round_Gas"), ["Round-Number", "Gas-Costs"]
+        )
+        self.round_proof_times = MetricRecorder(
+            os.path.join(path, "Round_Proof_Time"), time_columns
+        )
+        self.round_training_local_time = MetricRecorder(
+            os.path.join(path, "Round_Training_Local_Time"), time_columns
+        )
+        self.round_update_blockchain_time = MetricRecorder(
+            os.path.join(path, "Round_Update_Blockchain_Time"), time_columns
+        )
+        self.round_score = MetricRecorder(
+            os.path.join(path, "Round_Score"), ["Round-Number", "Score"]
+        )
+        self.round_classification_report = MetricRecorder(
+            os.path.join(path, "Round_Classification_Report"),
+            ["Round-Number", *self.targets],
+        )
+        self.recorders = [
+            self.round_time,
+            self.round_gas,
+            self.round_proof_times,
+            self.round_training_local_time,
+            self.round_update_blockchain_time,
+            self.round_score,
+            self.round_classification_report,
+        ]
+
+    def get_output_path(self):
+        base_path = self.config["DEFAULT"]["AnalyticsOutBase"]
+        return os.path.join(
+            os.path.join(
+                os.path.join(
+                    base_path,
+                    "NumberOfParticipants_"
+                    + str(self.config["DEFAULT"]["NumberOfParticipants"]),
+                ),
+                "BatchSize_" + str(self.config["DEFAULT"]["BatchSize"]),
+            ),
+            self.deviceName,
+        )
 
     def add_round_time(self, round, time):
-        df = pd.DataFrame([{"Round-Number": round, "Time-Taken": time}])
-        self.round_time = pd.concat([self.round_time, df])
+        self.round_time.add(round, time)
 
     def add_round_update_blockchain_time(self, round, time):
-        df = pd.DataFrame([{"Round-Number": round, "Time-Taken": time}])
-        self.round_update_blockchain_time = pd.concat(
-            [self.round_update_blockchain_time, df]
-        )
+        self.round_update_blockchain_time.add(round, time)
 
     def add_round_gas(self, round, gas):
-        df = pd.DataFrame([{"Round-Number": round, "Gas-Costs": gas}])
-        self.round_gas = pd.concat([self.round_gas, df])
+        self.round_gas.add(round, gas)
 
     def add_round_proof_times(self, round, time):
-        df = pd.DataFrame([{"Round-Number": round, "Time-Taken": time}])
-        self.round_proof_times = pd.concat([self.round_proof_times, df])
+        self.round_proof_times.add(round, time)
 
     def add_round_training_local_time(self, round, time):
-        df = pd.DataFrame([{"Round-Number": round, "Time-Taken": time}])
-        self.round_training_local_time = pd.concat([self.round_training_local_time, df])
+        self.round_training_local_time.add(round, time)
 
     def add_round_score(self, round, score):
-        df = pd.DataFrame([{"Round-Number": round, "Score": score}])
-        self.round_score = pd.concat([self.round_score, df])
+        self.round_score.add(round, score)
 
     def add_round_classification_report(self, round, report):
-        targets = self.config["DEFAULT"]["ActivitiesEncoded"]
-        dic = {"Round-Number": round}
-        for target in targets:
-            dic[target] = report[str(target)]["precision"]
-        df = pd.DataFrame([dic])
-        self.round_classification_report = pd.concat(
-            [self.round_classification_report, df]
+        self.round_classification_report.add(
+            round, *[report[str(target)]["precision"] for target in self.targets]
         )
 
+    def flush(self):
+        # called once per round, so an interrupted run keeps its finished rounds
+        for recorder in self.recorders:
+            recorder.flush()
+
     def write_data(self):
-        base_path = self.config["DEFAULT"]["AnalyticsOutBase"]
-        path = os.path.join(
-            os.path.join(
-                os.path.join(
-                    base_path,
-                    "NumberOfParticipants_"
-                    + str(self.config["DEFAULT"]["NumberOfParticipants"]),
-                ),
-                "BatchSize_" + str(self.config["DEFAULT"]["BatchSize"]),
-            ),
-            self.deviceName,
-        )
-        if not os.path.exists(path):
-            os.makedirs(path)
-        self.round_time.to_csv(path_or_buf=os.path.join(path, "Round_Time"))
-        self.round_gas.to_csv(path_or_buf=os.path.join(path, "Round_Gas"))
-        self.round_proof_times.to_csv(
-            path_or_buf=os.path.join(path, "Round_Proof_Time")
-        )
-        self.round_training_local_time.to_csv(
-            path_or_buf=os.path.join(path, "Round_Training_Local_Time")
-        )
-        self.round_score.to_csv(path_or_buf=os.path.join(path, "Round_Score"))
-        self.round_classification_report.to_csv(
-            path_or_buf=os.path.join(path, "Round_Classification_Report")
-        )
-        self.round_update_blockchain_time.to_csv(
-            path_or_buf=os.path.join(path, "Round_Update_Blockchain_Time")
-        )
+        for recorder in self.recorders:
+            recorder.close()
         print(f"Values written for device : {self.deviceName}")
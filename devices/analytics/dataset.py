@@ -0,0 +1,196 @@
+import argparse
+import glob
+import hashlib
+import os.path
+import re
+import shutil
+
+import pandas as pd
+
+# All device analytics of AnalyticsOutBase
+#   NumberOfParticipants_<p>/BatchSize_<b>/Device_<d>/<metric file>
+# consolidated into one Parquet dataset, partitioned by participants and
+# batchsize, one row per (participants, batchsize, device, round).
+
+KEYS = ["participants", "batchsize", "device", "round"]
+
+# metric file -> {csv column: dataset column}
+METRIC_COLUMNS = {
+    "Round_Gas": {"Gas-Costs": "gas_costs"},
+    "Round_Proof_Time": {"Time-Taken": "proof_time"},
+    "Round_Score": {"Score": "score"},
+    "Round_Time": {"Time-Taken": "round_time"},
+    "Round_Training_Local_Time": {"Time-Taken": "training_local_time"},
+    "Round_Update_Blockchain_Time": {"Time-Taken": "update_blockchain_time"},
+}
+# the classification report has one precision column per activity:
+CLASSIFICATION_REPORT = "Round_Classification_Report"
+PRECISION_PREFIX = "precision_"
+
+# digest of the source csv files the dataset was consolidated from, the
+# leading underscore keeps parquet readers from taking it for a data file:
+SOURCE_DIGEST = "_source_digest"
+
+DEVICE_DIR = re.compile(
+    r"NumberOfParticipants_(\d+)[/\\]BatchSize_(\d+)[/\\](Device_\d+)$"
+)
+
+
+def read_metric(file_path: str, metric: str) -> pd.DataFrame:
+    df = pd.read_csv(file_path, index_col=0).drop_duplicates(subset=["Round-Number"])
+    if metric == CLASSIFICATION_REPORT:
+        columns = {
+            c: PRECISION_PREFIX + str(c) for c in df.columns if c != "Round-Number"
+        }
+    else:
+        columns = METRIC_COLUMNS[metric]
+    return df.rename(columns={"Round-Number": "round", **columns}).set_index("round")
+
+
+def read_device(device_path: str) -> pd.DataFrame:
+    frames = []
+    for metric in [*METRIC_COLUMNS, CLASSIFICATION_REPORT]:
+        file_path = os.path.join(device_path, metric)
+        if os.path.exists(file_path):
+            frames.append(read_metric(file_path, metric))
+    if not frames:
+        return None
+    return pd.concat(frames, axis=1)
+
+
+def device_paths(base_path: str) -> list[str]:
+    return sorted(
+        glob.glob(
+            os.path.join(
+                base_path, "NumberOfParticipants_*", "BatchSize_*", "Device_*"
+            )
+        )
+    )
+
+
+def source_digest(base_path: str) -> str:
+    # changes whenever a metric file is added, removed or rewritten
+    digest = hashlib.sha256()
+    for device_path in device_paths(base_path):
+        for metric in [*METRIC_COLUMNS, CLASSIFICATION_REPORT]:
+            file_path = os.path.join(device_path, metric)
+            if os.path.exists(file_path):
+                stat = os.stat(file_path)
+                entry = os.path.relpath(file_path, base_path)
+                digest.update(
+                    f"{entry}:{stat.st_size}:{stat.st_mtime_ns}\n".encode()
+                )
+    return digest.hexdigest()
+
+
+def consolidate(base_path: str, dataset_path: str) -> pd.DataFrame:
+    frames = []
+    digest = source_digest(base_path)
+    for device_path in device_paths(base_path):
+        match = DEVICE_DIR.search(device_path)
+        device_df = read_device(device_path) if match else None
+        if device_df is None:
+            continue
+        device_df = device_df.reset_index()
+        device_df["participants"] = int(match.group(1))
+        device_df["batchsize"] = int(match.group(2))
+        device_df["device"] = match.group(3)
+        frames.append(device_df)
+    if not frames:
+        raise Exception(f"No device analytics found in {base_path}")
+    df = pd.concat(frames, ignore_index=True)
+    df = df[KEYS + [c for c in df.columns if c not in KEYS]]
+    # to_parquet adds part files to an existing dataset, replace it instead:
+    shutil.rmtree(dataset_path, ignore_errors=True)
+    df.to_parquet(
+        dataset_path, partition_cols=["participants", "batchsize"], index=False
+    )
+    with open(os.path.join(dataset_path, SOURCE_DIGEST), "w") as file:
+        file.write(digest)
+    return df
+
+
+def refresh(base_path: str, dataset_path: str) -> str:
+    # consolidates again when the source csv files changed since the dataset
+    # was written, returns the source digest
+    digest = source_digest(base_path)
+    file_path = os.path.join(dataset_path, SOURCE_DIGEST)
+    if os.path.exists(file_path):
+        with open(file_path) as file:
+            if file.read() == digest:
+                return digest
+    consolidate(base_path, dataset_path)
+    return digest
+
+
+def load(
+    dataset_path: str,
+    columns: list[str] = None,
+    participants: list[int] = None,
+    batchsizes: list[int] = None,
+) -> pd.DataFrame:
+    # reads only the requested columns of the requested partitions
+    filters = []
+    if participants is not None:
+        filters.append(("participants", "in", list(participants)))
+    if batchsizes is not None:
+        filters.append(("batchsize", "in", list(batchsizes)))
+    df = pd.read_parquet(
+        dataset_path,
+        columns=None if columns is None else KEYS + list(columns),
+        filters=filters or None,
+    )
+    df["participants"] = df["participants"].astype(int)
+    df["batchsize"] = df["batchsize"].astype(int)
+    return df.set_index(KEYS).sort_index()
+
+
+def device_means(df: pd.DataFrame, column) -> pd.Series:
+    # mean over the devices of each (participants, batchsize, round), of one
+    # column (a Series) or a list of columns (a DataFrame)
+    return df[column].groupby(level=["participants", "batchsize", "round"]).mean()
+
+
+def metric_frames(df: pd.DataFrame) -> dict:
+    # {device: {metric file: DataFrame}} with the csv column names, the layout
+    # the plotting functions use
+    data = {}
+    devices = dict(list(df.groupby(level="device")))
+    for device in sorted(devices, key=lambda name: int(name.split("_")[1])):
+        device_df = devices[device].reset_index(level="round")
+        frames = {}
+        for metric, columns in METRIC_COLUMNS.items():
+            column = list(columns.values())[0]
+            if column in device_df:
+                frames[metric] = _metric_frame(device_df, columns)
+        precision = {
+            c: c[len(PRECISION_PREFIX) :]
+            for c in device_df.columns
+            if c.startswith(PRECISION_PREFIX)
+        }
+        if precision:
+            frames[CLASSIFICATION_REPORT] = _metric_frame(
+                device_df, {v: k for k, v in precision.items()}
+            )
+        data[device] = frames
+    return data
+
+
+def _metric_frame(device_df: pd.DataFrame, columns: dict) -> pd.DataFrame:
+    renamed = {dataset: csv for csv, dataset in columns.items()}
+    frame = device_df[["round", *renamed]].rename(
+        columns={"round": "Round-Number", **renamed}
+    )
+    return frame.dropna().reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Consolidate device analytics into a partitioned Parquet dataset."
+    )
+    parser.add_argument("base_path", help="AnalyticsOutBase of the runs")
+    parser.add_argument("--out", default="analytics_dataset")
+    args = parser.parse_args()
+
+    dataset = consolidate(args.base_path, args.out)
+    print(f"{len(dataset)} rows written to {args.out}")
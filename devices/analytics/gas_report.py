@@ -0,0 +1,47 @@
+import argparse
+
+import pandas as pd
+
+
+def read_gas_ledger(ledger_path: str) -> pd.DataFrame:
+    # one json line per transaction, written by utils.gas.GasLedger
+    return pd.read_json(ledger_path, lines=True)
+
+
+def summarize(gas_df: pd.DataFrame, by: str = "function") -> pd.DataFrame:
+    return gas_df.groupby(by)["gas_used"].agg(["count", "mean", "min", "max", "sum"])
+
+
+def compare(baseline_path: str, current_path: str) -> pd.DataFrame:
+    baseline = summarize(read_gas_ledger(baseline_path))
+    current = summarize(read_gas_ledger(current_path))
+    report = pd.DataFrame(
+        {
+            "baseline_mean": baseline["mean"],
+            "current_mean": current["mean"],
+        }
+    )
+    report["diff"] = report["current_mean"] - report["baseline_mean"]
+    report["diff_pct"] = report["diff"] / report["baseline_mean"] * 100
+    return report.round(2).sort_index()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Gas usage per contract function, optionally against a baseline."
+    )
+    parser.add_argument("current", help="gas ledger of the run to report")
+    parser.add_argument("--baseline", help="gas ledger of the run to compare to")
+    parser.add_argument(
+        "--by", default="function", choices=["function", "round", "account"]
+    )
+    parser.add_argument("--out", help="write the report to this csv file")
+    args = parser.parse_args()
+
+    if args.baseline:
+        gas_report = compare(args.baseline, args.current)
+    else:
+        gas_report = summarize(read_gas_ledger(args.current), by=args.by)
+    print(gas_report.to_string())
+    if args.out:
+        gas_report.to_csv(args.out)
@@ -1,11 +1,11 @@
-import string
-
 import os.path
 
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 
+from dataset import PRECISION_PREFIX, device_means, load, metric_frames, refresh
+
 activity_wording = {
     1: "Walking Stairs",
     2: "Walking",
@@ -18,155 +18,47 @@ activity_wording = {
 
 markers = [".", "x", "2", "1", "X", "+", "d", "3"]
 BASE_PATH = "data"
+# consolidated by dataset.py, again whenever the csv files under BASE_PATH change:
+DATASET_PATH = "analytics_dataset"
 
-# %%
-
-participants = 2
-batchsize = 40
-
-# %%
-
-data = {}
-for device in range(1, participants + 1):
-    temp = {}
-    temp["Round_Classification_Report"] = (
-        pd.read_csv(
-            os.path.join(
-                os.path.join(
-                    os.path.join(
-                        os.path.join(
-                            BASE_PATH, "NumberOfParticipants_" + str(participants)
-                        ),
-                        "BatchSize_" + str(batchsize),
-                    ),
-                    "Device_" + str(device),
-                ),
-                "Round_Classification_Report",
-            )
-        )
-        .drop_duplicates(subset=["Round-Number"])
-        .reset_index()
-    )
-    temp["Round_Gas"] = (
-        pd.read_csv(
-            os.path.join(
-                os.path.join(
-                    os.path.join(
-                        os.path.join(
-                            BASE_PATH, "NumberOfParticipants_" + str(participants)
-                        ),
-                        "BatchSize_" + str(batchsize),
-                    ),
-                    "Device_" + str(device),
-                ),
-                "Round_Gas",
-            )
-        )
-        .drop_duplicates(subset=["Round-Number"])
-        .reset_index()
-    )
-    temp["Round_Proof_Time"] = (
-        pd.read_csv(
-            os.path.join(
-                os.path.join(
-                    os.path.join(
-                        os.path.join(
-                            BASE_PATH, "NumberOfParticipants_" + str(participants)
-                        ),
-                        "BatchSize_" + str(batchsize),
-                    ),
-                    "Device_" + str(device),
-                ),
-                "Round_Proof_Time",
-            )
-        )
-        .drop_duplicates(subset=["Round-Number"])
-        .reset_index()
-    )
-    temp["Round_Score"] = (
-        pd.read_csv(
-            os.path.join(
-                os.path.join(
-                    os.path.join(
-                        os.path.join(
-                            BASE_PATH, "NumberOfParticipants_" + str(participants)
-                        ),
-                        "BatchSize_" + str(batchsize),
-                    ),
-                    "Device_" + str(device),
-                ),
-                "Round_Score",
-            )
-        )
-        .drop_duplicates(subset=["Round-Number"])
-        .reset_index()
-    )
-    temp["Round_Time"] = (
-        pd.read_csv(
-            os.path.join(
-                os.path.join(
-                    os.path.join(
-                        os.path.join(
-                            BASE_PATH, "NumberOfParticipants_" + str(participants)
-                        ),
-                        "BatchSize_" + str(batchsize),
-                    ),
-                    "Device_" + str(device),
-                ),
-                "Round_Time",
-            )
-        )
-        .drop_duplicates(subset=["Round-Number"])
-        .reset_index()
-    )
-    temp["Round_Training_Local_Time"] = (
-        pd.read_csv(
-            os.path.join(
-                os.path.join(
-                    os.path.join(
-                        os.path.join(
-                            BASE_PATH, "NumberOfParticipants_" + str(participants)
-                        ),
-                        "BatchSize_" + str(batchsize),
-                    ),
-                    "Device_" + str(device),
-                ),
-                "Round_Training_Local_Time",
-            )
-        )
-        .drop_duplicates(subset=["Round-Number"])
-        .reset_index()
-    )
-    temp["Round_Update_Blockchain_Time"] = (
-        pd.read_csv(
-            os.path.join(
-                os.path.join(
-                    os.path.join(
-                        os.path.join(
-                            BASE_PATH, "NumberOfParticipants_" + str(participants)
-                        ),
-                        "BatchSize_" + str(batchsize),
-                    ),
-                    "Device_" + str(device),
-                ),
-                "Round_Update_Blockchain_Time",
+plt.rc("pgf", texsystem="pdflatex")
+
+
+def load_dataset(columns=None, participants=None, batchsizes=None):
+    refresh(BASE_PATH, DATASET_PATH)
+    return load(DATASET_PATH, columns, participants, batchsizes)
+
+
+def load_experiments(participants, batchsizes, columns=None):
+    # {Participants_<p>: {BatchSize_<b>: {Device_<d>: {metric: DataFrame}}}},
+    # reading only the given dataset columns (all when None)
+    df = load_dataset(columns, participants, batchsizes)
+    groups = dict(list(df.groupby(level=["participants", "batchsize"])))
+    data = {}
+    for participant in participants:
+        data["Participants_" + str(participant)] = {
+            "BatchSize_" + str(batchsize): (
+                metric_frames(groups[(participant, batchsize)])
+                if (participant, batchsize) in groups
+                else {}
             )
-        )
-        .drop_duplicates(subset=["Round-Number"])
-        .reset_index()
-    )
-    data["Device_" + str(device)] = temp
+            for batchsize in batchsizes
+        }
+    return data
+
+
+def load_means(participants=None, batchsizes=None, columns=None):
+    # mean over the devices per (participants, batchsize, round), the input of
+    # the figures below
+    df = load_dataset(columns, participants, batchsizes)
+    return device_means(df, list(df.columns))
 
 
-# %%
 def calc_devices_mean(data, kpi, x):
-    df = pd.DataFrame()
-    for participant in range(1, len(data) + 1):
-        g = data["Device_" + str(participant)]
-        df = pd.concat([df, g[kpi][x]])
-    by_row_index = df.groupby(df.index)
-    df_means = by_row_index.mean()
-    return df_means
+    # per round mean over the devices
+    if not data:
+        return pd.Series(dtype=float)
+    return pd.concat([g[kpi][x] for g in data.values()]).groupby(level=0).mean()
 
 
 def plot_gas(data):
@@ -243,510 +135,272 @@ def plot_classification_report(data):
     )
 
 
-# %%
 
-for device in data.keys():
-    df = data[device]
-    plt.figure(figsize=(15, 10))
-    plot_gas(df["Round_Gas"])
-    plt.show()
-
-# %%
-
-plt.figure(figsize=(15, 10))
-for device in data.keys():
-    df = data[device]
-    plot_training_local_time(df["Round_Training_Local_Time"])
-plt.legend(list(data.keys()))
-
-# %%
+def export_legend(legend, filename="legend.png", expand=[-5, -5, 5, 5]):
+    fig = legend.figure
+    fig.canvas.draw()
+    bbox = legend.get_window_extent()
+    bbox = bbox.from_extents(*(bbox.extents + np.array(expand)))
+    bbox = bbox.transformed(fig.dpi_scale_trans.inverted())
+    fig.savefig(filename, dpi="figure", bbox_inches=bbox)
 
-plt.figure(figsize=(15, 10))
-for device in data.keys():
-    df = data[device]
-    plot_score(df["Round_Score"])
-plt.legend(list(data.keys()))
 
-# %%
+# Figures over experiments, drawn from load_means() and rendered in parallel by
+# render.py. Each saves itself to path and returns the figure.
 
-plt.figure(figsize=(15, 10))
-for j in range(0, len(data.keys())):
-    device = list((data.keys()))[j]
-    df = data[device]
-    plot_update_blockchain_time(df["Round_Update_Blockchain_Time"], marker=markers[j])
-plt.legend(list(data.keys()))
 
-# %% §§§§§§§§§§§ here gives two plot toghter
+def batches(means, participants):
+    # [(BatchSize_<b>, per round means)] of the runs with `participants` devices
+    experiment = means.xs(participants, level="participants")
+    return [
+        ("BatchSize_" + str(batchsize), df.droplevel("batchsize"))
+        for batchsize, df in experiment.groupby(level="batchsize")
+    ]
 
-for device in data.keys():
-    df = data[device]
-    plt.figure(figsize=(15, 10))
-    plot_classification_report(df["Round_Classification_Report"])
-    plt.show()
 
-# %%
-
-plt.figure(figsize=(15, 10))
-for j in range(0, len(data.keys())):
-    device = list((data.keys()))[j]
-    df = data[device]
-    plot_proof_time(df["Round_Proof_Time"], marker=markers[j])
-plt.legend(list(data.keys()))
-
-# %%
-
-batchsizes = [10, 20, 30, 40]
-participants = range(8, 9)
-devices = range(1, 9)
-
-# %%   error not found
-
-data = {}
-for participant in participants:
-    temp_p = {}
-    for batchsize in batchsizes:
-        temp_b = {}
-        for device in range(1, participant + 1):
-            temp_d = {}
-            p = os.path.join(BASE_PATH, "NumberOfParticipants_" + str(participant))
-            p = os.path.join(p, "BatchSize_" + str(batchsize))
-            p = os.path.join(p, "Device_" + str(device))
-            try:
-                temp_d["Round_Classification_Report"] = (
-                    pd.read_csv(os.path.join(p, "Round_Classification_Report"))
-                    .drop_duplicates(subset=["Round-Number"])
-                    .reset_index()
-                )
-                temp_d["Round_Gas"] = (
-                    pd.read_csv(os.path.join(p, "Round_Gas"))
-                    .drop_duplicates(subset=["Round-Number"])
-                    .reset_index()
-                )
-                temp_d["Round_Proof_Time"] = (
-                    pd.read_csv(os.path.join(p, "Round_Proof_Time"))
-                    .drop_duplicates(subset=["Round-Number"])
-                    .reset_index()
-                )
-                temp_d["Round_Score"] = (
-                    pd.read_csv(os.path.join(p, "Round_Score"))
-                    .drop_duplicates(subset=["Round-Number"])
-                    .reset_index()
-                )
-                temp_d["Round_Time"] = (
-                    pd.read_csv(os.path.join(p, "Round_Time"))
-                    .drop_duplicates(subset=["Round-Number"])
-                    .reset_index()
-                )
-                temp_d["Round_Training_Local_Time"] = (
-                    pd.read_csv(os.path.join(p, "Round_Training_Local_Time"))
-                    .drop_duplicates(subset=["Round-Number"])
-                    .reset_index()
-                )
-                temp_d["Round_Update_Blockchain_Time"] = (
-                    pd.read_csv(os.path.join(p, "Round_Update_Blockchain_Time"))
-                    .drop_duplicates(subset=["Round-Number"])
-                    .reset_index()
-                )
-                temp_b["Device_" + str(device)] = temp_d
-            except FileNotFoundError:
-                print("Not found")
-        temp_p["BatchSize_" + str(batchsize)] = temp_b
-    data["Participants_" + str(participant)] = temp_p
-
-# %%
-
-for participant in data.keys():
-    batches = data[participant]
-    plt.figure(figsize=(15, 10))
-    for j in range(0, len(batches.keys())):
-        b = list((batches.keys()))[j]
-        batch = batches[b]
-        if bool(batch):
-            t = calc_devices_mean(batch, "Round_Proof_Time", "Time-Taken")
-            d = pd.DataFrame()
-            d["Round-Number"] = range(1, len(t) + 1)
-            d["Time-Taken"] = t
-            plot_proof_time(d, marker=markers[j])
+def proof_times(means, participants, path="ProofTimes.pgf"):
+    fig = plt.figure(figsize=(15, 10))
+    runs = batches(means, participants)
+    for j, (_, run) in enumerate(runs):
+        d = pd.DataFrame()
+        d["Round-Number"] = range(1, len(run) + 1)
+        d["Time-Taken"] = run["proof_time"].values
+        plot_proof_time(d, marker=markers[j])
     plt.ylabel("Time-Taken [Seconds]")
-    plt.legend(list(batches.keys()))
-    plt.show()
-
-# %%
+    plt.legend([label for label, _ in runs])
+    fig.savefig(path)
+    return fig
 
 
-# %%
-
-for participant in data.keys():
-    batches = data[participant]
-    plt.figure(figsize=(15, 10))
-    for j in range(0, len(batches.keys())):
-        b = list((batches.keys()))[j]
-        batch = batches[b]
-        if bool(batch):
-            plt.rc("pgf", texsystem="pdflatex")
-            t = calc_devices_mean(batch, "Round_Proof_Time", "Time-Taken")
-            d = pd.DataFrame()
-            d["Round-Number"] = range(1, len(t) + 1)
-            d["Time-Taken"] = t
-            plot_proof_time(d, marker=markers[j])
-    plt.ylabel("Time-Taken [Seconds]")
-    plt.legend(list(batches.keys()))
-    plt.savefig("ProofTimes.pgf")
-
-# %%
-
-
-# %%
-
-# for participant in data.keys():
-#     batches=data[participant]
-#     plt.figure(figsize=(15,10))
-#     for b in batches.keys():
-#         batch=batches[b]
-#         if bool(batch):
-#             g=batch["Device_1"]
-#             t=g["Round_Gas"]
-#             plot_gas(t)
-#     plt.legend(list(batches.keys()))
-#     plt.show()
+def box_plot(means, participants, column, ylabel, path, legend=False):
+    runs = batches(means, participants)
+    df = pd.DataFrame(
+        {label: run[column].reset_index(drop=True) for label, run in runs}
+    )
+    ax = df.plot(kind="box", showmeans=True)
+    if legend:
+        plt.legend(list(df.columns))
+    plt.ylabel(ylabel)
+    ax.figure.savefig(path)
+    return ax.figure
 
-# %%
 
-for participant in data.keys():
-    batches = data[participant]
-    plt.figure(figsize=(15, 10))
-    dict = {}
-    plt.rc("pgf", texsystem="pdflatex")
-    dict = {}
-    df = pd.DataFrame()
-    for b in batches.keys():
-        batch = batches[b]
-        if bool(batch):
-            t = calc_devices_mean(batch, "Round_Gas", "Gas-Costs")
-            dict[b] = t
-    for key in dict.keys():
-        df[key] = dict[key]
-    df.plot(kind="box", showmeans=True)
-    plt.ylabel("Gas Costs [ETH]")
-    plt.savefig("gascosts.pgf")
-
-# %%
-for participant in data.keys():
-    batches = data[participant]
-    plt.figure(figsize=(15, 10))
-    plt.rc("pgf", texsystem="pdflatex")
-    dict = {}
-    df = pd.DataFrame()
-    for b in batches.keys():
-        batch = batches[b]
-        if bool(batch):
-            t = calc_devices_mean(batch, "Round_Update_Blockchain_Time", "Time-Taken")
-            dict[b] = t
-    for key in dict.keys():
-        df[key] = dict[key]
-    df.plot(kind="box", showmeans=True)
-    plt.ylabel("Time-Taken [Seconds]")
-    plt.savefig("roundupdateBCtime.pgf")
+def gas_costs(means, participants, path="gascosts.pgf"):
+    return box_plot(means, participants, "gas_costs", "Gas Costs [ETH]", path)
 
 
-# %%
+def update_blockchain_times(means, participants, path="roundupdateBCtime.pgf"):
+    return box_plot(
+        means, participants, "update_blockchain_time", "Time-Taken [Seconds]", path
+    )
 
 
-for participant in data.keys():
-    batches = data[participant]
-    plt.figure(figsize=(15, 10))
-    dict = {}
-    plt.rc("pgf", texsystem="pdflatex")
-    df = pd.DataFrame(dict.items(), columns=dict.keys())
-    for b in batches.keys():
-        batch = batches[b]
-        if bool(batch):
-            g = calc_devices_mean(batch, "Round_Update_Blockchain_Time", "Time-Taken")
-            dict[b] = g
-    for key in dict.keys():
-        df[key] = dict[key]
-    df.plot(kind="box", showmeans=True)
-    plt.ylabel("Time-Taken [Seconds]")
-    plt.savefig("roundupdateBCtimeBP.pgf")
+def proof_time_box(means, participants, path="roundProof_Time.pgf"):
+    return box_plot(means, participants, "proof_time", "Time-Taken [Seconds]", path)
 
-# %%
-import matplotlib.pyplot as plt
-plt.rcParams['text.usetex'] = True
-plt.rcParams['pgf.texsystem'] = 'pdflatex'  # or 'xelatex' or 'lualatex'
-plt.rcParams['text.usetex'] = False
-
-
-
-for participant in data.keys():
-    batches = data[participant]
-    plt.figure(figsize=(7, 4))
-    dict = {}
-    plt.rc("pgf", texsystem="pdflatex")
-    df = pd.DataFrame(dict.items(), columns=dict.keys())
-    for b in batches.keys():
-        batch = batches[b]
-        if bool(batch):
-            g = calc_devices_mean(batch, "Round_Proof_Time", "Time-Taken")
-            dict[b] = g
-    for key in dict.keys():
-        df[key] = dict[key]
-    df.plot(kind="box", showmeans=True)
-    plt.ylabel("Time-Taken [Seconds]")
-    plt.savefig("roundProof_Time.pgf")
-    plt.show()
 
+def training_local_times(means, participants, path="round_training_local.pgf"):
+    return box_plot(
+        means,
+        participants,
+        "training_local_time",
+        "Time-Taken [Seconds]",
+        path,
+        legend=True,
+    )
 
-for participant in data.keys():
-    batches = data[participant]
-    plt.figure(figsize=(7, 4))
-    dict = {}
-    plt.rc("pgf", texsystem="pdflatex")
-    df = pd.DataFrame(dict.items(), columns=dict.keys())
-    for b in batches.keys():
-        batch = batches[b]
-        if bool(batch):
-            g = calc_devices_mean(batch, "Round_Training_Local_Time", "Time-Taken")
-            dict[b] = g
-    for key in dict.keys():
-        df[key] = dict[key]
-    df.plot(kind="box", showmeans=True)
-    plt.legend(list(batches.keys()))
-    plt.ylabel("Time-Taken [Seconds]")
-    plt.savefig("round_training_local.pgf")
-    plt.show()
 
-for j in range(0, len(data.keys())):
-    participant = list((data.keys()))[j]
-    batches = data[participant]
-    dict = {}
-    plt.rc("pgf", texsystem="pdflatex")
-    df = pd.DataFrame(dict.items(), columns=dict.keys())
-    for b in batches.keys():
-        batch = batches[b]
-        if bool(batch):
-            g = calc_devices_mean(batch, "Round_Score", "Score")
-            dict[b] = g
-    for key in dict.keys():
-        df[key] = dict[key]
+def scores(means, participants, path="roundScore.pgf"):
+    fig = plt.figure()
+    runs = batches(means, participants)
+    df = pd.DataFrame(
+        {label: run["score"].reset_index(drop=True) for label, run in runs}
+    )
     for i in range(0, len(df.columns)):
         d = df[df.columns[i]]
         d.plot(marker=markers[i], linewidth=0.5, markevery=10)
     plt.legend(df.columns)
     plt.xlabel("Round Number")
     plt.ylabel("Accuracy Score")
-    plt.savefig("roundScore.pgf")
-    plt.show()
-
-
-def export_legend(legend, filename="legend.png", expand=[-5, -5, 5, 5]):
-    fig = legend.figure
-    fig.canvas.draw()
-    bbox = legend.get_window_extent()
-    bbox = bbox.from_extents(*(bbox.extents + np.array(expand)))
-    bbox = bbox.transformed(fig.dpi_scale_trans.inverted())
-    fig.savefig(filename, dpi="figure", bbox_inches=bbox)
+    fig.savefig(path)
+    return fig
 
 
-for participant in data.keys():
-    batches = data[participant]
-    # plt.figure(figsize=(3,3))
-    dict = {}
-    plt.rc("pgf", texsystem="pdflatex")
-    df = pd.DataFrame(dict.items(), columns=dict.keys())
-    for b in batches.keys():
-        batch = batches[b]
-        if bool(batch):
-            g = calc_devices_mean(
-                batch, "Round_Classification_Report", ["1", "2", "3", "4", "5", "6"]
-            )
-            dict[b] = g
+def class_scores(means, participants, path="roundScoreClasses.pgf"):
+    # precision per activity, one panel for each of the first four batchsizes
+    precision = [c for c in means.columns if c.startswith(PRECISION_PREFIX)]
     fig, axs = plt.subplots(2, 2, sharex=True, sharey=True, figsize=(8, 5))
     ls = []
-    for j in range(0, len(dict.keys())):
-        key = list(dict.keys())[j]
-        k = dict[key]
-        x, y = (None, None)
-        if j == 0:
-            x, y = (0, 0)
-        if j == 1:
-            x = 0
-            y = 1
-        if j == 2:
-            x = 1
-            y = 0
-        if j == 3:
-            x = 1
-            y = 1
-        l = None
-        for i in range(0, len(["1", "2", "3", "4", "5", "6"])):
+    for j, (label, run) in enumerate(batches(means, participants)[:4]):
+        ax = axs[j // 2][j % 2]
+        for i, column in enumerate(precision):
             ls.append(
-                axs[x][y].plot(
-                    range(1, len(dict[key]) + 1),
-                    k[str(i + 1)],
+                ax.plot(
+                    range(1, len(run) + 1),
+                    run[column],
                     marker=markers[i],
                     linewidth=0.5,
                     markevery=50,
                 )[0]
             )
-        axs[x][y].title.set_text(key)
-    # plt.ylabel("Accuracy Score")
-    # plt.xlabel("Round Number")
-    # plt.legend(ls,,loc="upper right")
+        ax.title.set_text(label)
     plt.subplots_adjust(wspace=0, hspace=0.2)
     axs[0][0].set_ylabel("Accuracy Score")
     axs[1][0].set_ylabel("Accuracy Score")
     axs[1][0].set_xlabel("Round Number")
     axs[1][1].set_xlabel("Round Number")
     fig.legend(
-        ls,
-        [
-            "Walking Stairs",
-            "Walking",
-            "Running",
-            "Elliptical Trainer",
-            "Cycling",
-            "Rowing",
-        ],
+        ls[: len(precision)],
+        [activity_wording[int(c[len(PRECISION_PREFIX) :])] for c in precision],
         loc="upper center",
         ncol=6,
     )
-    fig.savefig(f"roundScoreClasses.pgf")
-    plt.show()
+    fig.savefig(path)
+    return fig
+
+
+def shared_samples(means):
+    # sample counts per round (participants * batchsize) of more than one run
+    runs = means.index.droplevel("round").unique()
+    samples = pd.Series([participants * batchsize for participants, batchsize in runs])
+    counts = samples.value_counts()
+    return sorted(counts[counts > 1].index)
+
+
+def participants_vs_batchsize(means, samples, path="participantsVSBatchsize.pgf"):
+    # score of the runs that train on the same number of samples per round
+    # (participants * batchsize)
+    k = pd.DataFrame(
+        {
+            f"Participants_{participants} | Batchsize_{batchsize}": run[
+                "score"
+            ].reset_index(drop=True)
+            for (participants, batchsize), run in means.groupby(
+                level=["participants", "batchsize"]
+            )
+            if participants * batchsize == samples
+        }
+    )
+    fig = plt.figure(figsize=(8, 4.5))
+    plt.plot(range(1, len(k) + 1), k, linewidth=1, markevery=10)
+    plt.ylabel("Accuracy score", fontsize=14)
+    plt.xlabel("Round number", fontsize=14)
+    plt.legend(k.columns, fontsize=11)
+    plt.xticks(fontsize=12)  # Increase font size for x-axis ticks
+    plt.yticks(fontsize=14)
+    fig.savefig(path)
+    return fig
+
+
+def participants_in_same_batchsize(means, path="participants_in_sameBatchsize.pgf"):
+    # score per participant count, one panel for each of the first four batchsizes
+    fig, axs = plt.subplots(2, 2, sharex=True, sharey=True, figsize=(8, 5))
+    groups = list(means.groupby(level="batchsize"))[:4]
+    for j, (batchsize, experiment) in enumerate(groups):
+        k = pd.DataFrame(
+            {
+                f"Participants_{participants} | Batchsize_{batchsize}": run[
+                    "score"
+                ].reset_index(drop=True)
+                for participants, run in experiment.groupby(level="participants")
+            }
+        )
+        ax = axs[j // 2][j % 2]
+        ax.plot(range(1, len(k) + 1), k, linewidth=0.5, markevery=10)
+        ax.title.set_text("Batchsize_" + str(batchsize))
+        ax.legend(k.columns)
+    plt.ylabel("Accuracy Score")
+    plt.xlabel("Round Number")
+    plt.subplots_adjust(wspace=0, hspace=0.2)
+    axs[1][1].set_xlabel("Round Number")
+    fig.savefig(path)
+    return fig
+
+
+if __name__ == "__main__":
+    # %%
+
+    participants = 2
+    batchsize = 40
+
+    # %%
+
+    data = load_experiments([participants], [batchsize])[
+        "Participants_" + str(participants)
+    ]["BatchSize_" + str(batchsize)]
+
+    # %%
+
+    for device in data.keys():
+        df = data[device]
+        plt.figure(figsize=(15, 10))
+        plot_gas(df["Round_Gas"])
+        plt.show()
+
+    # %%
+
+    plt.figure(figsize=(15, 10))
+    for device in data.keys():
+        df = data[device]
+        plot_training_local_time(df["Round_Training_Local_Time"])
+    plt.legend(list(data.keys()))
 
-batchsizes = [10, 20, 30, 40]
-participants = range(2, 9, 2)
-devices = range(1, 9)
-# %%
-
-data = {}
-for participant in participants:
-    temp_p = {}
-    for batchsize in batchsizes:
-        temp_b = {}
-        for device in range(1, participant + 1):
-            temp_d = {}
-            p = os.path.join(BASE_PATH, "NumberOfParticipants_" + str(participant))
-            p = os.path.join(p, "BatchSize_" + str(batchsize))
-            p = os.path.join(p, "Device_" + str(device))
-            try:
-                temp_d["Round_Classification_Report"] = (
-                    pd.read_csv(os.path.join(p, "Round_Classification_Report"))
-                    .drop_duplicates(subset=["Round-Number"])
-                    .reset_index()
-                )
-                temp_d["Round_Gas"] = (
-                    pd.read_csv(os.path.join(p, "Round_Gas"))
-                    .drop_duplicates(subset=["Round-Number"])
-                    .reset_index()
-                )
-                temp_d["Round_Proof_Time"] = (
-                    pd.read_csv(os.path.join(p, "Round_Proof_Time"))
-                    .drop_duplicates(subset=["Round-Number"])
-                    .reset_index()
-                )
-                temp_d["Round_Score"] = (
-                    pd.read_csv(os.path.join(p, "Round_Score"))
-                    .drop_duplicates(subset=["Round-Number"])
-                    .reset_index()
-                )
-                temp_d["Round_Time"] = (
-                    pd.read_csv(os.path.join(p, "Round_Time"))
-                    .drop_duplicates(subset=["Round-Number"])
-                    .reset_index()
-                )
-                temp_d["Round_Training_Local_Time"] = (
-                    pd.read_csv(os.path.join(p, "Round_Training_Local_Time"))
-                    .drop_duplicates(subset=["Round-Number"])
-                    .reset_index()
-                )
-                temp_d["Round_Update_Blockchain_Time"] = (
-                    pd.read_csv(os.path.join(p, "Round_Update_Blockchain_Time"))
-                    .drop_duplicates(subset=["Round-Number"])
-                    .reset_index()
-                )
-                temp_b["Device_" + str(device)] = temp_d
-            except FileNotFoundError:
-                print("Not found")
-        temp_p["Batchsize_" + str(batchsize)] = temp_b
-    data["Participants_" + str(participant)] = temp_p
-dict = {}
-for participant in data.keys():
-    batches = data[participant]
-    plt.rc("pgf", texsystem="pdflatex")
-    for b in batches.keys():
-        batch = batches[b]
-        g = calc_devices_mean(batch, "Round_Score", "Score")
-        amount = int(participant.strip(string.ascii_letters).replace("_", "")) * int(
-            b.strip(string.ascii_letters).replace("_", "")
+    # %%
+
+    plt.figure(figsize=(15, 10))
+    for device in data.keys():
+        df = data[device]
+        plot_score(df["Round_Score"])
+    plt.legend(list(data.keys()))
+
+    # %%
+
+    plt.figure(figsize=(15, 10))
+    for j in range(0, len(data.keys())):
+        device = list((data.keys()))[j]
+        df = data[device]
+        plot_update_blockchain_time(
+            df["Round_Update_Blockchain_Time"], marker=markers[j]
         )
-        if bool(batch):
-            if not str(amount) in dict.keys():
-                df = pd.DataFrame()
-                df[participant + " | " + b] = g
-                dict[str(amount)] = df
-            else:
-                dict[str(amount)][participant + " | " + b] = g
-for j in range(0, len(dict.keys())):
-    key = list((dict.keys()))[j]
-    k = dict[key]
-    if len(k.columns) > 1:
-        plt.figure(figsize=(8, 4.5))
-        plt.plot(range(1, len(dict[key]) + 1), k, linewidth=1, markevery=10)
-        plt.ylabel("Accuracy score" ,fontsize=14)
-        plt.xlabel("Round number",  fontsize=14)
-        plt.legend(k.columns, fontsize=11)
-        plt.xticks( fontsize=12)  # Increase font size for x-axis ticks
-        plt.yticks(fontsize=14) 
-        plt.savefig(f"participantsVSBatchsize_{key}.pgf")
+    plt.legend(list(data.keys()))
+
+    # %% §§§§§§§§§§§ here gives two plot toghter
+
+    for device in data.keys():
+        df = data[device]
+        plt.figure(figsize=(15, 10))
+        plot_classification_report(df["Round_Classification_Report"])
         plt.show()
 
+    # %%
 
-dict = {}
-for participant in data.keys():
-    batches = data[participant]
-    plt.rc("pgf", texsystem="pdflatex")
-    for b in batches.keys():
-        batch = batches[b]
-        g = calc_devices_mean(batch, "Round_Score", "Score")
-        if bool(batch):
-            if not b in dict.keys():
-                df = pd.DataFrame()
-                df[participant + " | " + b] = g
-                dict[b] = df
-            else:
-                dict[b][participant + " | " + b] = g
-fig, axs = plt.subplots(2, 2, sharex=True, sharey=True, figsize=(8, 5))
-ls = []
-
-for j in range(0, len(dict.keys())):
-    key = list(dict.keys())[j]
-    k = dict[key]
-    x, y = (None, None)
-    if j == 0:
-        x, y = (0, 0)
-    if j == 1:
-        x = 0
-
-        y = 1
-    if j == 2:
-        x = 1
-        y = 0
-    if j == 3:
-        x = 1
-        y = 1
-    ls.append(
-        axs[x][y].plot(range(1, len(dict[key]) + 1), k, linewidth=0.5, markevery=10)[0]
-    )
-    axs[x][y].title.set_text(key)
-    axs[x][y].legend(k.columns)
-
-plt.ylabel("Accuracy Score")
-plt.xlabel("Round Number")
-plt.legend(ls,loc="upper right")
-plt.subplots_adjust(wspace=0, hspace=0.2)
-# axs[0][0].set_ylabel("Accuracy Score")
-# axs[1][0].set_ylabel("Accuracy Score")
-# axs[1][0].set_xlabel("Round Number")
-axs[1][1].set_xlabel("Round Number")
-fig.savefig(f"participants_in_sameBatchsize.pgf")
-plt.show()
+    plt.figure(figsize=(15, 10))
+    for j in range(0, len(data.keys())):
+        device = list((data.keys()))[j]
+        df = data[device]
+        plot_proof_time(df["Round_Proof_Time"], marker=markers[j])
+    plt.legend(list(data.keys()))
+
+    # %% figures over experiments, see render.py to render all of them
+
+    batchsizes = [10, 20, 30, 40]
+    participants = 8
+    means = load_means([participants], batchsizes)
+    proof_times(means, participants)
+    gas_costs(means, participants)
+    update_blockchain_times(means, participants)
+    proof_time_box(means, participants)
+    training_local_times(means, participants)
+    scores(means, participants)
+    class_scores(means, participants)
+    plt.show()
+
+    # %%
+
+    means = load_means(range(2, 9, 2), batchsizes, ["score"])
+    for samples in shared_samples(means):
+        participants_vs_batchsize(
+            means, samples, f"participantsVSBatchsize_{samples}.pgf"
+        )
+    participants_in_same_batchsize(means)
+    plt.show()
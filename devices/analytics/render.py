@@ -0,0 +1,276 @@
+import argparse
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+import aggregator_compile_setup
+import aggregator_witness_proof
+import client_compile_setup
+import client_witness_proof
+import combined_compile_setup
+import combined_witness_proof
+import gas_plot
+import plots
+
+# Renders the analytics figures for a selection of experiments in a process
+# pool. The device means of the selection are computed once and cached next to
+# the figures; a manifest records a digest of every figure's inputs and drawing
+# code, so figures whose inputs have not changed are skipped.
+
+MANIFEST = "render_manifest.json"
+
+
+def single(means):
+    return [({}, means)]
+
+
+def per_participants(means):
+    return [
+        ({"participants": participants}, experiment)
+        for participants, experiment in means.groupby(level="participants")
+    ]
+
+
+def per_samples(means):
+    runs = means.index.droplevel("round")
+    return [
+        (
+            {"samples": samples},
+            means[
+                runs.get_level_values("participants")
+                * runs.get_level_values("batchsize")
+                == samples
+            ],
+        )
+        for samples in plots.shared_samples(means)
+    ]
+
+
+class Figure:
+    # render(*inputs, *target values, path) draws and saves one figure. inputs
+    # are "means" (device means of the dataset, sliced by targets() into one
+    # (target, means) pair per figure) and/or the circuit analytics csv files
+    # "client" and "aggregator". file_name is formatted with the target.
+    def __init__(self, render, file_name, inputs=("means",), targets=single):
+        self.render = render
+        self.file_name = file_name
+        self.inputs = inputs
+        self.targets = targets
+
+
+FIGURES = {
+    "proof_times": Figure(
+        plots.proof_times, "ProofTimes_{participants}.pgf", targets=per_participants
+    ),
+    "gas_costs": Figure(
+        plots.gas_costs, "gascosts_{participants}.pgf", targets=per_participants
+    ),
+    "update_blockchain_times": Figure(
+        plots.update_blockchain_times,
+        "roundupdateBCtime_{participants}.pgf",
+        targets=per_participants,
+    ),
+    "proof_time_box": Figure(
+        plots.proof_time_box,
+        "roundProof_Time_{participants}.pgf",
+        targets=per_participants,
+    ),
+    "training_local_times": Figure(
+        plots.training_local_times,
+        "round_training_local_{participants}.pgf",
+        targets=per_participants,
+    ),
+    "scores": Figure(
+        plots.scores, "roundScore_{participants}.pgf", targets=per_participants
+    ),
+    "class_scores": Figure(
+        plots.class_scores,
+        "roundScoreClasses_{participants}.pgf",
+        targets=per_participants,
+    ),
+    "participants_vs_batchsize": Figure(
+        plots.participants_vs_batchsize,
+        "participantsVSBatchsize_{samples}.pgf",
+        targets=per_samples,
+    ),
+    "participants_in_same_batchsize": Figure(
+        plots.participants_in_same_batchsize, "participants_in_sameBatchsize.pgf"
+    ),
+    "gas_units": Figure(
+        gas_plot.plot, "gas_units_chart_with_larger_legend.pdf", inputs=()
+    ),
+    "client_compile_setup": Figure(
+        client_compile_setup.plot, "client_compile_setup.png", inputs=("client",)
+    ),
+    "client_witness_proof": Figure(
+        client_witness_proof.plot,
+        "client_memory_usage_witness_proof.png",
+        inputs=("client",),
+    ),
+    "aggregator_compile_setup": Figure(
+        aggregator_compile_setup.plot,
+        "aggregator_coplile_setup.png",
+        inputs=("aggregator",),
+    ),
+    "aggregator_witness_proof": Figure(
+        aggregator_witness_proof.plot,
+        "aggregator_witness_proof.png",
+        inputs=("aggregator",),
+    ),
+    "combined_compile_setup": Figure(
+        combined_compile_setup.plot,
+        "combined_compile_setup.pdf",
+        inputs=("client", "aggregator"),
+    ),
+    "combined_witness_proof": Figure(
+        combined_witness_proof.plot,
+        "combined_witness_proof.pdf",
+        inputs=("client", "aggregator"),
+    ),
+}
+
+
+def cached_means(cache_path, participants, batchsizes):
+    # device means of the selection, computed once per version of the source
+    # csv files
+    digest = plots.refresh(plots.BASE_PATH, plots.DATASET_PATH)
+    key = json.dumps([digest, participants, batchsizes]).encode()
+    file_path = os.path.join(
+        cache_path, f"means_{hashlib.sha256(key).hexdigest()[:16]}.parquet"
+    )
+    if os.path.exists(file_path):
+        return pd.read_parquet(file_path)
+    means = plots.load_means(participants, batchsizes)
+    os.makedirs(cache_path, exist_ok=True)
+    for name in os.listdir(cache_path):
+        os.remove(os.path.join(cache_path, name))
+    means.to_parquet(file_path)
+    return means
+
+
+def frame_digest(df):
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df).values.tobytes())
+    digest.update(json.dumps([str(c) for c in df.columns]).encode())
+    return digest.hexdigest()
+
+
+def code_digest(function):
+    with open(inspect.getsourcefile(function), "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def render(name, data, target, path):
+    figure = FIGURES[name]
+    # figures set global styles (seaborn contexts), keep them to this figure:
+    with plt.rc_context():
+        figure.render(*data, *target.values(), path)
+    plt.close("all")
+    return name, path
+
+
+def read_manifest(out_path):
+    file_path = os.path.join(out_path, MANIFEST)
+    if not os.path.exists(file_path):
+        return {}
+    with open(file_path) as file:
+        return json.load(file)
+
+
+def write_manifest(out_path, manifest):
+    file_path = os.path.join(out_path, MANIFEST)
+    with open(file_path + ".tmp", "w") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.replace(file_path + ".tmp", file_path)
+
+
+def plan(names, means, csv_data, fmt, out_path, manifest, force):
+    # (name, data, target, path, digest) of every figure to render
+    tasks = []
+    for name in names:
+        figure = FIGURES[name]
+        if any(source not in csv_data for source in figure.inputs if source != "means"):
+            print(f"Skipping {name}: analytics csv not found")
+            continue
+        if "means" in figure.inputs and means is None:
+            continue
+        targets = figure.targets(means) if "means" in figure.inputs else single(None)
+        for target, target_means in targets:
+            data = [
+                target_means if source == "means" else csv_data[source]
+                for source in figure.inputs
+            ]
+            file_name = figure.file_name.format(**target)
+            if fmt:
+                file_name = os.path.splitext(file_name)[0] + "." + fmt
+            digest = hashlib.sha256(
+                json.dumps(
+                    [name, target, code_digest(figure.render)]
+                    + [frame_digest(df) for df in data]
+                ).encode()
+            ).hexdigest()
+            path = os.path.join(out_path, file_name)
+            if not force and manifest.get(file_name) == digest and os.path.exists(path):
+                continue
+            tasks.append((name, data, target, path, digest))
+    return tasks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Render the analytics figures in parallel, skipping unchanged ones."
+    )
+    parser.add_argument(
+        "--figures", nargs="+", choices=list(FIGURES), default=list(FIGURES)
+    )
+    parser.add_argument("--participants", type=int, nargs="+")
+    parser.add_argument("--batchsizes", type=int, nargs="+")
+    parser.add_argument("--client-analytics", default="final_analytics.csv")
+    parser.add_argument(
+        "--aggregator-analytics", default="aggregator_final_analytics.csv"
+    )
+    parser.add_argument("--out", default="figures")
+    parser.add_argument("--format", help="file format of all figures, e.g. pdf, png")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--force", action="store_true", help="render every figure")
+    args = parser.parse_args()
+
+    csv_data = {
+        source: pd.read_csv(file_path)
+        for source, file_path in [
+            ("client", args.client_analytics),
+            ("aggregator", args.aggregator_analytics),
+        ]
+        if os.path.exists(file_path)
+    }
+    means = None
+    if any("means" in FIGURES[name].inputs for name in args.figures):
+        means = cached_means(
+            os.path.join(args.out, ".cache"), args.participants, args.batchsizes
+        )
+
+    os.makedirs(args.out, exist_ok=True)
+    manifest = read_manifest(args.out)
+    tasks = plan(
+        args.figures, means, csv_data, args.format, args.out, manifest, args.force
+    )
+    print(f"{len(tasks)} figures to render")
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(render, name, data, target, path): (path, digest)
+            for name, data, target, path, digest in tasks
+        }
+        for future in as_completed(futures):
+            path, digest = futures[future]
+            future.result()
+            manifest[os.path.basename(path)] = digest
+            write_manifest(args.out, manifest)
+            print(f"Rendered {path}")
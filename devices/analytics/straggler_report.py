@@ -0,0 +1,120 @@
+import argparse
+import json
+
+import pandas as pd
+
+# device phases before the "trained" barrier, in round order (see MiddleWare):
+LOCAL_PHASES = ["fetch", "wait_data", "train", "evaluate", "proof"]
+
+
+def read_barrier_log(log_path: str) -> pd.DataFrame:
+    # one json line per barrier wait, written by middleware.barrier
+    return pd.read_json(log_path, lines=True)
+
+
+def read_trace_spans(trace_path: str) -> pd.DataFrame:
+    # complete ("X") events of a Chrome trace written by utils.tracing
+    # (a JSON array, one event per line, possibly without its closing bracket)
+    with open(trace_path) as f:
+        events = [
+            json.loads(line.rstrip().rstrip(","))
+            for line in f
+            if line.strip() not in ("", "[", "]")
+        ]
+    spans = pd.DataFrame(
+        [
+            {
+                "span": event["name"],
+                "device": event["args"].get("device"),
+                "aggregator": event["args"].get("aggregator"),
+                "round": int(event["args"]["round"]),
+                "seconds": event["dur"] / 1e6,
+            }
+            for event in events
+            if event["ph"] == "X" and "round" in event["args"]
+        ]
+    )
+    return spans
+
+
+def barrier_summary(barrier_df: pd.DataFrame) -> pd.DataFrame:
+    # per round and barrier: arrival spread, the last device and the total wait
+    # (arrivals in seconds since the first arrival of the run)
+    barrier_df = barrier_df.assign(
+        arrival=barrier_df["arrival"] - barrier_df["arrival"].min()
+    )
+    grouped = barrier_df.sort_values("arrival").groupby(["round", "phase"])
+    return pd.DataFrame(
+        {
+            "first_arrival": grouped["arrival"].min(),
+            "last_arrival": grouped["arrival"].max(),
+            "spread": grouped["arrival"].max() - grouped["arrival"].min(),
+            "last_device": grouped["device"].last(),
+            "total_wait": grouped["wait"].sum(),
+            "max_wait": grouped["wait"].max(),
+        }
+    )
+
+
+def device_waits(barrier_df: pd.DataFrame) -> pd.DataFrame:
+    # how often each device was last, and how long it waited for the others
+    return barrier_df.groupby(["phase", "device"]).agg(
+        times_last=("is_last", "sum"),
+        mean_wait=("wait", "mean"),
+        total_wait=("wait", "sum"),
+    )
+
+
+def critical_path(barrier_df: pd.DataFrame, spans_df: pd.DataFrame) -> pd.DataFrame:
+    # the device arriving last at the "trained" barrier holds up the round; its
+    # slowest local phase is the one to speed up. Aggregation runs after the
+    # "submitted" barrier and adds to every round.
+    summary = barrier_summary(barrier_df).xs("trained", level="phase")
+    rows = []
+    for round_number, row in summary.iterrows():
+        device = row["last_device"]
+        device_spans = spans_df[
+            (spans_df["device"] == device) & (spans_df["round"] == round_number)
+        ]
+        phases = device_spans.groupby("span")["seconds"].sum()
+        phases = phases.reindex(LOCAL_PHASES).fillna(0.0)
+        aggregate = spans_df[
+            (spans_df["span"] == "aggregate") & (spans_df["round"] == round_number)
+        ]["seconds"].sum()
+        rows.append(
+            {
+                "round": round_number,
+                "critical_device": device,
+                "spread": row["spread"],
+                "critical_phase": phases.idxmax(),
+                "critical_phase_seconds": phases.max(),
+                "aggregate_seconds": aggregate,
+                **{f"{phase}_seconds": phases[phase] for phase in LOCAL_PHASES},
+            }
+        )
+    return pd.DataFrame(rows).set_index("round")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Barrier waits, stragglers and the critical path of each round."
+    )
+    parser.add_argument("barrier_log", help="barrier log (BarrierLogPath)")
+    parser.add_argument("--trace", help="Chrome trace (TracePath) for phase times")
+    parser.add_argument("--out", help="write the per round report to this csv file")
+    args = parser.parse_args()
+
+    barrier_df = read_barrier_log(args.barrier_log)
+    print(barrier_summary(barrier_df).round(3).to_string())
+    print()
+    print(device_waits(barrier_df).round(3).to_string())
+    report = barrier_summary(barrier_df)
+    if args.trace:
+        report = critical_path(barrier_df, read_trace_spans(args.trace))
+        print()
+        print(report.round(3).to_string())
+        print()
+        print("Critical phase share of rounds:")
+        print(report["critical_phase"].value_counts(normalize=True).to_string())
+    if args.out:
+        report.to_csv(args.out)
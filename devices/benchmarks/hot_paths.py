@@ -0,0 +1,382 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import timeit
+
+import numpy as np
+import pandas as pd
+from benchmarks.ingestion import LABEL, encode, make_batch
+from middleware.aggregator import args_parser as aggregator_args_parser
+from middleware.aggregator import (
+    moving_average,
+    moving_average_bias,
+    moving_average_weights,
+)
+from middleware.hash import SNARK_SCALAR_FIELD, convert_matrix, mimc_hash
+from middleware.middleware import FederatedLearningModel, callback
+from middleware.middleware import args_parser as client_args_parser
+from middleware.neural_net import FCLayer, Network, mse, mse_prime
+from middleware.sample_buffer import SampleBuffer
+from utils.utils import get_config_file_path, read_yaml
+
+# Times the Python hot paths of a round at the sizes of CONFIG.yaml. Every run
+# appends one json line to a history file; against a baseline (a run of an
+# earlier history), cases slower by more than --threshold are flagged.
+
+
+def model_parameters(config: dict, rng) -> tuple[np.ndarray, np.ndarray]:
+    # weights and bias as the devices hold them, scaled by Precision
+    precision = config["DEFAULT"]["Precision"]
+    out_dimension = config["DEFAULT"]["OutputDimension"]
+    in_dimension = config["DEFAULT"]["InputDimension"]
+    w = rng.integers(-precision, precision, size=(out_dimension, in_dimension))
+    b = rng.integers(-precision, precision, size=out_dimension)
+    return w, b
+
+
+def field_hash(rng) -> int:
+    return int.from_bytes(rng.bytes(32), "big") % SNARK_SCALAR_FIELD
+
+
+def client_witness_args(config: dict, rng) -> list:
+    # the arguments MiddleWare.__generate_Proof passes to compute-witness
+    w, b = model_parameters(config, rng)
+    w_new, b_new = model_parameters(config, rng)
+    batch = make_batch(config, config["DEFAULT"]["BatchSize"])
+    x = batch.drop(columns=LABEL).to_numpy() * config["DEFAULT"]["Precision"]
+    global_weights, global_weights_sign = convert_matrix(w)
+    global_bias, global_bias_sign = convert_matrix(b)
+    x, x_sign = convert_matrix(x.astype(int))
+    return [
+        global_weights,
+        global_weights_sign,
+        global_bias,
+        global_bias_sign,
+        x,
+        x_sign,
+        batch[LABEL].to_numpy(),
+        config["DEFAULT"]["LearningRate"],
+        config["DEFAULT"]["Precision"],
+        convert_matrix(w_new)[0],
+        convert_matrix(b_new)[0],
+        field_hash(rng),
+        field_hash(rng),
+    ]
+
+
+def aggregator_witness_args(config: dict, participants: int, rng) -> list:
+    # the arguments OffChainAggregator._generate_proof passes to compute-witness
+    local = [model_parameters(config, rng) for _ in range(participants)]
+    w, b = model_parameters(config, rng)
+    w_new, b_new = model_parameters(config, rng)
+    return [
+        *convert_matrix([local_w for local_w, _ in local]),
+        *convert_matrix([local_b for _, local_b in local]),
+        *convert_matrix(w),
+        *convert_matrix(b),
+        [field_hash(rng) for _ in range(participants)],
+        *convert_matrix(w_new),
+        *convert_matrix(b_new),
+        field_hash(rng),
+    ]
+
+
+def network(config: dict) -> Network:
+    net = Network(
+        config["DEFAULT"]["OutputDimension"],
+        config["DEFAULT"]["InputDimension"],
+        config["DEFAULT"]["Precision"],
+    )
+    net.add(
+        FCLayer(
+            config["DEFAULT"]["InputDimension"], config["DEFAULT"]["OutputDimension"]
+        )
+    )
+    net.use(mse, mse_prime)
+    return net
+
+
+# A case returns the function to time, called without arguments. Cases taking
+# participants are timed once per participant count. The moving_average case
+# first checks the kernel against the Python reference.
+
+
+def mimc_hash_case(config: dict, rng):
+    w, b = model_parameters(config, rng)
+    w, _ = convert_matrix(w)
+    b, _ = convert_matrix(b)
+    return lambda: mimc_hash(w, b)
+
+
+def network_fit_case(config: dict, rng):
+    net = network(config)
+    w, b = net.get_weights(), net.get_bias().reshape(-1)
+    batch = make_batch(config, config["DEFAULT"]["BatchSize"])
+    x_train = batch.drop(columns=LABEL).to_numpy()
+    y_train = batch[LABEL].to_numpy()
+
+    def fit():
+        # every call starts from the same model:
+        net.set_weights(w)
+        net.set_bias(b)
+        net.fit(
+            x_train,
+            y_train,
+            epochs=config["DEFAULT"]["Epochs"],
+            learning_rate=config["DEFAULT"]["LearningRate"],
+        )
+
+    return fit
+
+
+def network_predict_case(config: dict, rng, test_samples: int):
+    net = network(config)
+    x_test = make_batch(config, test_samples).drop(columns=LABEL).to_numpy()
+    return lambda: net.predict(x_test)
+
+
+def client_args_parser_case(config: dict, rng):
+    args = client_witness_args(config, rng)
+    return lambda: client_args_parser(args)
+
+
+def callback_case(config: dict, rng):
+    # the consumer callback decoding a sensor batch into the sample buffer of
+    # a model; the model is built without __init__, which loads the test set
+    model = FederatedLearningModel.__new__(FederatedLearningModel)
+    model.config = config
+    model.samples = SampleBuffer(config["DEFAULT"]["SampleBufferCapacity"])
+    rows = config["DEFAULT"]["NumberOfSamplesGenerated"]
+    body = encode(make_batch(config, rows), config["DEFAULT"]["WireFormat"])
+
+    def consume():
+        # drained like a training round, a full buffer blocks the append:
+        if model.samples.size + rows > model.samples.capacity:
+            model.samples.clear()
+        callback(None, None, None, body, args=model)
+
+    return consume
+
+
+def moving_average_weights_case(config: dict, rng, participants: int):
+    local = [model_parameters(config, rng)[0].tolist() for _ in range(participants)]
+    global_w = model_parameters(config, rng)[0].tolist()
+    return lambda: moving_average_weights(local, participants, global_w)
+
+
+def moving_average_bias_case(config: dict, rng, participants: int):
+    local = [model_parameters(config, rng)[1].tolist() for _ in range(participants)]
+    global_b = model_parameters(config, rng)[1].tolist()
+    return lambda: moving_average_bias(local, participants, global_b)
+
+
+def check_moving_average(config: dict, rng, participants: int, trials: int = 100):
+    # the vectorized kernel must equal int() of the Python reference element by
+    # element, also for values far above Precision (differences stay below
+    # 2**53, where both compute the same float steps)
+    shape = (config["DEFAULT"]["OutputDimension"], config["DEFAULT"]["InputDimension"])
+    for _ in range(trials):
+        scale = int(rng.choice([config["DEFAULT"]["Precision"], 2**31, 2**50]))
+        local_w = rng.integers(-scale, scale, size=(participants, *shape))
+        global_w = rng.integers(-scale, scale, size=shape)
+        local_b, global_b = local_w[:, :, 0], global_w[:, 0]
+        expected_w = [
+            [int(x) for x in y]
+            for y in moving_average_weights(
+                local_w.tolist(), participants, global_w.tolist()
+            )
+        ]
+        expected_b = [
+            int(x)
+            for x in moving_average_bias(
+                local_b.tolist(), participants, global_b.tolist()
+            )
+        ]
+        if (
+            moving_average(local_w, participants, global_w).tolist() != expected_w
+            or moving_average(local_b, participants, global_b).tolist() != expected_b
+        ):
+            raise Exception(
+                f"moving_average differs from the reference ({participants=})"
+            )
+
+
+def moving_average_case(config: dict, rng, participants: int):
+    # the kernel on the stacked (clients, out, in) weights
+    check_moving_average(config, rng, participants)
+    local = np.stack([model_parameters(config, rng)[0] for _ in range(participants)])
+    global_w = model_parameters(config, rng)[0]
+    return lambda: moving_average(local, participants, global_w)
+
+
+def convert_matrix_case(config: dict, rng, participants: int):
+    # the stacked local weights of the aggregator witness
+    local = [model_parameters(config, rng)[0].tolist() for _ in range(participants)]
+    return lambda: convert_matrix(local)
+
+
+def aggregator_args_parser_case(config: dict, rng, participants: int):
+    args = aggregator_witness_args(config, participants, rng)
+    return lambda: aggregator_args_parser(args)
+
+
+CASES = {
+    "mimc_hash": mimc_hash_case,
+    "network_fit": network_fit_case,
+    "network_predict": network_predict_case,
+    "client_args_parser": client_args_parser_case,
+    "callback": callback_case,
+    "moving_average_weights": moving_average_weights_case,
+    "moving_average_bias": moving_average_bias_case,
+    "moving_average": moving_average_case,
+    "convert_matrix": convert_matrix_case,
+    "aggregator_args_parser": aggregator_args_parser_case,
+}
+PER_PARTICIPANTS = [
+    "moving_average_weights",
+    "moving_average_bias",
+    "moving_average",
+    "convert_matrix",
+    "aggregator_args_parser",
+]
+
+
+def build(name: str, config: dict, participants: list[int], test_samples: int):
+    # (case name with its participant count, function to time) pairs
+    rng = np.random.default_rng(0)
+    if name in PER_PARTICIPANTS:
+        return [
+            (f"{name}/participants={p}", CASES[name](config, rng, p))
+            for p in participants
+        ]
+    if name == "network_predict":
+        return [(name, CASES[name](config, rng, test_samples))]
+    return [(name, CASES[name](config, rng))]
+
+
+def measure(function, repeat: int) -> dict:
+    # seconds per call; loops per repeat are chosen so a repeat takes >= 0.2 s
+    timer = timeit.Timer(function)
+    loops, _ = timer.autorange()
+    times = [t / loops for t in timer.repeat(repeat=repeat, number=loops)]
+    return {"median": statistics.median(times), "min": min(times), "loops": loops}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(
+    config: dict,
+    names: list[str],
+    participants: list[int],
+    test_samples: int,
+    repeat: int,
+) -> dict:
+    results = {}
+    for name in names:
+        for case, function in build(name, config, participants, test_samples):
+            results[case] = measure(function, repeat)
+            print(f"{case}: {results[case]['median'] * 1e6:.1f} us")
+    return {
+        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sizes": {
+            key: config["DEFAULT"][key]
+            for key in [
+                "InputDimension",
+                "OutputDimension",
+                "BatchSize",
+                "Epochs",
+                "NumberOfSamplesGenerated",
+                "WireFormat",
+            ]
+        },
+        "test_samples": test_samples,
+        "results": results,
+    }
+
+
+def read_history(history_path: str) -> list[dict]:
+    if not os.path.exists(history_path):
+        return []
+    with open(history_path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(history_path: str, entry: dict):
+    with open(history_path, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> pd.DataFrame:
+    # median microseconds per call of the cases both runs have
+    cases = [case for case in current["results"] if case in baseline["results"]]
+    report = pd.DataFrame(
+        {
+            "baseline_us": [baseline["results"][c]["median"] * 1e6 for c in cases],
+            "current_us": [current["results"][c]["median"] * 1e6 for c in cases],
+        },
+        index=pd.Index(cases, name="case"),
+    )
+    report["ratio"] = report["current_us"] / report["baseline_us"]
+    report["regression"] = report["ratio"] > 1 + threshold
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time the Python hot paths and flag regressions against a baseline."
+    )
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument(
+        "--participants",
+        type=int,
+        nargs="+",
+        help="participant counts of the aggregator cases, "
+        "defaults to NumberOfParticipants",
+    )
+    parser.add_argument(
+        "--test-samples", type=int, default=1000, help="samples per predict call"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--history", default="hot_paths_history.jsonl")
+    parser.add_argument(
+        "--baseline", help="history file whose last run is the baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="flag cases slower than the baseline by more than this fraction",
+    )
+    args = parser.parse_args()
+
+    config = read_yaml(get_config_file_path())
+    participants = args.participants or [config["DEFAULT"]["NumberOfParticipants"]]
+    entry = run(config, args.cases, participants, args.test_samples, args.repeat)
+    append_history(args.history, entry)
+
+    if args.baseline:
+        history = read_history(args.baseline)
+        if not history:
+            raise SystemExit(f"No runs in {args.baseline}")
+        report = compare(history[-1], entry, args.threshold)
+        print(report.round(2).to_string())
+        regressions = report.index[report["regression"]].tolist()
+        if regressions:
+            raise SystemExit(f"Regressions: {', '.join(regressions)}")
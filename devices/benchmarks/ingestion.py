@@ -0,0 +1,104 @@
+import argparse
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from message_broker.broker import create_consumer, create_publisher
+from message_broker.wire import decode_message, encode_batch
+from middleware.sample_buffer import SampleBuffer
+from utils.utils import get_config_file_path, read_yaml
+
+LABEL = "Activity"
+
+
+def make_batch(config: dict, rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    features = rng.normal(size=(rows, config["DEFAULT"]["InputDimension"]))
+    batch = pd.DataFrame(features, columns=[f"f{i}" for i in range(features.shape[1])])
+    batch[LABEL] = rng.choice(config["DEFAULT"]["ActivitiesEncoded"], size=rows)
+    return batch
+
+
+def encode(batch: pd.DataFrame, wire_format: str):
+    if wire_format == "arrays":
+        return batch.drop(columns=LABEL).to_numpy(), batch[LABEL].to_numpy()
+    if wire_format == "binary":
+        return encode_batch(batch, LABEL)
+    return batch.to_csv().encode()
+
+
+def message_size(message) -> int:
+    if isinstance(message, tuple):
+        return sum(array.nbytes for array in message)
+    return len(message)
+
+
+def measure(config: dict, wire_format: str, messages: int, rows: int) -> dict:
+    # one publisher thread, one consumer decoding into a SampleBuffer like the
+    # middleware callback; timed from the first publish to the last append
+    queue_name = f"{config['DEFAULT']['QueueBase']}ingestion_{wire_format}"
+    batch = make_batch(config, rows)
+    samples = SampleBuffer(config["DEFAULT"]["SampleBufferCapacity"])
+    received = 0
+    done = threading.Event()
+
+    def on_message(ch, method, properties, body):
+        nonlocal received
+        if samples.size + rows > samples.capacity:
+            # drained like a training round, a full buffer blocks the append:
+            samples.clear()
+        samples.append(*decode_message(body, LABEL))
+        received += 1
+        if received == messages:
+            done.set()
+
+    consumer = create_consumer(config)
+    consumer.declare_queue(queue_name, max_length=config["DEFAULT"]["QueueMaxLength"])
+    consumer.consume_data(
+        queue_name, on_message, prefetch_count=config["DEFAULT"]["ConsumerPrefetch"]
+    )
+    threading.Thread(target=consumer.start_consuming, daemon=True).start()
+    publisher = create_publisher(config)
+    publisher.declare_queue(queue_name, max_length=config["DEFAULT"]["QueueMaxLength"])
+
+    t = time.perf_counter()
+    for _ in range(messages):
+        # encoding is part of the device's cost per message:
+        publisher.publish_data(queue_name, encode(batch, wire_format))
+    done.wait()
+    elapsed = time.perf_counter() - t
+    return {
+        "format": wire_format,
+        "messages": messages,
+        "message_bytes": message_size(encode(batch, wire_format)),
+        "seconds": elapsed,
+        "messages_per_second": messages / elapsed,
+        "rows_per_second": messages * rows / elapsed,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Ingestion throughput from publisher to device sample buffer."
+    )
+    parser.add_argument(
+        "--transport",
+        default="inprocess",
+        choices=["inprocess", "blocking", "asyncio"],
+        help="overrides MessageBrokerTransport",
+    )
+    parser.add_argument("--formats", nargs="+", default=["arrays", "binary", "csv"])
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--rows", type=int, help="defaults to NumberOfSamplesGenerated")
+    parser.add_argument("--out", default="ingestion_benchmark.csv")
+    args = parser.parse_args()
+
+    config = read_yaml(get_config_file_path())
+    config["DEFAULT"]["MessageBrokerTransport"] = args.transport
+    rows = args.rows or config["DEFAULT"]["NumberOfSamplesGenerated"]
+    result = pd.DataFrame(
+        [measure(config, f, args.messages, rows) for f in args.formats]
+    ).set_index("format")
+    print(result.round(2).to_string())
+    result.to_csv(args.out)
@@ -0,0 +1,116 @@
+import argparse
+import json
+
+import pandas as pd
+from utils.utils import get_config_file_path, read_yaml
+from web3 import Web3
+
+# dummy proof, accepted because the contract is initialized with IsNoProof:
+NO_PROOF_A = [1, 1]
+NO_PROOF_B = [[1, 1], [1, 1]]
+NO_PROOF_C = [1, 1]
+NO_PROOF_INPUTS = [1] * 5
+
+
+def deploy_fl_contract(web3: Web3, config: dict, abi: list, bytecode: str, admin: str):
+    contract = web3.eth.contract(abi=abi, bytecode=bytecode)
+    # an update interval of 0 lets every end_update_round start a new round:
+    tx_hash = contract.constructor(
+        config["DEFAULT"]["InputDimension"],
+        config["DEFAULT"]["OutputDimension"],
+        config["DEFAULT"]["LearningRate"],
+        config["DEFAULT"]["Precision"],
+        config["DEFAULT"]["BatchSize"],
+        0,
+    ).transact({"from": admin})
+    receipt = web3.eth.wait_for_transaction_receipt(tx_hash)
+    deployed = web3.eth.contract(address=receipt.contractAddress, abi=abi)
+    no_link = bytes(32)
+    tx_hash = deployed.functions.initModel([], [], True, no_link, no_link).transact(
+        {"from": admin}
+    )
+    web3.eth.wait_for_transaction_receipt(tx_hash)
+    return deployed
+
+
+def gas_used(web3: Web3, tx_hash) -> int:
+    return web3.eth.wait_for_transaction_receipt(tx_hash).gasUsed
+
+
+def measure_round(web3: Web3, contract, participants: list[str], admin: str) -> dict:
+    outstanding_gas = [
+        contract.functions.roundUpdateOutstanding().estimateGas({"from": p})
+        for p in participants
+    ]
+    send_gas = []
+    for wb_hash, participant in enumerate(participants, start=1):
+        tx_hash = contract.functions.send_wb_hash(
+            wb_hash, NO_PROOF_A, NO_PROOF_B, NO_PROOF_C, NO_PROOF_INPUTS
+        ).transact({"from": participant})
+        send_gas.append(gas_used(web3, tx_hash))
+    end_round_gas = gas_used(
+        web3, contract.functions.end_update_round().transact({"from": admin})
+    )
+    clear_stake_gas = gas_used(
+        web3, contract.functions.clearStakeWinners().transact({"from": admin})
+    )
+    return {
+        "roundUpdateOutstanding_max": max(outstanding_gas),
+        "send_wb_hash_first": send_gas[0],
+        "send_wb_hash_last": send_gas[-1],
+        "send_wb_hash_mean": sum(send_gas) / len(send_gas),
+        "end_update_round": end_round_gas,
+        "clearStakeWinners": clear_stake_gas,
+    }
+
+
+def connect(config: dict) -> tuple[Web3, list, str]:
+    if config["DEFAULT"]["BlockchainBackend"] == "in-process":
+        from middleware.in_process_chain import FL_CONTRACT, compile_contracts, create_web3
+
+        web3 = create_web3(num_accounts=config["DEFAULT"]["InProcessChainAccounts"])
+        compiled = compile_contracts(config)[FL_CONTRACT]
+        return web3, compiled["abi"], compiled["bin"]
+
+    web3 = Web3(Web3.HTTPProvider(config["DEFAULT"]["EtheriumRPCServer"]))
+    with open(config["DEFAULT"]["FLContractABIPAth"]) as f:
+        artifact = json.load(f)
+    return web3, artifact["abi"], artifact["bytecode"]
+
+
+def run(config: dict, participant_counts: list[int], rounds: int) -> pd.DataFrame:
+    web3, abi, bytecode = connect(config)
+    admin = web3.eth.accounts[config["DEFAULT"]["BlockchainAdminAccountNumber"]]
+
+    rows = []
+    for participant_count in participant_counts:
+        contract = deploy_fl_contract(web3, config, abi, bytecode, admin)
+        participants = web3.eth.accounts[:participant_count]
+        for round_number in range(1, rounds + 1):
+            row = measure_round(web3, contract, participants, admin)
+            row.update({"participants": participant_count, "round": round_number})
+            rows.append(row)
+            print(f"participants={participant_count}, round={round_number}: {row}")
+    return pd.DataFrame(rows).set_index(["participants", "round"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Gas per FederatedModel round function across participant counts."
+    )
+    parser.add_argument(
+        "--participants", type=int, nargs="+", default=[1, 2, 4, 8, 12]
+    )
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument(
+        "--backend", choices=["rpc", "in-process"], help="overrides BlockchainBackend"
+    )
+    parser.add_argument("--out", default="round_gas_benchmark.csv")
+    args = parser.parse_args()
+
+    config = read_yaml(get_config_file_path())
+    if args.backend:
+        config["DEFAULT"]["BlockchainBackend"] = args.backend
+    result = run(config, args.participants, args.rounds)
+    print(result.groupby(level="participants").mean().round(0).to_string())
+    result.to_csv(args.out)
@@ -1,8 +1,128 @@
 import os
 import time
 
+import numpy as np
 import pandas as pd
-from message_broker.publisher import Publisher
+from edge_device.sampler import EpochSampler, device_seed
+from message_broker.broker import create_publisher
+from message_broker.wire import encode_arrays
+
+
+def load_device_dataset(datasource, config):
+    data = pd.read_csv(
+        datasource,
+        names=[
+            "T_xacc",
+            "T_yacc",
+            "T_zacc",
+            "T_xgyro",
+            "T_ygyro",
+            "T_zgyro",
+            "T_xmag",
+            "T_ymag",
+            "T_zmag",
+            "RA_xacc",
+            "RA_yacc",
+            "RA_zacc",
+            "RA_xgyro",
+            "RA_ygyro",
+            "RA_zgyro",
+            "RA_xmag",
+            "RA_ymag",
+            "RA_zmag",
+            "LA_xacc",
+            "LA_yacc",
+            "LA_zacc",
+            "LA_xgyro",
+            "LA_ygyro",
+            "LA_zgyro",
+            "LA_xmag",
+            "LA_ymag",
+            "LA_zmag",
+            "RL_xacc",
+            "RL_yacc",
+            "RL_zacc",
+            "RL_xgyro",
+            "RL_ygyro",
+            "RL_zgyro",
+            "RL_xmag",
+            "RL_ymag",
+            "RL_zmag",
+            "LL_xacc",
+            "LL_yacc",
+            "LL_zacc",
+            "LL_xgyro",
+            "LL_ygyro",
+            "LL_zgyro",
+            "LL_xmag",
+            "LL_ymag",
+            "LL_zmag",
+            "Activity",
+        ],
+    )
+    data.fillna(inplace=True, method="backfill")
+    data.dropna(inplace=True)
+    data.drop(
+        columns=[
+            "T_xacc",
+            "T_yacc",
+            "T_zacc",
+            "T_xgyro",
+            "T_ygyro",
+            "T_zgyro",
+            "T_xmag",
+            "T_ymag",
+            "T_zmag",
+            "RA_xacc",
+            "RA_yacc",
+            "RA_zacc",
+            "RA_xgyro",
+            "RA_ygyro",
+            "RA_zgyro",
+            "RA_xmag",
+            "RA_ymag",
+            "RA_zmag",
+            "RL_xacc",
+            "RL_yacc",
+            "RL_zacc",
+            "RL_xgyro",
+            "RL_ygyro",
+            "RL_zgyro",
+            "RL_xmag",
+            "RL_ymag",
+            "RL_zmag",
+            "LL_xacc",
+            "LL_yacc",
+            "LL_zacc",
+            "LL_xgyro",
+            "LL_ygyro",
+            "LL_zgyro",
+            "LL_xmag",
+            "LL_ymag",
+            "LL_zmag",
+        ],
+        inplace=True,
+    )
+    activity_mapping = config["DEFAULT"]["ActivityMappings"]
+    activity_encoding = config["DEFAULT"]["ActivityEncoding"]
+    filtered_activities = config["DEFAULT"]["Activities"]
+    for key in activity_mapping.keys():
+        data.loc[data["Activity"] == key, "Activity"] = activity_mapping[key]
+    data = data[data["Activity"].isin(filtered_activities)]
+    for key in activity_encoding.keys():
+        data.loc[data["Activity"] == key, "Activity"] = activity_encoding[key]
+    return data
+
+
+def encode_message(config, columns, label_column, features, labels):
+    if config["DEFAULT"]["MessageBrokerTransport"] == "inprocess":
+        # passed by reference, no encoding needed:
+        return np.asarray(features, dtype=np.float64), np.asarray(labels, np.int64)
+    if config["DEFAULT"]["WireFormat"] == "csv":
+        batch = pd.DataFrame(features, columns=columns)
+        batch[label_column] = labels
+        return batch.to_csv()
+    return encode_arrays(columns, label_column, features, labels)
 
 
 class EdgeDevice:
@@ -13,129 +133,41 @@ class EdgeDevice:
                 self.config["DEFAULT"]["TrainFilePath"], DeviceName + "/device_data.txt"
             )
         )
-        self.publisher = Publisher()
+        self.publisher = create_publisher(self.config)
         self.queueName = self.config["DEFAULT"]["QueueBase"] + DeviceName
-        self.publisher.declare_queue(self.queueName)
+        self.publisher.declare_queue(
+            self.queueName, max_length=self.config["DEFAULT"]["QueueMaxLength"]
+        )
         self.data = None
-        self.init_dataset()
+        self.columns = None
+        self.sampler = None
+        self.init_dataset(DeviceName)
 
-    def init_dataset(self):
-        self.data = pd.read_csv(
-            self.datasource,
-            names=[
-                "T_xacc",
-                "T_yacc",
-                "T_zacc",
-                "T_xgyro",
-                "T_ygyro",
-                "T_zgyro",
-                "T_xmag",
-                "T_ymag",
-                "T_zmag",
-                "RA_xacc",
-                "RA_yacc",
-                "RA_zacc",
-                "RA_xgyro",
-                "RA_ygyro",
-                "RA_zgyro",
-                "RA_xmag",
-                "RA_ymag",
-                "RA_zmag",
-                "LA_xacc",
-                "LA_yacc",
-                "LA_zacc",
-                "LA_xgyro",
-                "LA_ygyro",
-                "LA_zgyro",
-                "LA_xmag",
-                "LA_ymag",
-                "LA_zmag",
-                "RL_xacc",
-                "RL_yacc",
-                "RL_zacc",
-                "RL_xgyro",
-                "RL_ygyro",
-                "RL_zgyro",
-                "RL_xmag",
-                "RL_ymag",
-                "RL_zmag",
-                "LL_xacc",
-                "LL_yacc",
-                "LL_zacc",
-                "LL_xgyro",
-                "LL_ygyro",
-                "LL_zgyro",
-                "LL_xmag",
-                "LL_ymag",
-                "LL_zmag",
-                "Activity",
-            ],
+    def init_dataset(self, DeviceName):
+        self.data = load_device_dataset(self.datasource, self.config)
+        features = self.data.drop(columns=self.y_name())
+        self.columns = list(features.columns)
+        self.sampler = EpochSampler(
+            features.to_numpy(dtype=np.float64),
+            self.data[self.y_name()].to_numpy(dtype=np.int64),
+            seed=device_seed(DeviceName, self.config["DEFAULT"]["SamplerSeed"]),
         )
-        self.data.fillna(inplace=True, method="backfill")
-        self.data.dropna(inplace=True)
-        self.data.drop(
-            columns=[
-                "T_xacc",
-                "T_yacc",
-                "T_zacc",
-                "T_xgyro",
-                "T_ygyro",
-                "T_zgyro",
-                "T_xmag",
-                "T_ymag",
-                "T_zmag",
-                "RA_xacc",
-                "RA_yacc",
-                "RA_zacc",
-                "RA_xgyro",
-                "RA_ygyro",
-                "RA_zgyro",
-                "RA_xmag",
-                "RA_ymag",
-                "RA_zmag",
-                "RL_xacc",
-                "RL_yacc",
-                "RL_zacc",
-                "RL_xgyro",
-                "RL_ygyro",
-                "RL_zgyro",
-                "RL_xmag",
-                "RL_ymag",
-                "RL_zmag",
-                "LL_xacc",
-                "LL_yacc",
-                "LL_zacc",
-                "LL_xgyro",
-                "LL_ygyro",
-                "LL_zgyro",
-                "LL_xmag",
-                "LL_ymag",
-                "LL_zmag",
-            ],
-            inplace=True,
-        )
-        activity_mapping = self.config["DEFAULT"]["ActivityMappings"]
-        activity_encoding = self.config["DEFAULT"]["ActivityEncoding"]
-        filtered_activities = self.config["DEFAULT"]["Activities"]
-        for key in activity_mapping.keys():
-            self.data.loc[self.data["Activity"] == key, "Activity"] = activity_mapping[
-                key
-            ]
-        self.data = self.data[self.data["Activity"].isin(filtered_activities)]
-        for key in activity_encoding.keys():
-            self.data.loc[self.data["Activity"] == key, "Activity"] = activity_encoding[
-                key
-            ]
 
     def next_batch(self):
         p = self.config["DEFAULT"]["NumberOfSamplesGenerated"]
-        batch = self.data.sample(p)
-        return batch
+        return self.sampler.next_batch(p)
+
+    def encode_batch(self, features, labels):
+        return encode_message(
+            self.config, self.columns, self.y_name(), features, labels
+        )
 
     def start_EdgeDevice(self):
         while True:
-            nextbatch = self.next_batch()
-            self.publisher.publish_data(self.queueName, nextbatch.to_csv())
+            features, labels = self.next_batch()
+            self.publisher.publish_data(
+                self.queueName, self.encode_batch(features, labels)
+            )
             time.sleep(float(self.config["DEFAULT"]["IntervalDataGenerator"]))
 
     def y_name(self):
@@ -0,0 +1,52 @@
+import zlib
+
+import numpy as np
+
+
+def device_seed(device_name, seed=0) -> np.random.SeedSequence:
+    # deterministic per device, and different between devices:
+    return np.random.SeedSequence([seed, zlib.crc32(device_name.encode())])
+
+
+# Samples batches without replacement: the rows are shuffled once per epoch and
+# consecutive batches are consecutive slices of the shuffled rows. Rows that do
+# not fill a last batch are skipped, so a batch never repeats a row.
+#
+# contiguous=True keeps a shuffled copy of the data per epoch and returns views
+# on it. contiguous=False only shuffles row indices and gathers each batch,
+# for datasets shared between many samplers.
+class EpochSampler:
+    def __init__(self, features, labels, seed=None, contiguous=True):
+        self.features = features
+        self.labels = labels
+        self.contiguous = contiguous
+        self.rng = np.random.default_rng(seed)
+        self.epoch = -1
+        self.position = 0
+        self.order = None
+        self.epoch_features = None
+        self.epoch_labels = None
+        self._new_epoch()
+
+    def _new_epoch(self):
+        self.epoch += 1
+        self.position = 0
+        self.order = self.rng.permutation(len(self.labels))
+        if self.contiguous:
+            # a new copy, batches of the last epoch stay valid:
+            self.epoch_features = self.features[self.order]
+            self.epoch_labels = self.labels[self.order]
+
+    def next_batch(self, size) -> tuple[np.ndarray, np.ndarray]:
+        if size > len(self.labels):
+            raise ValueError(f"batch of {size} rows from {len(self.labels)} rows")
+        if self.position + size > len(self.labels):
+            self._new_epoch()
+        start, self.position = self.position, self.position + size
+        if self.contiguous:
+            return (
+                self.epoch_features[start : self.position],
+                self.epoch_labels[start : self.position],
+            )
+        rows = self.order[start : self.position]
+        return self.features[rows], self.labels[rows]
@@ -0,0 +1,169 @@
+import argparse
+import asyncio
+import glob
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from edge_device.edge_device import encode_message, load_device_dataset
+from edge_device.sampler import EpochSampler, device_seed
+from message_broker.broker import create_publisher
+from utils.utils import get_config_file_path, read_yaml
+
+# Simulates a fleet of edge devices from one asyncio loop: every logical device
+# is a coroutine following its own sampling schedule, datasets are loaded once
+# and shared read-only, and encoding/publishing runs on a small worker pool with
+# one publisher per worker thread.
+
+
+class SharedDataset:
+    def __init__(self, data: pd.DataFrame, label_column: str):
+        features = data.drop(columns=label_column)
+        self.columns = list(features.columns)
+        self.label_column = label_column
+        self.features = features.to_numpy(dtype=np.float64)
+        self.labels = data[label_column].to_numpy(dtype=np.int64)
+        self.features.setflags(write=False)
+        self.labels.setflags(write=False)
+
+
+def load_shared_datasets(config) -> list[SharedDataset]:
+    paths = sorted(
+        glob.glob(os.path.join(config["DEFAULT"]["TrainFilePath"], "*/device_data.txt"))
+    )
+    if not paths:
+        raise Exception(f"No device datasets in {config['DEFAULT']['TrainFilePath']}")
+    label_column = config["DEFAULT"]["ResponseVariable"]
+    return [SharedDataset(load_device_dataset(p, config), label_column) for p in paths]
+
+
+class SimulatedDevice:
+    def __init__(self, name, queue_name, dataset, interval, offset, jitter, seed):
+        self.name = name
+        self.queue_name = queue_name
+        self.dataset = dataset
+        self.interval = interval
+        self.jitter = jitter
+        self.rng = np.random.default_rng(device_seed(name, seed))
+        # shuffles row indices only, the dataset itself is shared:
+        self.sampler = EpochSampler(
+            dataset.features, dataset.labels, seed=self.rng, contiguous=False
+        )
+        # seconds since the start of the simulation:
+        self.next_time = offset * interval
+        self.published = 0
+        self.max_lag = 0.0
+
+    def next_batch(self, size):
+        return self.sampler.next_batch(size)
+
+    def advance(self):
+        self.next_time += self.interval * (1 + self.jitter * self.rng.uniform(-1, 1))
+
+
+class FleetSimulator:
+    def __init__(self, config, device_names, workers=4, jitter=0.0):
+        self.config = config
+        self.batch_size = config["DEFAULT"]["NumberOfSamplesGenerated"]
+        interval = float(config["DEFAULT"]["IntervalDataGenerator"])
+        datasets = load_shared_datasets(config)
+        offsets = np.random.default_rng(0).uniform(size=len(device_names))
+        self.devices = [
+            SimulatedDevice(
+                name,
+                config["DEFAULT"]["QueueBase"] + name,
+                datasets[i % len(datasets)],
+                interval,
+                offsets[i],
+                jitter,
+                config["DEFAULT"]["SamplerSeed"],
+            )
+            for i, name in enumerate(device_names)
+        ]
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="simulator")
+        self.local = threading.local()
+
+    def _publish(self, device, features, labels):
+        # publishers are not shared between threads, one per worker:
+        if not hasattr(self.local, "publisher"):
+            self.local.publisher = create_publisher(self.config)
+            self.local.declared = set()
+        if device.queue_name not in self.local.declared:
+            self.local.publisher.declare_queue(
+                device.queue_name, max_length=self.config["DEFAULT"]["QueueMaxLength"]
+            )
+            self.local.declared.add(device.queue_name)
+        message = encode_message(
+            self.config,
+            device.dataset.columns,
+            device.dataset.label_column,
+            features,
+            labels,
+        )
+        self.local.publisher.publish_data(device.queue_name, message)
+
+    async def _run_device(self, device, start, duration):
+        loop = asyncio.get_running_loop()
+        while device.next_time < duration:
+            delay = device.next_time - (loop.time() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            device.max_lag = max(device.max_lag, loop.time() - start - device.next_time)
+            features, labels = device.next_batch(self.batch_size)
+            await loop.run_in_executor(
+                self.executor, self._publish, device, features, labels
+            )
+            device.published += 1
+            device.advance()
+
+    async def run(self, duration) -> pd.DataFrame:
+        start = asyncio.get_running_loop().time()
+        await asyncio.gather(
+            *[self._run_device(device, start, duration) for device in self.devices]
+        )
+        return pd.DataFrame(
+            {
+                "device": [device.name for device in self.devices],
+                "published": [device.published for device in self.devices],
+                "max_lag": [device.max_lag for device in self.devices],
+            }
+        ).set_index("device")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate a fleet of edge devices.")
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=60, help="seconds")
+    parser.add_argument(
+        "--jitter", type=float, default=0.1, help="relative jitter of the interval"
+    )
+    parser.add_argument("--transport", help="overrides MessageBrokerTransport")
+    parser.add_argument("--out", help="write per device statistics to this csv file")
+    args = parser.parse_args()
+
+    config = read_yaml(get_config_file_path())
+    if args.transport:
+        config["DEFAULT"]["MessageBrokerTransport"] = args.transport
+    if config["DEFAULT"]["MessageBrokerTransport"] == "inprocess":
+        # nothing consumes in this process: once a device queue holds
+        # QueueMaxLength messages, every publish would block forever
+        parser.error(
+            "the inprocess transport needs consumers in the same process, "
+            "use FleetSimulator from there or --transport blocking/asyncio"
+        )
+    names = ["Device_" + str(i + 1) for i in range(args.devices)]
+    simulator = FleetSimulator(config, names, workers=args.workers, jitter=args.jitter)
+    t = time.time()
+    stats = asyncio.run(simulator.run(args.duration))
+    elapsed = time.time() - t
+    print(
+        f"{args.devices} devices published {stats['published'].sum()} messages "
+        f"in {elapsed:.1f}s ({stats['published'].sum() / elapsed:.0f} msg/s), "
+        f"max lag {stats['max_lag'].max():.3f}s"
+    )
+    if args.out:
+        stats.to_csv(args.out)
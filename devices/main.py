@@ -2,8 +2,10 @@ import threading
 import time
 
 from edge_device.edge_device import EdgeDevice
+from middleware.barrier import InstrumentedBarrier
 from middleware.connection_manager import ConnectionManager
 from middleware.middleware import MiddleWare
+from utils.tracing import tracer
 from utils.utils import get_config_file_path, read_yaml
 
 
@@ -24,8 +26,15 @@ if __name__ == "__main__":
     _config_file_path = get_config_file_path()
     config_file = read_yaml(_config_file_path)
     participant_count = config_file["DEFAULT"]["NumberOfParticipants"]
+    tracer.configure(
+        trace_path=config_file["DEFAULT"]["TracePath"],
+        metrics_path=config_file["DEFAULT"]["MetricsPath"],
+        metrics_interval=config_file["DEFAULT"]["MetricsInterval"],
+    )
 
-    barrier = threading.Barrier(participant_count)
+    barrier = InstrumentedBarrier(
+        participant_count, log_path=config_file["DEFAULT"]["BarrierLogPath"]
+    )
 
     blockchain_connection = ConnectionManager(
         config_file=config_file, participant_count=participant_count, barrier=barrier
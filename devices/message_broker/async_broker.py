@@ -0,0 +1,141 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import aio_pika
+from aio_pika.pool import Pool
+from message_broker.consumer import queue_arguments
+
+
+# One AMQP connection per broker host, driven by an asyncio loop in a background
+# thread. Publishers share a pool of confirming channels, every consumer gets
+# its own channel (for its prefetch window) on the same connection.
+class AsyncBroker:
+    _brokers: dict = {}
+    _brokers_lock = threading.Lock()
+
+    def __init__(self, host, channel_pool_size=4):
+        self.host = host
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.connection = self.run(aio_pika.connect_robust(host=host))
+        self.channel_pool = self.run(self._create_channel_pool(channel_pool_size))
+
+    @classmethod
+    def get(cls, host, channel_pool_size=4):
+        with cls._brokers_lock:
+            if host not in cls._brokers:
+                cls._brokers[host] = cls(host, channel_pool_size)
+            return cls._brokers[host]
+
+    def run(self, coroutine):
+        # run a coroutine on the broker loop and wait for its result
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    async def _create_channel_pool(self, size):
+        # the pool binds to the running loop, so it is created on the broker loop
+        return Pool(self._open_channel, max_size=size)
+
+    async def _open_channel(self):
+        return await self.connection.channel(publisher_confirms=True)
+
+    async def declare_queue(self, name, max_length=None):
+        async with self.channel_pool.acquire() as channel:
+            await channel.declare_queue(name, arguments=queue_arguments(max_length))
+
+
+class AsyncPublisher:
+    def __init__(self, broker, batch_size=32, max_backoff=5.0):
+        self.broker = broker
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.pending = None
+        self.batcher = broker.run(self._start())
+
+    async def _start(self):
+        # bounded, so publish_data blocks while the broker nacks a full queue:
+        self.pending = asyncio.Queue(maxsize=4 * self.batch_size)
+        return asyncio.ensure_future(self._publish_batches())
+
+    def declare_queue(self, name, max_length=None):
+        self.broker.run(self.broker.declare_queue(name, max_length))
+
+    def publish_data(self, queueName, data):
+        # returns once queued, messages are published in batches by the broker loop
+        self.broker.run(self.pending.put((queueName, data)))
+
+    async def _publish_batches(self):
+        while True:
+            batch = [await self.pending.get()]
+            while len(batch) < self.batch_size and not self.pending.empty():
+                batch.append(self.pending.get_nowait())
+            async with self.broker.channel_pool.acquire() as channel:
+                # publish the whole batch, then wait for all broker confirms:
+                await asyncio.gather(
+                    *[
+                        self._publish(channel, queueName, data)
+                        for queueName, data in batch
+                    ]
+                )
+
+    async def _publish(self, channel, queueName, data):
+        backoff = 0.05
+        while True:
+            try:
+                await channel.default_exchange.publish(
+                    aio_pika.Message(body=data), routing_key=queueName
+                )
+                return
+            except aio_pika.exceptions.DeliveryError:
+                # queue is full, the consumer is saturated:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    def close_connection(self):
+        self.broker.loop.call_soon_threadsafe(self.batcher.cancel)
+
+
+class AsyncConsumer:
+    def __init__(self, broker):
+        self.broker = broker
+        self.channel = broker.run(broker.connection.channel())
+        self.queue = None
+        self.stopped = threading.Event()
+        # the callback may block (on a full SampleBuffer), give every consumer
+        # its own thread so one saturated device does not stall the others:
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def declare_queue(self, name, max_length=None):
+        self.queue = self.broker.run(
+            self.channel.declare_queue(name, arguments=queue_arguments(max_length))
+        )
+
+    def consume_data(self, queueName, callbackFunction, prefetch_count=None):
+        async def on_message(message):
+            # acked once the callback has processed the message:
+            async with message.process():
+                await self.broker.loop.run_in_executor(
+                    self.executor,
+                    callbackFunction,
+                    self.channel,
+                    None,
+                    None,
+                    message.body,
+                )
+
+        async def consume():
+            if prefetch_count:
+                await self.channel.set_qos(prefetch_count=prefetch_count)
+            queue = await self.channel.get_queue(queueName, ensure=False)
+            await queue.consume(on_message)
+
+        self.broker.run(consume())
+
+    def start_consuming(self):
+        # messages are delivered by the broker loop, block like pika's consumer
+        self.stopped.wait()
+
+    def close_connection(self):
+        self.broker.run(self.channel.close())
+        self.stopped.set()
@@ -0,0 +1,39 @@
+from message_broker.inprocess import InProcessConsumer, InProcessPublisher
+
+
+# MessageBrokerTransport "blocking": one pika BlockingConnection per publisher
+# and consumer. "asyncio" (CONFIG.yaml default): all publishers and consumers
+# of a process share one connection per host (see async_broker.py).
+# "inprocess": in-memory queues, no broker, for devices and middleware running
+# in the same process.
+def create_publisher(config):
+    host = config["DEFAULT"]["MessageBrokerHost"]
+    transport = config["DEFAULT"]["MessageBrokerTransport"]
+    if transport == "inprocess":
+        return InProcessPublisher()
+    if transport == "asyncio":
+        from message_broker.async_broker import AsyncBroker, AsyncPublisher
+
+        return AsyncPublisher(
+            AsyncBroker.get(host, config["DEFAULT"]["BrokerChannelPoolSize"]),
+            batch_size=config["DEFAULT"]["PublisherBatchSize"],
+        )
+    from message_broker.publisher import Publisher
+
+    return Publisher(host=host)
+
+
+def create_consumer(config):
+    host = config["DEFAULT"]["MessageBrokerHost"]
+    transport = config["DEFAULT"]["MessageBrokerTransport"]
+    if transport == "inprocess":
+        return InProcessConsumer()
+    if transport == "asyncio":
+        from message_broker.async_broker import AsyncBroker, AsyncConsumer
+
+        return AsyncConsumer(
+            AsyncBroker.get(host, config["DEFAULT"]["BrokerChannelPoolSize"])
+        )
+    from message_broker.consumer import Consumer
+
+    return Consumer(host=host)
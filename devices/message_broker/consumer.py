@@ -1,25 +1,57 @@
+import queue
+import threading
+
 import pika
 
 
+def queue_arguments(max_length):
+    # a bounded queue rejects publishes when full and the publishers back off.
+    # Consumers ack a message once its rows are admitted to the SampleBuffer,
+    # which blocks while full, so a saturated consumer stops taking messages
+    # beyond its prefetch and the queue fills up.
+    if not max_length:
+        return None
+    return {"x-max-length": max_length, "x-overflow": "reject-publish"}
+
+
 class Consumer:
-    def __init__(self):
+    def __init__(self, host="localhost"):
         self.queue = None
         self.connection = pika.BlockingConnection(
-            pika.ConnectionParameters("localhost")
+            pika.ConnectionParameters(host)
         )
         self.channel = self.connection.channel()
+        self.callback = None
+        self.deliveries = queue.Queue()
 
-    def declare_queue(self, name):
-        self.channel.queue_declare(queue=name)
+    def declare_queue(self, name, max_length=None):
+        self.channel.queue_declare(queue=name, arguments=queue_arguments(max_length))
 
-    def consume_data(self, queueName, callbackFunction):
+    def consume_data(self, queueName, callbackFunction, prefetch_count=None):
+        # messages are acked once processed, so at most prefetch_count are in flight:
+        if prefetch_count:
+            self.channel.basic_qos(prefetch_count=prefetch_count)
+        self.callback = callbackFunction
         self.channel.basic_consume(
-            queue=queueName, on_message_callback=callbackFunction, auto_ack=True
+            queue=queueName,
+            on_message_callback=lambda *delivery: self.deliveries.put(delivery),
+            auto_ack=False,
         )
 
     def start_consuming(self):
+        # the callback may block (on a full SampleBuffer), it runs on its own
+        # thread so that this one keeps serving the connection and heartbeats
+        threading.Thread(target=self.process_deliveries, daemon=True).start()
         self.channel.start_consuming()
 
+    def process_deliveries(self):
+        while True:
+            ch, method, properties, body = self.deliveries.get()
+            self.callback(ch, method, properties, body)
+            self.connection.add_callback_threadsafe(
+                lambda tag=method.delivery_tag: ch.basic_ack(delivery_tag=tag)
+            )
+
     def close_connection(self):
         self.connection.close()
 
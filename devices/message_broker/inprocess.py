@@ -0,0 +1,53 @@
+import queue
+import threading
+
+# In-memory queues for publishers and consumers living in the same process.
+# Messages are passed by reference (no serialization); a bounded queue blocks
+# the publisher while full, like the reject-publish queues of the broker.
+_queues: dict[str, queue.Queue] = {}
+_queues_lock = threading.Lock()
+_STOP = object()
+
+
+def get_queue(name, max_length=None) -> queue.Queue:
+    with _queues_lock:
+        if name not in _queues:
+            _queues[name] = queue.Queue(maxsize=max_length or 0)
+        return _queues[name]
+
+
+class InProcessPublisher:
+    def __init__(self):
+        self.queues: dict[str, queue.Queue] = {}
+
+    def declare_queue(self, name, max_length=None):
+        self.queues[name] = get_queue(name, max_length)
+
+    def publish_data(self, queueName, data):
+        self.queues[queueName].put(data)
+
+    def close_connection(self):
+        pass
+
+
+class InProcessConsumer:
+    def __init__(self):
+        self.queue = None
+        self.callback = None
+
+    def declare_queue(self, name, max_length=None):
+        self.queue = get_queue(name, max_length)
+
+    def consume_data(self, queueName, callbackFunction, prefetch_count=None):
+        self.queue = get_queue(queueName)
+        self.callback = callbackFunction
+
+    def start_consuming(self):
+        while True:
+            body = self.queue.get()
+            if body is _STOP:
+                break
+            self.callback(None, None, None, body)
+
+    def close_connection(self):
+        self.queue.put(_STOP)
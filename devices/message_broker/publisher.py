@@ -1,19 +1,35 @@
+import time
+
 import pika
+from message_broker.consumer import queue_arguments
 
 
 class Publisher:
-    def __init__(self):
+    def __init__(self, host="localhost", max_backoff=5.0):
         self.queue = None
+        self.max_backoff = max_backoff
         self.connection = pika.BlockingConnection(
-            pika.ConnectionParameters("localhost")
+            pika.ConnectionParameters(host)
         )
         self.channel = self.connection.channel()
+        # publishes are confirmed by the broker, and nacked when the queue is full:
+        self.channel.confirm_delivery()
 
-    def declare_queue(self, name):
-        self.channel.queue_declare(queue=name)
+    def declare_queue(self, name, max_length=None):
+        self.channel.queue_declare(queue=name, arguments=queue_arguments(max_length))
 
     def publish_data(self, queueName, data):
-        self.channel.basic_publish(exchange="", routing_key=queueName, body=data)
+        backoff = 0.05
+        while True:
+            try:
+                self.channel.basic_publish(
+                    exchange="", routing_key=queueName, body=data
+                )
+                return
+            except pika.exceptions.NackError:
+                # consumer is saturated, retry later:
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
 
     def close_connection(self):
         self.connection.close()
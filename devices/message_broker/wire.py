@@ -0,0 +1,83 @@
+import io
+import struct
+
+import numpy as np
+import pandas as pd
+
+# Binary encoding of a sensor batch:
+#   header:   magic, version, rows, feature count, length of the column names
+#   names:    utf-8 feature names followed by the label name, "\n" separated,
+#             zero padded to a multiple of 4 bytes
+#   features: rows x features float32, row major
+#   labels:   rows uint8
+WIRE_MAGIC = b"FLWB"
+WIRE_VERSION = 1
+HEADER = struct.Struct("<4sBxxxIII")
+
+
+def is_wire_batch(body: bytes) -> bool:
+    return body[: len(WIRE_MAGIC)] == WIRE_MAGIC
+
+
+def encode_arrays(
+    columns: list[str], label_column: str, features: np.ndarray, labels: np.ndarray
+) -> bytes:
+    names = "\n".join([*columns, label_column]).encode()
+    names += b"\0" * (-len(names) % 4)
+    return b"".join(
+        [
+            HEADER.pack(
+                WIRE_MAGIC, WIRE_VERSION, len(features), len(columns), len(names)
+            ),
+            names,
+            np.ascontiguousarray(features, dtype="<f4").tobytes(),
+            np.asarray(labels).astype(np.uint8).tobytes(),
+        ]
+    )
+
+
+def encode_batch(batch: pd.DataFrame, label_column: str) -> bytes:
+    features = batch.drop(columns=label_column)
+    return encode_arrays(
+        list(features.columns),
+        label_column,
+        features.to_numpy(),
+        batch[label_column].to_numpy(),
+    )
+
+
+def decode_batch(body: bytes) -> tuple[list[str], str, np.ndarray, np.ndarray]:
+    # the returned arrays are read-only views on the message body:
+    magic, version, rows, n_features, names_length = HEADER.unpack_from(body)
+    if magic != WIRE_MAGIC:
+        raise ValueError("not a wire batch")
+    if version != WIRE_VERSION:
+        raise ValueError(f"unsupported wire batch version {version}")
+    offset = HEADER.size
+    names = body[offset : offset + names_length].rstrip(b"\0").decode().split("\n")
+    offset += names_length
+    features = np.frombuffer(
+        body, dtype="<f4", count=rows * n_features, offset=offset
+    ).reshape(rows, n_features)
+    offset += features.nbytes
+    labels = np.frombuffer(body, dtype=np.uint8, count=rows, offset=offset)
+    return names[:-1], names[-1], features, labels
+
+
+def decode_batch_frame(body: bytes) -> pd.DataFrame:
+    columns, label_column, features, labels = decode_batch(body)
+    batch = pd.DataFrame(features, columns=columns, copy=False)
+    batch[label_column] = labels
+    return batch
+
+
+def decode_message(body, label_column: str) -> tuple[np.ndarray, np.ndarray]:
+    # (features, labels) of a message in any of the supported formats:
+    if isinstance(body, tuple):
+        # arrays passed by reference by the in-process transport
+        return body
+    if is_wire_batch(body):
+        _, _, features, labels = decode_batch(body)
+        return features, labels
+    batch = pd.read_csv(io.BytesIO(body), header=0, index_col=0).dropna()
+    return batch.drop(columns=label_column).to_numpy(), batch[label_column].to_numpy()
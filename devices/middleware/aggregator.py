@@ -1,10 +1,12 @@
 import copy
 import json
 import subprocess
+import threading
 
 import numpy as np
 from middleware.hash import convert_matrix, mimc_hash
-from utils.gas import get_current_balance
+from middleware.ipfs import link_to_content_id
+from utils.tracing import tracer
 from utils.utils import (
     get_project_root_from_env,
     wait_for_file_creation,
@@ -60,6 +62,92 @@ def moving_average_bias(
     return new_bias
 
 
+def moving_average(local: list, participant_count: int, global_params: list):
+    # int() of moving_average_weights/moving_average_bias, computed on the
+    # stacked (clients, ...) local parameters at once. The float steps
+    # (local - global) / k are summed client by client as in the loops above
+    # (cumsum adds in order, sum would add pairwise and may round differently),
+    # so the result, which the aggregator proof commits to, is the same.
+    local = np.asarray(local)
+    global_params = np.asarray(global_params)
+    if len(local) == 0:
+        return np.trunc(global_params).astype(np.int64)
+    steps = (local - global_params) / participant_count
+    return np.trunc(np.cumsum(steps, axis=0)[-1] + global_params).astype(np.int64)
+
+
+def args_parser(args):
+    # witness arguments of the aggregator circuit, space separated
+    res = ""
+    for arg in args:
+        if isinstance(arg, (list, np.ndarray)):
+            flattened_arg = np.ravel(arg)  # Flatten the array
+            # print(f"args_parser - Size of flattened_arg: {flattened_arg.size}")
+            for sub_arg in flattened_arg:  # Flatten the array
+                # Remove potential newline and carriage return characters
+                clean_sub_arg = (
+                    str(sub_arg).strip().replace("\n", "").replace("\r", "")
+                )
+                # Debug print to check each argument
+                # print(f"Processed arg: {clean_sub_arg}")
+                res += clean_sub_arg + " "
+        else:
+            clean_arg = str(arg).strip().replace("\n", "").replace("\r", "")
+            # Debug print to check each argument
+            # print(f"Processed arg: {clean_arg}")
+            res += clean_arg + " "
+    res = res.strip()
+    # Final debug print to check the entire argument string
+    # print(f"Final argument string for ZoKrates: {res}")
+    # print(f"Length of the final argument string: {len(res)}")
+    return res
+
+
+class RoundAccumulator:
+    # Moving average of a round, accumulated as the client updates arrive: the
+    # steps (w - global_w) / k are added to running sums in arrival order, the
+    # order moving_average adds them in, so finalize() returns the same result.
+    # The sign encoded witness inputs of every client are kept for the proof.
+    # Not thread-safe, OffChainAggregator holds its lock around add().
+    def __init__(self, global_w: list, global_b: list, participant_count: int):
+        self.global_w = np.asarray(global_w)
+        self.global_b = np.asarray(global_b)
+        self.participant_count = participant_count
+        self.sum_w = np.zeros(self.global_w.shape)
+        self.sum_b = np.zeros(self.global_b.shape)
+        self.device_ids: list[str] = []
+        # per client: (w, w_sign, b, b_sign) of convert_matrix
+        self.witness: list[tuple] = []
+        # a device that sent twice has both updates in the sums:
+        self.is_valid = True
+
+    def add(self, device_id: str, w: list, b: list, w_c, w_sign, b_c, b_sign):
+        if device_id in self.device_ids:
+            self.is_valid = False
+            return
+        self.sum_w += (np.asarray(w) - self.global_w) / self.participant_count
+        self.sum_b += (np.asarray(b) - self.global_b) / self.participant_count
+        self.device_ids.append(device_id)
+        self.witness.append((w_c, w_sign, b_c, b_sign))
+
+    def holds(self, device_ids: list[str]) -> bool:
+        # True if the sums are the moving average of device_ids, in this order
+        return (
+            self.is_valid
+            and self.device_ids == device_ids
+            and len(device_ids) == self.participant_count
+        )
+
+    def finalize(self) -> tuple[list[list[int]], list[int]]:
+        new_w = np.trunc(self.sum_w + self.global_w).astype(np.int64)
+        new_b = np.trunc(self.sum_b + self.global_b).astype(np.int64)
+        return new_w.tolist(), new_b.tolist()
+
+    def witness_inputs(self) -> tuple:
+        # local_w, local_w_sign, local_b, local_b_sign of the aggregator circuit
+        return tuple(np.stack(inputs) for inputs in zip(*self.witness))
+
+
 # region off-chain aggregator:t
 
 
@@ -83,7 +171,7 @@ class OffChainAggregator:
         # address: [wb_hash, w, b, mse_score]
         self.stored_device_data: dict[
             str,
-            list[str, list[list[int]], list[int], float],
+            list[int, list[list[int]], list[int], float],
         ] = {}
         # last round parameters:
         self.global_w: list[list[int]] = global_w
@@ -96,6 +184,11 @@ class OffChainAggregator:
         self.gdigest = ""
         self.precision = 10000  # Precision value for scaling
         self.is_no_proof = is_no_proof
+        # running moving average of the current round:
+        self.lock = threading.Lock()
+        self.accumulator = RoundAccumulator(
+            self.global_w, self.global_b, connection_manager.participant_count
+        )
 
     # region smart contract functions
 
@@ -107,12 +200,12 @@ class OffChainAggregator:
         )
         return int(round)
 
-    def _is_wb_hash_in_sc(self, wb_hash: str) -> bool:
+    def _is_wb_hash_in_sc(self, wb_hash: int) -> bool:
         wb_hashes = self.connection_manager.FLcontractDeployed.functions.getAllHashValues().call(
             {"from": self.blockchain_account}
         )
         # print(f"Checking {wb_hash=} in wb_hashes...")
-        return str(wb_hash) in wb_hashes
+        return int(wb_hash) in wb_hashes
 
     def _send_aggregator_wb_link(self) -> bool:
         print(f"{self.name} calling function _send_aggregator_wb_link...")
@@ -125,9 +218,9 @@ class OffChainAggregator:
         # send to smart contract:
         thxHash = (
             self.connection_manager.FLcontractDeployed.functions.send_aggregator_wb(
-                str(self.gdigest),
-                gw_ipfs_link,
-                gb_ipfs_link,
+                int(self.gdigest),
+                link_to_content_id(gw_ipfs_link),
+                link_to_content_id(gb_ipfs_link),
                 a,
                 b,
                 c,
@@ -135,7 +228,10 @@ class OffChainAggregator:
             ).transact({"from": self.blockchain_account})
         )
         self.connection_manager._await_transaction(
-            thxHash, accountNr=self.name, desc="functions.send_aggregator_wb"
+            thxHash,
+            accountNr=self.name,
+            desc="functions.send_aggregator_wb",
+            round=self.round_number,
         )
 
         # save to Blockchain Client:
@@ -193,16 +289,31 @@ class OffChainAggregator:
         b: list[int],
         mse_score: float,
     ) -> bool:
-        w_c, _ = convert_matrix(w)
-        b_c, _ = convert_matrix(b)
-        wb_hash = str(mimc_hash(w=w_c, b=b_c))
-        if not self._is_wb_hash_in_sc(wb_hash):
+        with tracer.span(
+            "verify_hash",
+            aggregator=self.name,
+            round=self.round_number,
+            device=device_id,
+        ):
+            w_c, w_sign = convert_matrix(w)
+            b_c, b_sign = convert_matrix(b)
+            wb_hash = int(mimc_hash(w=w_c, b=b_c))
+            is_wb_hash_in_sc = self._is_wb_hash_in_sc(wb_hash)
+        if not is_wb_hash_in_sc:
             # hash not in the smart contract:
             return False
         # hash is in smart contract:
         print(f"The hash {wb_hash} was found in the smart contract.")
-        wb_hash_int = int(wb_hash)
-        self.stored_device_data[device_id] = [wb_hash_int, w, b, mse_score]
+        with self.lock:
+            self.stored_device_data[device_id] = [wb_hash, w, b, mse_score]
+            # aggregate now, while the other devices are still submitting:
+            with tracer.span(
+                "accumulate",
+                aggregator=self.name,
+                round=self.round_number,
+                device=device_id,
+            ):
+                self.accumulator.add(device_id, w, b, w_c, w_sign, b_c, b_sign)
         return True
 
     def _select_devices(self, epsilon=1, select_count=3) -> list[str]:
@@ -210,45 +321,17 @@ class OffChainAggregator:
         return selected_device_ids
 
     def _calculate_moving_average(self) -> tuple:
+        # the running sums hold the result unless the selection differs from
+        # the devices that sent updates
+        if self.accumulator.holds(list(self.selected_device_data)):
+            return self.accumulator.finalize()
         selected_weights = [device[1] for device in self.selected_device_data.values()]
         selected_bias = [device[2] for device in self.selected_device_data.values()]
-        new_w = moving_average_weights(
-            selected_weights, len(selected_weights), self.global_w
-        )
-        new_b = moving_average_bias(selected_bias, len(selected_bias), self.global_b)
-
-        # convert to int:
-        new_w = [[int(x) for x in y] for y in new_w]
-        new_b = [int(x) for x in new_b]
-
-        return new_w, new_b
+        new_w = moving_average(selected_weights, len(selected_weights), self.global_w)
+        new_b = moving_average(selected_bias, len(selected_bias), self.global_b)
+        return new_w.tolist(), new_b.tolist()
 
     def _generate_proof(self) -> str:
-        def args_parser(args):
-            res = ""
-            for arg in args:
-                if isinstance(arg, (list, np.ndarray)):
-                    flattened_arg = np.ravel(arg)  # Flatten the array
-                    # print(f"args_parser - Size of flattened_arg: {flattened_arg.size}")
-                    for sub_arg in flattened_arg:  # Flatten the array
-                        # Remove potential newline and carriage return characters
-                        clean_sub_arg = (
-                            str(sub_arg).strip().replace("\n", "").replace("\r", "")
-                        )
-                        # Debug print to check each argument
-                        # print(f"Processed arg: {clean_sub_arg}")
-                        res += clean_sub_arg + " "
-                else:
-                    clean_arg = str(arg).strip().replace("\n", "").replace("\r", "")
-                    # Debug print to check each argument
-                    # print(f"Processed arg: {clean_arg}")
-                    res += clean_arg + " "
-            res = res.strip()
-            # Final debug print to check the entire argument string
-            # print(f"Final argument string for ZoKrates: {res}")
-            # print(f"Length of the final argument string: {len(res)}")
-            return res
-
         def convert_matrix(m):
             max_field = 21888242871839275222246405745257275088548364400416034343698204186575808495617
             m = np.array(m)
@@ -274,19 +357,29 @@ class OffChainAggregator:
             + "aggregator/"
         )
 
-        # convert local_w and local_b to a single list:
-        local_w_list = []
-        local_b_list = []
-        for selected_device_id in self.selected_device_data:
-            # weights:
-            device_w = copy.deepcopy(self.selected_device_data[selected_device_id][1])
-            local_w_list.append(device_w)
-            # bias:
-            device_b = copy.deepcopy(self.selected_device_data[selected_device_id][2])
-            local_b_list.append(device_b)
-
-        local_w, local_w_sign = convert_matrix(local_w_list)
-        local_b, local_b_sign = convert_matrix(local_b_list)
+        if self.accumulator.holds(list(self.selected_device_data)):
+            # converted as the updates arrived:
+            local_w, local_w_sign, local_b, local_b_sign = (
+                self.accumulator.witness_inputs()
+            )
+        else:
+            # convert local_w and local_b to a single list:
+            local_w_list = []
+            local_b_list = []
+            for selected_device_id in self.selected_device_data:
+                # weights:
+                device_w = copy.deepcopy(
+                    self.selected_device_data[selected_device_id][1]
+                )
+                local_w_list.append(device_w)
+                # bias:
+                device_b = copy.deepcopy(
+                    self.selected_device_data[selected_device_id][2]
+                )
+                local_b_list.append(device_b)
+
+            local_w, local_w_sign = convert_matrix(local_w_list)
+            local_b, local_b_sign = convert_matrix(local_b_list)
         # convert global_w and global_b to a single list:
         global_w, global_w_sign = convert_matrix(self.global_w)
         global_b, global_b_sign = convert_matrix(self.global_b)
@@ -320,7 +413,8 @@ class OffChainAggregator:
         # )
 
         # set gdigest:
-        self.gdigest = mimc_hash(w=expected_global_w, b=expected_global_b)
+        with tracer.span("hash"):
+            self.gdigest = mimc_hash(w=expected_global_w, b=expected_global_b)
 
         args = [
             local_w,
@@ -369,7 +463,8 @@ class OffChainAggregator:
             "-a",
         ]
         zokrates_compute_witness.extend(args_parser(args).split(" "))
-        g = subprocess.run(zokrates_compute_witness, capture_output=True)
+        with tracer.span("witness"):
+            g = subprocess.run(zokrates_compute_witness, capture_output=True)
         if g.returncode != 0:
             print(
                 f"Error: aggregator returned non-zero. {g.stderr.decode()=}, {g.stdout.decode()=}",
@@ -393,7 +488,8 @@ class OffChainAggregator:
             "-j",
             proof_path,
         ]
-        g = subprocess.run(zokrates_generate_proof, capture_output=True)
+        with tracer.span("prove"):
+            g = subprocess.run(zokrates_generate_proof, capture_output=True)
         # wait_for_process(g)
         if g.returncode != 0:
             print(
@@ -419,65 +515,61 @@ class OffChainAggregator:
 
     def start_round(self):
         print(f"{self.name} round is ongoing now...")
-        # gas usage:
-        get_current_balance(
-            web3=self.connection_manager.web3Connection,
-            account_address=self.blockchain_account,
-            round=self.round_number,
-            source=f"{self.name} (Start) ",
-        )
         # set global weights and bias:
         if self.new_global_weights:
             self.global_w = copy.deepcopy(self.new_global_weights)
         if self.new_global_bias:
             self.global_b = copy.deepcopy(self.new_global_bias)
         # clear the parameters for the new round:
-        self._clear_round()
+        with self.lock:
+            self._clear_round()
+            self.accumulator = RoundAccumulator(
+                self.global_w, self.global_b, self.connection_manager.participant_count
+            )
         # fetch the round number from the smart contract:
         self.round_number = self._get_sc_round_number()
 
     def finish_round(self):
-        # select devices:
-        selected_device_ids = self._select_devices()
-        for device_id in selected_device_ids:
-            self.selected_device_data[device_id] = self.stored_device_data[device_id]
-
-        participant_count = len(self.selected_device_data)
-        if participant_count == self.connection_manager.participant_count:
-            print(f"Finishing {self.name} round now...")
-
-            # calculate moving average:
-            print(f"{self.name} calculating moving averages...")
-            self.new_global_weights, self.new_global_bias = (
-                self._calculate_moving_average()
-            )
-
-            if self.new_global_weights and self.new_global_bias:
-                if not self.is_no_proof:
-                    # generate the proof:
-                    print(f"Generating {self.name} proof...")
-                    self.new_generated_proof = self._generate_proof()
+        with tracer.span("aggregate", aggregator=self.name, round=self.round_number):
+            # select devices:
+            selected_device_ids = self._select_devices()
+            for device_id in selected_device_ids:
+                self.selected_device_data[device_id] = self.stored_device_data[
+                    device_id
+                ]
+
+            participant_count = len(self.selected_device_data)
+            if participant_count == self.connection_manager.participant_count:
+                print(f"Finishing {self.name} round now...")
+
+                # calculate moving average:
+                print(f"{self.name} calculating moving averages...")
+                with tracer.span("moving_average"):
+                    self.new_global_weights, self.new_global_bias = (
+                        self._calculate_moving_average()
+                    )
+
+                if self.new_global_weights and self.new_global_bias:
+                    if not self.is_no_proof:
+                        # generate the proof:
+                        print(f"Generating {self.name} proof...")
+                        with tracer.span("proof"):
+                            self.new_generated_proof = self._generate_proof()
+                    else:
+                        print(f"Skipping the generation of {self.name} proof...")
+
+                    # send the calculated global weights and bias to the smart contract:
+                    print(f"Sending {self.name} wb links to contract...")
+                    with tracer.span("submit"):
+                        self._send_aggregator_wb_link()
                 else:
-                    print(f"Skipping the generation of {self.name} proof...")
-
-                # send the calculated global weights and bias to the smart contract:
-                print(f"Sending {self.name} wb links to contract...")
-                self._send_aggregator_wb_link()
-                # gas usage:
-                get_current_balance(
-                    web3=self.connection_manager.web3Connection,
-                    account_address=self.blockchain_account,
-                    round=self.round_number,
-                    source=f"{self.name} (Finish)",
-                )
+                    print(
+                        f"{self.name} has empty new global weights or bias. Skipping saving to ipfs..."
+                    )
             else:
                 print(
-                    f"{self.name} has empty new global weights or bias. Skipping saving to ipfs..."
+                    f"Skipping to finish off {self.name}  aggregator: Not enough participants ({participant_count=}, expected={self.connection_manager.participant_count})."
                 )
-        else:
-            print(
-                f"Skipping to finish off {self.name}  aggregator: Not enough participants ({participant_count=}, expected={self.connection_manager.participant_count})."
-            )
 
 
 # endregion
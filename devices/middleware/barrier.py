@@ -0,0 +1,34 @@
+import json
+import threading
+import time
+
+
+# threading.Barrier that records, for every wait, when each device arrived, how
+# long it waited and whether it was the last to arrive, as one json line per
+# wait in log_path.
+class InstrumentedBarrier(threading.Barrier):
+    def __init__(self, parties, log_path=None, action=None, timeout=None):
+        super().__init__(parties, action=action, timeout=timeout)
+        self.log_path = log_path
+        self.log_lock = threading.Lock()
+
+    def wait(self, timeout=None, device=None, round=None, phase=None):
+        arrival = time.time()
+        index = super().wait(timeout)
+        release = time.time()
+        if self.log_path:
+            entry = {
+                "round": round,
+                "phase": phase,
+                "device": device,
+                "arrival": arrival,
+                "release": release,
+                "wait": release - arrival,
+                # threading.Barrier numbers the threads in order of arrival:
+                "arrival_index": index,
+                "is_last": index == self.parties - 1,
+            }
+            with self.log_lock:
+                with open(self.log_path, mode="a") as file:
+                    file.write(json.dumps(entry) + "\n")
+        return index
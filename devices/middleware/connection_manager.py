@@ -8,8 +8,12 @@ import numpy as np
 from middleware.aggregator import OffChainAggregator
 from middleware.aggregator_selection import AggregatorSelector
 from middleware.hash import convert_matrix, mimc_hash
-from middleware.ipfs import IPFSConnector
-from utils.gas import log_receipt
+from middleware.ipfs import (
+    content_id_to_link,
+    create_ipfs_connector,
+    link_to_content_id,
+)
+from utils.gas import GasLedger
 from web3 import Web3
 
 
@@ -20,6 +24,10 @@ class ConnectionManager:
         self.FLcontractABI = None
         self.FLcontractDeployed = None
         self.FLcontractAddress = self.config["DEFAULT"]["FLContractAddress"]
+        self.VerifierContractAddress = self.config["DEFAULT"]["VerifierContractAddress"]
+        self.VerifierAggregatorContractAddress = self.config["DEFAULT"][
+            "VerifierAggregatorContractAddress"
+        ]
         self.lock_newRound = threading.Lock()
         self.precision = None
         self.participant_count = participant_count
@@ -28,11 +36,20 @@ class ConnectionManager:
         self.aggregator_selector = None
         self.init_w = None
         self.init_b = None
-        self.ipfs = IPFSConnector()
+        self.ipfs = create_ipfs_connector(self.config)
+        self.gas_ledger = GasLedger(
+            file_path=self.config["DEFAULT"]["GasLedgerPath"],
+            flush_interval=self.config["DEFAULT"]["GasLedgerFlushInterval"],
+        )
+        # last round number read from the contract (round of untagged transactions):
+        self.round_number = 0
         self.weight_ipfs_link = ""
         self.bias_ipfs_link = ""
 
     def connect(self):
+        if self.config["DEFAULT"]["BlockchainBackend"] == "in-process":
+            self._connect_in_process()
+            return
         self.web3Connection = Web3(
             Web3.HTTPProvider(
                 self.config["DEFAULT"]["EtheriumRPCServer"],
@@ -45,6 +62,24 @@ class ConnectionManager:
             address=self.FLcontractAddress, abi=self.FLcontractABI
         )
 
+    def _connect_in_process(self):
+        # only needed for this backend (eth-tester, py-evm and py-solc-x):
+        from middleware.in_process_chain import (
+            FL_CONTRACT,
+            VERIFIER_AGGREGATOR_CONTRACT,
+            VERIFIER_CONTRACT,
+            start_in_process_chain,
+        )
+
+        self.web3Connection, deployed = start_in_process_chain(self.config)
+        self.FLcontractDeployed = deployed[FL_CONTRACT]
+        self.FLcontractAddress = self.FLcontractDeployed.address
+        self.FLcontractABI = self.FLcontractDeployed.abi
+        self.VerifierContractAddress = deployed[VERIFIER_CONTRACT].address
+        self.VerifierAggregatorContractAddress = deployed[
+            VERIFIER_AGGREGATOR_CONTRACT
+        ].address
+
     def init_contract(self, accountNR):
         if self.is_connected() and accountNR == 0:
             admin_account_nr = self.config["DEFAULT"]["BlockchainAdminAccountNumber"]
@@ -76,14 +111,18 @@ class ConnectionManager:
             is_no_proof = not bool(self.config["DEFAULT"]["PerformProof"])
 
             thxHash = self.FLcontractDeployed.functions.initModel(
-                weights, bias, is_no_proof
+                weights,
+                bias,
+                is_no_proof,
+                link_to_content_id(self.weight_ipfs_link),
+                link_to_content_id(self.bias_ipfs_link),
             ).transact({"from": self.web3Connection.eth.accounts[admin_account_nr]})
             self._await_transaction(
                 thxHash, accountNr=admin_account_nr, desc="functions.initModel"
             )
             thxHash = self.FLcontractDeployed.functions.updateVerifier(
-                self.config["DEFAULT"]["VerifierContractAddress"],
-                self.config["DEFAULT"]["VerifierAggregatorContractAddress"],
+                self.VerifierContractAddress,
+                self.VerifierAggregatorContractAddress,
             ).transact({"from": self.web3Connection.eth.accounts[admin_account_nr]})
             self._await_transaction(
                 thxHash, accountNr=admin_account_nr, desc="functions.updateVerifier"
@@ -155,9 +194,24 @@ class ConnectionManager:
 
         return a, b, c, inputs
 
-    def _await_transaction(self, thxHash, accountNr, desc):
+    def _await_transaction(self, thxHash, accountNr, desc, round=None):
         receipt = self.web3Connection.eth.wait_for_transaction_receipt(thxHash)
-        log_receipt(receipt=receipt, account=accountNr, desc=desc)
+        gas_price = None
+        if "effectiveGasPrice" not in receipt:
+            gas_price = self.web3Connection.eth.get_transaction(thxHash)["gasPrice"]
+        self.gas_ledger.record(
+            receipt=receipt,
+            account=accountNr,
+            round=self.round_number if round is None else round,
+            function=desc,
+            gas_price=gas_price,
+        )
+        return receipt
+
+    def get_round_gas_cost(self, accountNR, round):
+        # gas costs (in ether) of the transactions of an account in a round:
+        _, cost_wei = self.gas_ledger.get_round_totals(account=accountNR, round=round)
+        return self.web3Connection.fromWei(cost_wei, "ether")
 
     def is_connected(self):
         return self.web3Connection.isConnected()
@@ -187,12 +241,32 @@ class ConnectionManager:
             {"from": self.web3Connection.eth.accounts[accountNR]}
         )
 
+    def _global_link(self, content_id, link):
+        # the contract holds the content id of the current global model; a
+        # link saved by this process is used as is (it may be hashed on chain),
+        # any other is recovered from the content id
+        if link and link_to_content_id(link) == content_id:
+            return link
+        return content_id_to_link(content_id)
+
     def get_globalWeights(self, accountNR):
-        gw = self.ipfs.get_global_weight(self.weight_ipfs_link)
+        functions = self.FLcontractDeployed.functions
+        content_id = functions.get_global_weights_ipfs_link().call(
+            {"from": self.web3Connection.eth.accounts[accountNR]}
+        )
+        gw = self.ipfs.get_global_weight(
+            self._global_link(content_id, self.weight_ipfs_link)
+        )
         return gw
 
     def get_globalBias(self, accountNR):
-        gb = self.ipfs.get_global_bias(self.bias_ipfs_link)
+        functions = self.FLcontractDeployed.functions
+        content_id = functions.get_global_bias_ipfs_link().call(
+            {"from": self.web3Connection.eth.accounts[accountNR]}
+        )
+        gb = self.ipfs.get_global_bias(
+            self._global_link(content_id, self.bias_ipfs_link)
+        )
         return gb
 
     def get_account_balance(self, accountNR):
@@ -247,7 +321,9 @@ class ConnectionManager:
             self.lock_newRound.release()
             return newround
 
-    def __send_wb_hash(self, weights, bias, mse_score, accountNR, proof=None):
+    def __send_wb_hash(
+        self, weights, bias, mse_score, accountNR, proof=None, round=None
+    ):
         is_no_proof = True if proof is None else False
         temp_weights = [[int(x) for x in y] for y in weights]
         temp_bias = [int(x) for x in bias]
@@ -255,7 +331,7 @@ class ConnectionManager:
         # generate hash of local weight and local bias:
         w_c, _ = convert_matrix(temp_weights)
         b_c, _ = convert_matrix(temp_bias)
-        wb_hash = str(mimc_hash(w_c, b_c))
+        wb_hash = int(mimc_hash(w_c, b_c))
 
         # generate proof for the hash:
         a, b, c, inputs = self.__check_ZKP(is_no_proof, proof, accountNR)
@@ -265,7 +341,7 @@ class ConnectionManager:
             wb_hash, a, b, c, inputs
         ).transact({"from": self.web3Connection.eth.accounts[accountNR]})
         self._await_transaction(
-            thxHash, accountNr=accountNR, desc="functions.send_wb_hash"
+            thxHash, accountNr=accountNR, desc="functions.send_wb_hash", round=round
         )
 
         # if tx_receipt.status == 0:
@@ -284,12 +360,14 @@ class ConnectionManager:
         )
         print(f"AccountNr = {accountNR}: SUCCESSFULLY SENT TO AGGREGATOR")
 
-    def update(self, weights, bias, mse_score, accountNR, proof=None):
+    def update(self, weights, bias, mse_score, accountNR, proof=None, round=None):
         if self.config["DEFAULT"]["PerformProof"]:
             tries = 5
             while tries > 0:
                 try:
-                    self.__send_wb_hash(weights, bias, mse_score, accountNR, proof)
+                    self.__send_wb_hash(
+                        weights, bias, mse_score, accountNR, proof, round=round
+                    )
                     tries = -1
                 except Exception as err:
                     time.sleep(self.config["DEFAULT"]["WaitingTime"])
@@ -304,7 +382,9 @@ class ConnectionManager:
             tries = 5
             while tries > 0:
                 try:
-                    self.__send_wb_hash(weights, bias, mse_score, accountNR, proof=None)
+                    self.__send_wb_hash(
+                        weights, bias, mse_score, accountNR, proof=None, round=round
+                    )
                     tries = -1
                 except Exception as err:
                     time.sleep(self.config["DEFAULT"]["WaitingTime"])
@@ -321,9 +401,11 @@ class ConnectionManager:
         )
 
     def get_RoundNumber(self, accountNR):
-        return self.FLcontractDeployed.functions.getRoundNumber().call(
+        round_number = self.FLcontractDeployed.functions.getRoundNumber().call(
             {"from": self.web3Connection.eth.accounts[accountNR]}
         )
+        self.round_number = max(self.round_number, round_number)
+        return round_number
 
     def get_Precision(self, accountNR):
         self.precision = self.__get_Precision(accountNR)
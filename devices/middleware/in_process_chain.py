@@ -0,0 +1,92 @@
+import os
+import threading
+
+import solcx
+from eth_tester import EthereumTester, PyEVMBackend
+from web3 import Web3
+from web3.providers.eth_tester import EthereumTesterProvider
+
+BLOCK_GAS_LIMIT = 1_000_000_000
+
+FL_CONTRACT = "FederatedModel"
+VERIFIER_CONTRACT = "Verifier"
+VERIFIER_AGGREGATOR_CONTRACT = "VerifierAggregator"
+
+
+class LockedEthereumTesterProvider(EthereumTesterProvider):
+    # eth-tester is not thread-safe, but all device threads share one chain:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+
+    def make_request(self, method, params):
+        with self._lock:
+            return super().make_request(method, params)
+
+
+def create_web3(num_accounts: int) -> Web3:
+    backend = PyEVMBackend(
+        genesis_parameters=PyEVMBackend.generate_genesis_params(
+            overrides={"gas_limit": BLOCK_GAS_LIMIT}
+        ),
+        genesis_state=PyEVMBackend.generate_genesis_state(num_accounts=num_accounts),
+    )
+    return Web3(LockedEthereumTesterProvider(EthereumTester(backend)))
+
+
+def compile_contracts(config) -> dict[str, dict]:
+    solc_version = config["DEFAULT"]["SolcVersion"]
+    if solc_version not in [str(v) for v in solcx.get_installed_solc_versions()]:
+        solcx.install_solc(solc_version)
+    contracts_path = config["DEFAULT"]["ContractsPath"]
+    # verifier.sol and verifier_aggregator.sol are compiled through the imports:
+    compiled = solcx.compile_files(
+        [os.path.join(contracts_path, FL_CONTRACT + ".sol")],
+        output_values=["abi", "bin"],
+        solc_version=solc_version,
+        allow_paths=os.path.abspath(contracts_path),
+        optimize=True,
+        optimize_runs=200,
+    )
+    # keys are "<source path>:<contract name>":
+    return {key.split(":")[-1]: value for key, value in compiled.items()}
+
+
+def deploy_contract(web3: Web3, compiled_contract: dict, deployer: str, *args):
+    contract = web3.eth.contract(
+        abi=compiled_contract["abi"], bytecode=compiled_contract["bin"]
+    )
+    tx_hash = contract.constructor(*args).transact({"from": deployer})
+    receipt = web3.eth.wait_for_transaction_receipt(tx_hash)
+    return web3.eth.contract(
+        address=receipt.contractAddress, abi=compiled_contract["abi"]
+    )
+
+
+def start_in_process_chain(config) -> tuple[Web3, dict]:
+    web3 = create_web3(num_accounts=config["DEFAULT"]["InProcessChainAccounts"])
+    compiled = compile_contracts(config)
+    admin = web3.eth.accounts[config["DEFAULT"]["BlockchainAdminAccountNumber"]]
+
+    print("Deploying contracts to the in-process chain...")
+    verifier = deploy_contract(web3, compiled[VERIFIER_CONTRACT], admin)
+    verifier_aggregator = deploy_contract(
+        web3, compiled[VERIFIER_AGGREGATOR_CONTRACT], admin
+    )
+    fl_contract = deploy_contract(
+        web3,
+        compiled[FL_CONTRACT],
+        admin,
+        config["DEFAULT"]["InputDimension"],
+        config["DEFAULT"]["OutputDimension"],
+        config["DEFAULT"]["LearningRate"],
+        config["DEFAULT"]["Precision"],
+        config["DEFAULT"]["BatchSize"],
+        config["DEFAULT"]["IntervalTime"],
+    )
+    deployed = {
+        FL_CONTRACT: fl_contract,
+        VERIFIER_CONTRACT: verifier,
+        VERIFIER_AGGREGATOR_CONTRACT: verifier_aggregator,
+    }
+    return web3, deployed
@@ -1,64 +1,403 @@
+import hashlib
+import io
 import os
 import pickle
+import queue
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
 
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
 
-class IPFSConnector:
-    def __init__(self) -> None:
-        self.data_file_path = "ipfs.pickle"
-        # if file exists, delete it:
-        if os.path.exists(self.data_file_path):
-            os.remove(self.data_file_path)
-        self.data: dict[str, str] = {}  # key -> value
-        self.inner_counter = 0
-        # initialize the data:
-        self._refresh()
-
-    def _refresh(self) -> bool:
-        return self._refresh_from_file()
-
-    def _refresh_from_file(self) -> bool:
-        # check file exists, if not create one:
-        if not os.path.exists(self.data_file_path):
-            self._save_to_file()
-        # load the data from file:
-        with open(self.data_file_path, "rb") as handle:
-            fetched_data = pickle.load(handle)
-        self.data = fetched_data
-        return True
+NUMPY_MAGIC = b"\x93NUMPY"
+DELTA_MAGIC = b"FLDELTA1"
+DELTA_DTYPES = [np.int8, np.int16, np.int32, np.int64]
+
+
+def content_id(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def link_to_content_id(link: str) -> bytes:
+    # fixed-size (bytes32) identifier of a link, as stored in the smart contract:
+    # links of the local stores are sha256 hex digests and are stored as is;
+    # any other link (e.g. an IPFS CID) is hashed, so it cannot be recovered
+    # from the contract, only checked against a link obtained off-chain
+    try:
+        cid = bytes.fromhex(link)
+    except ValueError:
+        cid = b""
+    if len(cid) == 32:
+        return cid
+    return hashlib.sha256(link.encode()).digest()
+
+
+def content_id_to_link(cid: bytes) -> str:
+    # link of a content id read from the smart contract, only valid for the
+    # links of the local stores (the inverse of link_to_content_id for them)
+    return bytes(cid).hex()
+
+
+def encode_value(value) -> bytes:
+    # weight matrices and bias vectors as NumPy binary, anything else pickled:
+    if isinstance(value, (list, np.ndarray)):
+        try:
+            array = np.asarray(value)
+        except ValueError:
+            array = None
+        if array is not None and array.dtype.kind in "iuf":
+            buffer = io.BytesIO()
+            np.save(buffer, array, allow_pickle=False)
+            return buffer.getvalue()
+    return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def decode_value(data: bytes):
+    if data.startswith(NUMPY_MAGIC):
+        return np.load(io.BytesIO(data), allow_pickle=False).tolist()
+    return pickle.loads(data)
+
+
+def encode_delta(base_link: str, delta: np.ndarray) -> bytes:
+    # <magic><base link length><base link><zlib compressed npy of the delta>
+    for dtype in DELTA_DTYPES:
+        info = np.iinfo(dtype)
+        if delta.size == 0 or (delta.min() >= info.min and delta.max() <= info.max):
+            delta = delta.astype(dtype)
+            break
+    buffer = io.BytesIO()
+    np.save(buffer, delta, allow_pickle=False)
+    base = base_link.encode()
+    return (
+        DELTA_MAGIC
+        + len(base).to_bytes(2, "big")
+        + base
+        + zlib.compress(buffer.getvalue(), 9)
+    )
 
-    def _save(self) -> bool:
-        return self._save_to_file()
 
-    def _save_to_file(self) -> bool:
-        with open(self.data_file_path, "wb") as handle:
-            pickle.dump(self.data, handle, protocol=pickle.HIGHEST_PROTOCOL)
-        self.inner_counter += 1
+def decode_delta(data: bytes) -> tuple[str, np.ndarray]:
+    offset = len(DELTA_MAGIC)
+    base_length = int.from_bytes(data[offset : offset + 2], "big")
+    offset += 2
+    base_link = data[offset : offset + base_length].decode()
+    delta = np.load(
+        io.BytesIO(zlib.decompress(data[offset + base_length :])), allow_pickle=False
+    )
+    return base_link, delta
+
+
+class FileObjectStore:
+    # one file per object, named by its content id, plus an append-only index
+    def __init__(self, root_path: str) -> None:
+        self.objects_path = os.path.join(root_path, "objects")
+        self.index_path = os.path.join(root_path, "index")
+        os.makedirs(self.objects_path, exist_ok=True)
+        self.lock = threading.Lock()
+        self.index: dict[str, int] = {}  # cid -> size in bytes
+        self._load_index()
+
+    def _load_index(self) -> None:
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "r+") as handle:
+            complete = 0
+            for line in handle:
+                if not line.endswith("\n"):
+                    # a crash during put left a partial last line: cut it, so
+                    # the next entry starts on a line of its own (the object
+                    # itself is found on disk by get)
+                    handle.truncate(complete)
+                    break
+                complete += len(line)
+                fields = line.split()
+                if len(fields) == 2 and fields[1].isdigit():
+                    self.index[fields[0]] = int(fields[1])
+
+    def _object_path(self, cid: str) -> str:
+        return os.path.join(self.objects_path, cid)
+
+    def contains(self, cid: str) -> bool:
+        return cid in self.index
+
+    def put(self, cid: str, data: bytes) -> bool:
+        with self.lock:
+            if cid in self.index:
+                # identical content is already stored:
+                return False
+            tmp_path = self._object_path(cid) + ".tmp"
+            with open(tmp_path, "wb") as handle:
+                handle.write(data)
+            os.replace(tmp_path, self._object_path(cid))
+            with open(self.index_path, "a") as handle:
+                handle.write(f"{cid} {len(data)}\n")
+            self.index[cid] = len(data)
+            return True
+
+    def get(self, cid: str) -> bytes:
+        if cid not in self.index:
+            # objects added by other processes are not in our index yet:
+            if not cid or not os.path.exists(self._object_path(cid)):
+                return None
+            with self.lock:
+                self.index[cid] = os.path.getsize(self._object_path(cid))
+        with open(self._object_path(cid), "rb") as handle:
+            return handle.read()
+
+
+class SQLiteObjectStore:
+    # objects in one SQLite database in WAL mode: readers run concurrently with
+    # the writer, across threads and processes. Writes are queued and committed
+    # by a single writer thread, one transaction per batch of queued objects.
+    def __init__(self, root_path: str, max_batch_size: int = 64) -> None:
+        os.makedirs(root_path, exist_ok=True)
+        self.db_path = os.path.join(root_path, "objects.sqlite")
+        self.max_batch_size = max_batch_size
+        self.local = threading.local()
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS objects (cid TEXT PRIMARY KEY, data BLOB)"
+        )
+        connection.commit()
+        self._pending: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer_thread = threading.Thread(target=self._run, daemon=True)
+        self._writer_thread.start()
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite connections must not be shared between threads:
+        if not hasattr(self.local, "connection"):
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = connection
+        return self.local.connection
+
+    def contains(self, cid: str) -> bool:
+        row = self._connection().execute(
+            "SELECT 1 FROM objects WHERE cid = ?", (cid,)
+        ).fetchone()
+        return row is not None
+
+    def put(self, cid: str, data: bytes) -> bool:
+        if self.contains(cid):
+            # identical content is already stored:
+            return False
+        # block until the batch holding the object is committed, so the link is
+        # readable by other processes once it is returned:
+        committed = threading.Event()
+        errors = []
+        self._pending.put((cid, data, committed, errors))
+        committed.wait()
+        if errors:
+            # the batch was rolled back, e.g. database is locked:
+            raise errors[0]
         return True
 
+    def get(self, cid: str) -> bytes:
+        row = self._connection().execute(
+            "SELECT data FROM objects WHERE cid = ?", (cid,)
+        ).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def _run(self):
+        # a daemon thread: it never blocks shutdown, and an error fails the
+        # puts of its batch only
+        connection = self._connection()
+        while True:
+            batch = [self._pending.get()]
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with connection:
+                    connection.executemany(
+                        "INSERT OR IGNORE INTO objects (cid, data) VALUES (?, ?)",
+                        [(cid, data) for cid, data, _, _ in batch],
+                    )
+            except sqlite3.Error as e:
+                for _, _, _, errors in batch:
+                    errors.append(e)
+            for _, _, committed, _ in batch:
+                committed.set()
+
+
+def create_object_store(store_type: str, store_path: str):
+    if store_type == "sqlite":
+        return SQLiteObjectStore(store_path)
+    if store_type == "files":
+        return FileObjectStore(store_path)
+    raise Exception(f"Unknown IPFS store {store_type}")
+
+
+class LRUCache:
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.items: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.items:
+                return None
+            self.items.move_to_end(key)
+            return self.items[key]
+
+    def put(self, key, value) -> None:
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_size:
+                self.items.popitem(last=False)
+
+
+class IPFSConnector:
+    def __init__(
+        self,
+        store_path: str = "ipfs_store",
+        cache_size: int = 0,
+        delta_keyframe_interval: int = 0,
+        store_type: str = "files",
+    ) -> None:
+        self.store = create_object_store(store_type, store_path) if store_path else None
+        # links are immutable, so fetched objects can be cached by link:
+        self.cache = LRUCache(max_size=cache_size)
+        # store models as deltas against the previous round, with a full model
+        # (keyframe) every delta_keyframe_interval saves (0: always full models):
+        self.delta_keyframe_interval = delta_keyframe_interval
+        # model kind -> (link, model, saves since the last keyframe)
+        self.last_models: dict[str, tuple[str, np.ndarray, int]] = {}
+
+    def add(self, data: bytes) -> str:
+        cid = content_id(data)
+        self.store.put(cid, data)
+        return cid
+
+    def cat(self, cid: str) -> bytes:
+        return self.store.get(cid)
+
     # public methods:
 
-    def save_value(self, key, value):
-        self.data[key] = value
-        self._save()
+    def save_value(self, value) -> str:
+        return self.add(encode_value(value))
 
-    def get_value(self, key: str) -> str:
-        if key in self.data:
-            return self.data[key]
-        else:
+    def _get_data(self, link: str) -> bytes:
+        data = self.cache.get(link)
+        if data is None:
+            data = self.cat(link)
+            if data is not None:
+                self.cache.put(link, data)
+        return data
+
+    def get_value(self, link: str):
+        data = self._get_data(link)
+        if data is None:
             return None
+        if data.startswith(DELTA_MAGIC):
+            return self._reconstruct(data).tolist()
+        return decode_value(data)
 
-    def save_global_weight(self, value: list[list[int]]) -> str:
-        link = f"https://example.com/link-gw-{self.inner_counter}"
-        self.save_value(key=link, value=value)
+    def _reconstruct(self, data: bytes) -> np.ndarray:
+        # follow the deltas back to the keyframe, then add them up:
+        deltas = []
+        while data.startswith(DELTA_MAGIC):
+            base_link, delta = decode_delta(data)
+            deltas.append(delta)
+            data = self._get_data(base_link)
+            if data is None:
+                raise Exception(f"Base model {base_link} of a delta was not found")
+        model = np.load(io.BytesIO(data), allow_pickle=False).astype(np.int64)
+        for delta in reversed(deltas):
+            model = model + delta
+        return model
+
+    def _save_model(self, kind: str, value) -> str:
+        if self.delta_keyframe_interval <= 0:
+            return self.save_value(value)
+        model = np.asarray(value)
+        last = self.last_models.get(kind)
+        if (
+            model.dtype.kind in "iu"
+            and last is not None
+            and last[1].shape == model.shape
+            and last[2] + 1 < self.delta_keyframe_interval
+        ):
+            link = self.add(encode_delta(last[0], model - last[1]))
+            self.last_models[kind] = (link, model, last[2] + 1)
+        else:
+            link = self.save_value(value)
+            self.last_models[kind] = (link, model, 0)
         return link
 
+    def save_global_weight(self, value: list[list[int]]) -> str:
+        return self._save_model("global_weight", value)
+
     def get_global_weight(self, link: str) -> list[list[int]]:
-        return self.get_value(key=link)
+        return self.get_value(link)
 
     def save_global_bias(self, value: list[int]) -> str:
-        link = f"https://example.com/link-gb-{self.inner_counter}"
-        self.save_value(key=link, value=value)
-        return link
+        return self._save_model("global_bias", value)
 
     def get_global_bias(self, link: str) -> list[int]:
-        return self.get_value(key=link)
+        return self.get_value(link)
+
+
+class IPFSHTTPConnector(IPFSConnector):
+    # client for the add/cat subset of the IPFS HTTP API (see ipfs_server.py)
+    def __init__(
+        self,
+        api_url: str,
+        pool_size: int = 8,
+        cache_size: int = 0,
+        delta_keyframe_interval: int = 0,
+    ) -> None:
+        super().__init__(
+            store_path=None,
+            cache_size=cache_size,
+            delta_keyframe_interval=delta_keyframe_interval,
+        )
+        self.api_url = api_url.rstrip("/")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def add(self, data: bytes) -> str:
+        response = self.session.post(
+            self.api_url + "/api/v0/add", files={"file": ("file", data)}
+        )
+        response.raise_for_status()
+        return response.json()["Hash"]
+
+    def cat(self, cid: str) -> bytes:
+        if not cid:
+            return None
+        response = self.session.post(self.api_url + "/api/v0/cat", params={"arg": cid})
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.content
+
+
+def create_ipfs_connector(config) -> IPFSConnector:
+    cache_size = config["DEFAULT"]["IPFSCacheSize"]
+    delta_keyframe_interval = config["DEFAULT"]["IPFSDeltaKeyframeInterval"]
+    if config["DEFAULT"]["IPFSBackend"] == "http":
+        return IPFSHTTPConnector(
+            api_url=config["DEFAULT"]["IPFSApiUrl"],
+            pool_size=config["DEFAULT"]["IPFSPoolSize"],
+            cache_size=cache_size,
+            delta_keyframe_interval=delta_keyframe_interval,
+        )
+    return IPFSConnector(
+        store_path=config["DEFAULT"]["IPFSStorePath"],
+        cache_size=cache_size,
+        delta_keyframe_interval=delta_keyframe_interval,
+        store_type=config["DEFAULT"]["IPFSStore"],
+    )
@@ -0,0 +1,101 @@
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from middleware.ipfs import IPFSConnector
+
+
+def read_multipart_file(body: bytes, content_type: str) -> bytes:
+    # content of the first part of a multipart/form-data body
+    boundary = None
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.strip().partition("=")
+        if key == "boundary":
+            boundary = value.strip('"').encode()
+    if boundary is None:
+        raise ValueError("multipart boundary is missing")
+    for part in body.split(b"--" + boundary)[1:]:
+        if part.startswith(b"--"):
+            break
+        _, separator, content = part.partition(b"\r\n\r\n")
+        if separator:
+            return content[: -len(b"\r\n")] if content.endswith(b"\r\n") else content
+    raise ValueError("multipart body has no file part")
+
+
+class IPFSRequestHandler(BaseHTTPRequestHandler):
+    # the add/cat subset of the IPFS HTTP API, backed by a local IPFSConnector
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        try:
+            if url.path == "/api/v0/add":
+                self._add()
+            elif url.path == "/api/v0/cat":
+                self._cat(parse_qs(url.query).get("arg", [""])[0])
+            else:
+                self._send_json(404, {"Message": f"unknown endpoint {url.path}"})
+        except ValueError as err:
+            self._send_json(400, {"Message": str(err)})
+
+    def _add(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        data = read_multipart_file(body, self.headers.get("Content-Type", ""))
+        cid = self.server.ipfs.add(data)
+        self._send_json(200, {"Name": cid, "Hash": cid, "Size": str(len(data))})
+
+    def _cat(self, cid: str):
+        data = self.server.ipfs.cat(cid)
+        if data is None:
+            self._send_json(404, {"Message": f"{cid} not found"})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status: int, content: dict):
+        data = json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def create_ipfs_server(
+    store_path: str, host: str, port: int, store_type: str = "files"
+) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), IPFSRequestHandler)
+    server.daemon_threads = True
+    server.ipfs = IPFSConnector(store_path=store_path, store_type=store_type)
+    return server
+
+
+def start_ipfs_server(
+    store_path: str, host: str, port: int, store_type: str = "files"
+) -> ThreadingHTTPServer:
+    server = create_ipfs_server(store_path, host, port, store_type)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local IPFS add/cat HTTP service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--store", default="ipfs_store")
+    parser.add_argument("--store-type", default="files", choices=["files", "sqlite"])
+    args = parser.parse_args()
+
+    ipfs_server = create_ipfs_server(args.store, args.host, args.port, args.store_type)
+    print(f"Serving IPFS API on http://{args.host}:{args.port} ({args.store=})")
+    ipfs_server.serve_forever()
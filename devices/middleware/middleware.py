@@ -1,5 +1,4 @@
 import functools
-import io
 import json
 import subprocess
 import threading
@@ -8,12 +7,14 @@ import time
 import numpy as np
 import pandas as pd
 from analytics.analytics import Analytics
-from message_broker.consumer import Consumer
+from message_broker.broker import create_consumer
+from message_broker.wire import decode_message
 from middleware.hash import mimc_hash
-from middleware.neuralnet import FCLayer, Network, mse, mse_prime
+from middleware.neural_net import FCLayer, Network, mse, mse_prime
+from middleware.sample_buffer import SampleBuffer
 from sklearn.metrics import accuracy_score, classification_report
 from sklearn.preprocessing import StandardScaler
-from utils.gas import get_current_balance
+from utils.tracing import tracer
 from utils.utils import wait_for_file_creation
 
 
@@ -24,11 +25,30 @@ def print_report(device, model, X_test, y_test):
     )
 
 
+def args_parser(args):
+    # witness arguments of the client circuit, space separated
+    res = ""
+    for arg in range(len(args)):
+        entry = args[arg]
+        if isinstance(entry, (list, np.ndarray)):
+            for i in range(len(entry)):
+                row_i = entry[i]
+                if isinstance(row_i, (list, np.ndarray)):
+                    for j in range(len(row_i)):
+                        val = row_i[j]
+                        res += str(val) + " "
+                else:
+                    res += str(row_i) + " "
+        else:
+            res += str(args[arg]) + " "
+    res = res[:-1]
+    return res
+
+
 class FederatedLearningModel:
     def __init__(self, config_file, deviceName):
         self.deviceName = deviceName
         self.config = config_file
-        self.consumer = Consumer()
         self.scaler = StandardScaler()
         self.net = Network(
             self.config["DEFAULT"]["OutputDimension"],
@@ -44,7 +64,7 @@ class FederatedLearningModel:
         self.epochs = self.config["DEFAULT"]["Epochs"]
         self.net.use(mse, mse_prime)
         self.learning_rate = None
-        self.curr_batch = None
+        self.samples = SampleBuffer(self.config["DEFAULT"]["SampleBufferCapacity"])
         self.batchSize = None
         self.x_train = None
         self.y_train = None
@@ -170,12 +190,7 @@ class FederatedLearningModel:
         )
 
     def process_Batch(self):
-        self.curr_batch.dropna(inplace=True)
-        batch = self.curr_batch.sample(self.batchSize)
-        self.x_train = batch.drop(columns=self.config["DEFAULT"]["ResponseVariable"])
-        self.y_train = batch[self.config["DEFAULT"]["ResponseVariable"]]
-        self.x_train = self.x_train.to_numpy()
-        self.y_train = self.y_train.to_numpy()
+        self.x_train, self.y_train = self.samples.sample(self.batchSize)
         self.scaler.fit(self.x_test.to_numpy())
         self.x_train = self.scaler.transform(self.x_train)
         self.net.fit(
@@ -188,7 +203,7 @@ class FederatedLearningModel:
         print(f"{self.deviceName}: Score:", score)
 
     def reset_batch(self):
-        self.curr_batch = None
+        self.samples.clear()
         self.x_train = None
         self.y_train = None
 
@@ -213,11 +228,8 @@ class FederatedLearningModel:
     def set_precision(self, precision):
         self.net.set_precision(precision)
 
-    def add_data_to_current_batch(self, data):
-        if self.curr_batch is None:
-            self.curr_batch = data
-        else:
-            self.curr_batch = pd.concat([self.curr_batch, data])
+    def add_samples(self, features, labels):
+        self.samples.append(features, labels)
 
 
 class MiddleWare:
@@ -231,7 +243,7 @@ class MiddleWare:
             config_file=configFile, deviceName=self.deviceName
         )
         self.config = configFile
-        self.consumer = Consumer()
+        self.consumer = create_consumer(self.config)
         self.__init_Consumer(deviceName, callback)
         self.proof = None
         self.precision = None
@@ -245,24 +257,6 @@ class MiddleWare:
         )
         x_train = x_train.astype(int)
 
-        def args_parser(args):
-            res = ""
-            for arg in range(len(args)):
-                entry = args[arg]
-                if isinstance(entry, (list, np.ndarray)):
-                    for i in range(len(entry)):
-                        row_i = entry[i]
-                        if isinstance(row_i, (list, np.ndarray)):
-                            for j in range(len(row_i)):
-                                val = row_i[j]
-                                res += str(val) + " "
-                        else:
-                            res += str(row_i) + " "
-                else:
-                    res += str(args[arg]) + " "
-            res = res[:-1]
-            return res
-
         def convert_matrix(m):
             max_field = 21888242871839275222246405745257275088548364400416034343698204186575808495617
             m = np.array(m)
@@ -275,8 +269,9 @@ class MiddleWare:
         weights_new, _ = convert_matrix(w_new)
         bias_new, _ = convert_matrix(b_new)
         x, x_sign = convert_matrix(x_train)
-        ldigest = mimc_hash(weights_new, bias_new)
-        sc_global_model_hash = mimc_hash(global_weights, global_bias)
+        with tracer.span("hash"):
+            ldigest = mimc_hash(weights_new, bias_new)
+            sc_global_model_hash = mimc_hash(global_weights, global_bias)
         args = [
             global_weights,
             global_weights_sign,
@@ -307,7 +302,8 @@ class MiddleWare:
             "-a",
         ]
         zokrates_compute_witness.extend(args_parser(args).split(" "))
-        g = subprocess.run(zokrates_compute_witness, capture_output=True)
+        with tracer.span("witness"):
+            g = subprocess.run(zokrates_compute_witness, capture_output=True)
         # wait_for_process(g)
 
         if g.returncode != 0:
@@ -342,7 +338,8 @@ class MiddleWare:
             "-j",
             proof_path,
         ]
-        g = subprocess.run(zokrates_generate_proof, capture_output=True)
+        with tracer.span("prove"):
+            g = subprocess.run(zokrates_generate_proof, capture_output=True)
         # wait_for_process(g)
 
         if g.returncode != 0:
@@ -365,43 +362,46 @@ class MiddleWare:
     def __init_Consumer(self, DeviceName, callBackFunction):
         queueName = self.config["DEFAULT"]["QueueBase"] + DeviceName
         on_message_callback = functools.partial(callBackFunction, args=(self.model))
-        self.consumer.declare_queue(queueName)
-        self.consumer.consume_data(queueName, on_message_callback)
+        self.consumer.declare_queue(
+            queueName, max_length=self.config["DEFAULT"]["QueueMaxLength"]
+        )
+        self.consumer.consume_data(
+            queueName,
+            on_message_callback,
+            prefetch_count=self.config["DEFAULT"]["ConsumerPrefetch"],
+        )
 
     def __start_Consuming(self):
         self.consumer_thread = threading.Thread(target=self.consumer.start_consuming)
         self.consumer_thread.start()
 
-    def update(self, w, b, mse_score, p, r, balance):
+    def update(self, w, b, mse_score, p, r):
         # barrier:
         print(f"Barrier waiting before aggregator start... ({self.accountNR=})")
-        start_thread_num = self.connection_manager.barrier.wait()
+        with tracer.span("barrier_wait", device=self.deviceName, round=r):
+            start_thread_num = self.connection_manager.barrier.wait(
+                device=self.deviceName, round=r, phase="trained"
+            )
 
         ##### aggregator:
         if start_thread_num == 0:
             self.connection_manager.aggregator_selector.start_round()
         #####
         tu = time.time()
-        self.connection_manager.update(w, b, mse_score, self.accountNR, p)
+        with tracer.span("submit", device=self.deviceName, round=r):
+            self.connection_manager.update(w, b, mse_score, self.accountNR, p, round=r)
         self.analytics.add_round_update_blockchain_time(r, time.time() - tu)
         self.analytics.add_round_gas(
             self.round,
-            balance - self.connection_manager.get_account_balance(self.accountNR),
-        )
-
-        # gas usage:
-        get_current_balance(
-            web3=self.connection_manager.web3Connection,
-            account_address=self.connection_manager.web3Connection.eth.accounts[
-                self.accountNR
-            ],
-            round=self.round,
-            source=f"Account-{self.accountNR}",
+            self.connection_manager.get_round_gas_cost(self.accountNR, r),
         )
 
         # barrier:
         print(f"Barrier waiting to finish aggregator... ({self.accountNR=})")
-        end_thread_num = self.connection_manager.barrier.wait()
+        with tracer.span("barrier_wait", device=self.deviceName, round=r):
+            end_thread_num = self.connection_manager.barrier.wait(
+                device=self.deviceName, round=r, phase="submitted"
+            )
 
         ###### aggregator:
         if end_thread_num == self.connection_manager.participant_count - 1:
@@ -422,67 +422,80 @@ class MiddleWare:
                 outstanding_update,
             )
             if outstanding_update:
-                t = time.time()
-                # get from blockchain:
-                balance = self.connection_manager.get_account_balance(self.accountNR)
-                retrieved_weights = self.connection_manager.get_globalWeights(
-                    self.accountNR
-                )
-                if retrieved_weights:
-                    global_weights = retrieved_weights
-                retrieved_bias = self.connection_manager.get_globalBias(self.accountNR)
-                if retrieved_bias:
-                    global_bias = retrieved_bias
-                lr = self.connection_manager.get_LearningRate(self.accountNR)
-                self.precision = self.connection_manager.get_Precision(self.accountNR)
-                # init blockchain vars to model:
-                self.model.set_precision(precision=self.precision)
-                self.model.set_learning_rate(lr)
-                self.model.set_weights(global_weights)
-                self.model.set_bias(global_bias)
-                self.batchSize = self.connection_manager.get_BatchSize(self.accountNR)
-                while self.model.curr_batch is None:
-                    pass
-                while self.model.curr_batch.size < self.batchSize:
-                    pass
-                self.model.set_batchSize(self.batchSize)
-                tt = time.time()
-                self.model.process_Batch()
-                self.analytics.add_round_training_local_time(
-                    self.round, time.time() - tt
-                )
-                self.analytics.add_round_score(self.round, self.model.test_model())
-                self.analytics.add_round_classification_report(
-                    self.round, self.model.get_classification_report()
-                )
-                w = self.model.get_weights()
-                b = self.model.get_bias()
-                mse_score = self.model.net.mse_average
-                if self.config["DEFAULT"]["PerformProof"]:
-                    tp = time.time()
-                    self.__generate_Proof(
-                        global_weights,
-                        global_bias,
-                        w,
-                        b,
-                        self.model.x_train,
-                        self.model.y_train,
-                        lr,
+                with tracer.span("round", device=self.deviceName, round=self.round):
+                    t = time.time()
+                    # get from blockchain:
+                    with tracer.span("fetch"):
+                        retrieved_weights = self.connection_manager.get_globalWeights(
+                            self.accountNR
+                        )
+                        if retrieved_weights:
+                            global_weights = retrieved_weights
+                        retrieved_bias = self.connection_manager.get_globalBias(
+                            self.accountNR
+                        )
+                        if retrieved_bias:
+                            global_bias = retrieved_bias
+                        lr = self.connection_manager.get_LearningRate(self.accountNR)
+                        self.precision = self.connection_manager.get_Precision(
+                            self.accountNR
+                        )
+                        self.batchSize = self.connection_manager.get_BatchSize(
+                            self.accountNR
+                        )
+                    # init blockchain vars to model:
+                    self.model.set_precision(precision=self.precision)
+                    self.model.set_learning_rate(lr)
+                    self.model.set_weights(global_weights)
+                    self.model.set_bias(global_bias)
+                    with tracer.span("wait_data"):
+                        self.model.samples.wait_for(self.batchSize)
+                    self.model.set_batchSize(self.batchSize)
+                    tt = time.time()
+                    with tracer.span("train"):
+                        self.model.process_Batch()
+                    self.analytics.add_round_training_local_time(
+                        self.round, time.time() - tt
                     )
-                    self.analytics.add_round_proof_times(self.round, time.time() - tp)
-                self.model.reset_batch()
-                thread = threading.Thread(
-                    target=self.update,
-                    args=[w, b, mse_score, self.proof, self.round, balance],
-                )
-                thread.start()
-                thread.join()
-
-                print(
-                    f"{self.deviceName}: Round {self.round} update took {time.time()-t} seconds"
-                )
-                self.round += 1
-                self.analytics.add_round_time(self.round, time.time() - t)
+                    with tracer.span("evaluate"):
+                        self.analytics.add_round_score(
+                            self.round, self.model.test_model()
+                        )
+                        self.analytics.add_round_classification_report(
+                            self.round, self.model.get_classification_report()
+                        )
+                    w = self.model.get_weights()
+                    b = self.model.get_bias()
+                    mse_score = self.model.net.mse_average
+                    if self.config["DEFAULT"]["PerformProof"]:
+                        tp = time.time()
+                        with tracer.span("proof"):
+                            self.__generate_Proof(
+                                global_weights,
+                                global_bias,
+                                w,
+                                b,
+                                self.model.x_train,
+                                self.model.y_train,
+                                lr,
+                            )
+                        self.analytics.add_round_proof_times(
+                            self.round, time.time() - tp
+                        )
+                    self.model.reset_batch()
+                    thread = threading.Thread(
+                        target=self.update,
+                        args=[w, b, mse_score, self.proof, self.round],
+                    )
+                    thread.start()
+                    thread.join()
+
+                    print(
+                        f"{self.deviceName}: Round {self.round} update took {time.time()-t} seconds"
+                    )
+                    self.round += 1
+                    self.analytics.add_round_time(self.round, time.time() - t)
+                    self.analytics.flush()
             time.sleep(self.config["DEFAULT"]["WaitingTime"])
             # self.__sleep_call(10)
         self.analytics.write_data()
@@ -492,5 +505,7 @@ class MiddleWare:
 def callback(ch, method, properties, body, args):
     model = args
     if isinstance(model, FederatedLearningModel):
-        batch = pd.read_csv(io.BytesIO(body), header=0, index_col=0)
-        model.add_data_to_current_batch(batch)
+        features, labels = decode_message(
+            body, model.config["DEFAULT"]["ResponseVariable"]
+        )
+        model.add_samples(features, labels)
@@ -0,0 +1,57 @@
+import threading
+
+import numpy as np
+
+
+# Preallocated buffer of up to `capacity` samples of a device, drained by
+# clear() after every round. Appending copies the rows in place (O(1) per row)
+# and blocks while the buffer has no room, so the consumer only acks a message
+# once its rows are admitted and a full buffer backs up into the broker queue.
+class SampleBuffer:
+    def __init__(self, capacity: int, seed: int = None):
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+        self.lock = threading.Lock()
+        self.available = threading.Condition(self.lock)
+        self.room = threading.Condition(self.lock)
+        self.features: np.ndarray = None  # allocated on the first append
+        self.labels: np.ndarray = None
+        self.size = 0
+
+    def append(self, features: np.ndarray, labels: np.ndarray):
+        features = np.asarray(features)
+        labels = np.asarray(labels)
+        # only the newest `capacity` rows of a message can be kept:
+        features = features[-self.capacity :]
+        labels = labels[-self.capacity :]
+        rows = len(features)
+        with self.lock:
+            self.room.wait_for(lambda: self.size + rows <= self.capacity)
+            if self.features is None:
+                self.features = np.empty(
+                    (self.capacity, features.shape[1]), dtype=np.float64
+                )
+                self.labels = np.empty(self.capacity, dtype=np.int64)
+            end = self.size + rows
+            self.features[self.size : end] = features
+            self.labels[self.size : end] = labels
+            self.size = end
+            self.available.notify_all()
+
+    def wait_for(self, n: int, timeout: float = None) -> bool:
+        # block until at least n samples are buffered, False on timeout
+        with self.available:
+            return self.available.wait_for(lambda: self.size >= n, timeout)
+
+    def sample(self, n: int) -> tuple[np.ndarray, np.ndarray]:
+        # n distinct rows drawn uniformly from the buffered samples
+        with self.lock:
+            if n > self.size:
+                raise ValueError(f"cannot sample {n} rows from {self.size}")
+            rows = self.rng.choice(self.size, size=n, replace=False)
+            return self.features[rows], self.labels[rows]
+
+    def clear(self):
+        with self.lock:
+            self.size = 0
+            self.room.notify_all()
@@ -1,59 +1,85 @@
-import csv
-import datetime
-import logging
+import atexit
+import json
+import queue
+import threading
+import time
 
-from web3 import Web3
 
-logger = logging.getLogger("gas_logger")
-logger.setLevel(logging.DEBUG)
-file_handler = logging.FileHandler("gas_logs.log")
-file_handler.setLevel(logging.DEBUG)
-# console_handler = logging.StreamHandler()
-# console_handler.setLevel(logging.DEBUG)
-formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-file_handler.setFormatter(formatter)
-# console_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
-# logger.addHandler(console_handler)
+# Gas accounting from transaction receipts: every receipt is tagged with round,
+# account and contract function, summed per (account, round) and written as one
+# json line per transaction by a background thread.
+class GasLedger:
+    def __init__(self, file_path: str, flush_interval: float = 1.0):
+        self.file_path = file_path
+        self.flush_interval = flush_interval
+        self._pending: queue.SimpleQueue = queue.SimpleQueue()
+        self._file_lock = threading.Lock()
+        self._totals_lock = threading.Lock()
+        # (account, round) -> [gas_used, cost_wei]
+        self._totals: dict[tuple[str, int], list[int]] = {}
+        self._stop = threading.Event()
+        self._writer_thread = threading.Thread(target=self._run, daemon=True)
+        self._writer_thread.start()
+        atexit.register(self.close)
 
+    def record(
+        self,
+        receipt: dict,
+        account,
+        round: int,
+        function: str,
+        gas_price: int = None,
+    ) -> dict:
+        if not receipt:
+            raise Exception("Empty receipt received")
+        # pre-London chains have no effectiveGasPrice; the tx gasPrice is passed instead
+        if "effectiveGasPrice" in receipt:
+            gas_price = receipt["effectiveGasPrice"]
+        gas_used = int(receipt["gasUsed"])
+        gas_price = int(gas_price or 0)
+        entry = {
+            "time": time.time(),
+            "round": round,
+            "account": str(account),
+            "address": receipt["from"],
+            "function": function,
+            "tx_hash": receipt["transactionHash"].hex(),
+            "block_number": receipt["blockNumber"],
+            "status": receipt["status"],
+            "gas_used": gas_used,
+            "effective_gas_price": gas_price,
+            "cost_wei": gas_used * gas_price,
+        }
+        with self._totals_lock:
+            totals = self._totals.setdefault((str(account), round), [0, 0])
+            totals[0] += gas_used
+            totals[1] += entry["cost_wei"]
+        self._pending.put(entry)
+        return entry
 
-def get_current_balance(
-    web3: Web3,
-    account_address: str,
-    round: int,
-    source: str,
-    verbose: bool = False,
-    csv_log: bool = True,
-):
-    balance = web3.eth.getBalance(account_address)
-    used = 1000000000000000000000000000 - int(balance)
-    used_eth = web3.fromWei(used, "ether")
+    def get_round_totals(self, account, round: int) -> tuple[int, int]:
+        # (gas_used, cost_wei) of an account in a round:
+        with self._totals_lock:
+            gas_used, cost_wei = self._totals.get((str(account), round), (0, 0))
+        return gas_used, cost_wei
 
-    if verbose or csv_log:
-        # dt, round, source, balance, used, used_eth, (used / 3,086,181,642),
-        data = [
-            datetime.datetime.now(),
-            f"Round-{round}",
-            source,
-            balance,
-            used,
-            used_eth,
-            used / 3_086_181_642,
-        ]
-        if verbose:
-            print(f"datetime, source, gas used: {data}")
-        if csv_log:
-            csv_file = "balance.csv"
-            with open(csv_file, mode="a", newline="") as file:
-                writer = csv.writer(file)
-                writer.writerow(data)
+    def flush(self):
+        with self._file_lock:
+            entries = []
+            while True:
+                try:
+                    entries.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            if not entries:
+                return
+            with open(self.file_path, mode="a") as file:
+                file.writelines(json.dumps(entry) + "\n" for entry in entries)
 
-    return balance
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
 
-
-def log_receipt(receipt: dict, account: int, desc: str):
-    if not receipt:
-        raise Exception("Empty receipt received")
-
-    msg = f"account={str(account)}, desc={str(desc)}, receipt={str(receipt)}"
-    logger.debug(msg)
+    def close(self):
+        self._stop.set()
+        self.flush()
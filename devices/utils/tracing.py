@@ -0,0 +1,152 @@
+import atexit
+import contextlib
+import json
+import os
+import threading
+import time
+
+
+# Round-phase tracing: spans are timed with labels (device, round, aggregator),
+# nested spans inherit the labels of the enclosing span of the same thread.
+# Every metrics_interval seconds, the spans finished since the last write are
+# appended to a Chrome trace file (chrome://tracing, Perfetto) and the spans
+# summed per (span, labels) are rewritten to an OpenMetrics text file for a
+# local scraper. Only the spans of one interval are held in memory.
+class Tracer:
+    def __init__(self):
+        self.trace_path = None
+        self.metrics_path = None
+        self.metrics_interval = 5.0
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        # trace events not written yet:
+        self.events = []
+        self.thread_names: set[int] = set()
+        # (span name, labels) -> [count, seconds]
+        self.totals: dict[tuple, list] = {}
+        self.start_time = time.perf_counter()
+        self._stop = threading.Event()
+        self._writer_thread = None
+
+    def configure(self, trace_path=None, metrics_path=None, metrics_interval=5.0):
+        self.trace_path = trace_path or None
+        self.metrics_path = metrics_path or None
+        self.metrics_interval = metrics_interval
+        self.enabled = bool(self.trace_path or self.metrics_path)
+        if self.trace_path:
+            # the JSON array format, one event per line; the closing bracket is
+            # optional, so the file is readable while the devices still run
+            with open(self.trace_path, "w") as file:
+                file.write("[\n")
+        if self.enabled and self._writer_thread is None:
+            self._writer_thread = threading.Thread(target=self._run, daemon=True)
+            self._writer_thread.start()
+        atexit.unregister(self.close)
+        atexit.register(self.close)
+
+    def _stack(self) -> list:
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        return self.local.stack
+
+    @contextlib.contextmanager
+    def span(self, name, **labels):
+        if not self.enabled:
+            yield
+            return
+        stack = self._stack()
+        if stack:
+            labels = {**stack[-1], **labels}
+        stack.append(labels)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            stack.pop()
+            self._record(name, labels, start, duration)
+
+    def _record(self, name, labels, start, duration):
+        labels = {key: str(value) for key, value in labels.items()}
+        tid = threading.get_native_id()
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": (start - self.start_time) * 1e6,
+            "dur": duration * 1e6,
+            "pid": os.getpid(),
+            "tid": tid,
+            "args": labels,
+        }
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            if self.trace_path:
+                if tid not in self.thread_names:
+                    # name the thread's track after its first span's owner:
+                    self.thread_names.add(tid)
+                    thread_name = labels.get("device") or labels.get("aggregator")
+                    self.events.append(
+                        {
+                            "name": "thread_name",
+                            "ph": "M",
+                            "pid": os.getpid(),
+                            "tid": tid,
+                            "args": {"name": thread_name or str(tid)},
+                        }
+                    )
+                self.events.append(event)
+            totals = self.totals.setdefault(key, [0, 0.0])
+            totals[0] += 1
+            totals[1] += duration
+
+    def write_trace(self):
+        # appends the events recorded since the last call
+        if not self.trace_path:
+            return
+        with self.lock:
+            events, self.events = self.events, []
+        if events:
+            with open(self.trace_path, "a") as file:
+                file.write("".join(json.dumps(event) + ",\n" for event in events))
+
+    def write_metrics(self):
+        if not self.metrics_path:
+            return
+        with self.lock:
+            totals = dict(self.totals)
+        lines = [
+            "# TYPE fl_span_seconds summary",
+            "# UNIT fl_span_seconds seconds",
+            "# HELP fl_span_seconds Time spent in round phases.",
+        ]
+        for (name, labels), (count, seconds) in sorted(totals.items()):
+            label_text = ",".join(
+                [f'span="{name}"'] + [f'{key}="{value}"' for key, value in labels]
+            )
+            lines.append(f"fl_span_seconds_count{{{label_text}}} {count}")
+            lines.append(f"fl_span_seconds_sum{{{label_text}}} {seconds}")
+        lines.append("# EOF")
+        _write_atomic(self.metrics_path, "\n".join(lines) + "\n")
+
+    def _run(self):
+        # the devices never exit normally, so nothing waits for close():
+        while not self._stop.wait(self.metrics_interval):
+            self.write_trace()
+            self.write_metrics()
+
+    def close(self):
+        self._stop.set()
+        self.write_trace()
+        self.write_metrics()
+
+
+def _write_atomic(file_path, text):
+    # readers never see a partially written file:
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, "w") as file:
+        file.write(text)
+    os.replace(tmp_path, file_path)
+
+
+tracer = Tracer()
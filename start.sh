@@ -19,22 +19,14 @@ truffle migrate
 cd ./../..
 echo "Current directory: $(pwd)"
 
-# remove balance.csv:
-balance_csv="balance.csv"
-echo "Deleting $balance_csv ..."
-if [ -f "$balance_csv" ]; then
-    sudo rm "${balance_csv}"
-    echo "Done"
-else
-    echo "$balance_csv was not found in directory."
-fi
-
-# remove gas_logs.log:
-gas_logs="gas_logs.log"
-echo "Deleting $gas_logs ..."
-if [ -f "$gas_logs" ]; then
-    sudo rm "${gas_logs}"
-    echo "Done"
-else
-    echo "$gas_logs was not found in directory."
-fi
\ No newline at end of file
+# remove gas_ledger.jsonl and barrier_log.jsonl:
+for log_file in "gas_ledger.jsonl" "barrier_log.jsonl"
+do
+    echo "Deleting $log_file ..."
+    if [ -f "$log_file" ]; then
+        sudo rm "${log_file}"
+        echo "Done"
+    else
+        echo "$log_file was not found in directory."
+    fi
+done
\ No newline at end of file
@@ -1,3 +1,4 @@
+import contextlib
 import datetime
 import os
 import subprocess
@@ -5,8 +6,8 @@ import time
 
 import numpy as np
 import pandas as pd
-import psutil
 from hash import mimc_hash
+from resources import run, save_timelines, usage_columns
 
 
 def mse_prime(y_true, y_pred):
@@ -20,27 +21,14 @@ def convert_matrix(m):
     return np.where(m < 0, max_field + m, m), np.where(m > 0, 0, 1)
 
 
-def process_memory_usage(process) -> list:
-    p = psutil.Process(process.pid)
-    SLICE_IN_SECONDS = 0.05
-    res = []
-    while process.poll() is None:
-        try:
-            res.append(p.memory_info().rss / (1024 * 1024))
-        except psutil.NoSuchProcess:
-            pass
-        time.sleep(SLICE_IN_SECONDS)
-    return res, max(res)
-
-
-def run_process(args: list, mem_profile=True):
+def run_process(args: list, mem_profile=True, cwd=None):
+    # usage: exact peak RSS and CPU times with a downsampled RSS timeline, see
+    # resources.run
     if mem_profile:
-        p = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        all_mem, max_mem = process_memory_usage(p)
-        return p, all_mem, max_mem
+        return run(args, io=True, cwd=cwd)
     else:
-        p = subprocess.run(args, capture_output=True)
-        return p, None, None
+        p = subprocess.run(args, capture_output=True, cwd=cwd)
+        return p, None
 
 
 def args_parser(args):
@@ -58,58 +46,59 @@ def args_parser(args):
     return res
 
 
-def compile():
+def compile(zok_filepath, batchsize, cwd=None):
     t1 = time.time()
     zokrates_compile = [
         zokrates,
         "compile",
         "-i",
-        "./../zokrates/root.zok",
+        zok_filepath,
     ]
-    p, all_mem, max_mem = run_process(zokrates_compile)
+    p, usage = run_process(zokrates_compile, cwd=cwd)
     if p.returncode != 0:
         raise Exception(f"{p.stderr.decode()=}\n{p.stdout.decode()=}")
     t2 = time.time()
     diff = t2 - t1
     print(f"Compilation for {batchsize} samples took {diff} seconds")
-    return diff, all_mem, max_mem
+    return diff, usage
 
 
-def setup():
+def setup(batchsize, cwd=None):
     zokrates_setup = [
         zokrates,
         "setup",
     ]
 
     t1 = time.time()
-    p, all_mem, max_mem = run_process(zokrates_setup)
+    p, usage = run_process(zokrates_setup, cwd=cwd)
     if p.returncode != 0:
         raise Exception(f"{p.stderr.decode()=}\n{p.stdout.decode()=}")
     t2 = time.time()
     diff = t2 - t1
     print(f"Setup for {batchsize} samples took {diff} seconds")
-    return diff, all_mem, max_mem
+    return diff, usage
 
 
-def compute_witness():
-    np.random.seed(0)
+def compute_witness(batchsize, cwd=None):
+    # a generator of its own, runs in parallel threads get the same inputs:
+    rng = np.random.RandomState(0)
     precision = 1000
     ac = 6
     fe = 9
     bias = (
-        np.random.randn(
+        rng.randn(
             ac,
         )
         * precision
     )
-    weights = np.random.randn(ac, fe) * precision
+    weights = rng.randn(ac, fe) * precision
     weights = np.array([[int(x) for x in y] for y in weights])
     bias = np.array([int(x) for x in bias])
     w = weights
     weights, weights_sign = convert_matrix(weights)
     b = bias
     bias, bias_sign = convert_matrix(bias)
-    x_train = np.random.randn(batchsize, fe) * precision
+    x_train = rng.randn(batchsize, fe) * precision
     x_train = np.array([[int(x) for x in y] for y in x_train])
     x = x_train
     x_train, x_train_sign = convert_matrix(x_train)
@@ -117,7 +106,7 @@ def compute_witness():
     Y = []
     out = None
     for X in x:
-        rand_int = np.random.randint(1, ac)
+        rand_int = rng.randint(1, ac)
         y_true = np.zeros(shape=(ac,))
         y_true[rand_int - 1] = precision
         Y.append(rand_int)
@@ -129,12 +118,12 @@ def compute_witness():
     # ,bias,bias_sign,x,x_sign,1,learning_rate,precision
 
     new_bias = (
-        np.random.randn(
+        rng.randn(
             ac,
         )
         * precision
     )
-    new_weights = np.random.randn(ac, fe) * precision
+    new_weights = rng.randn(ac, fe) * precision
     new_weights = np.array([[int(x) for x in y] for y in new_weights])
     new_bias = np.array([int(x) for x in new_bias])
     new_weights, _ = convert_matrix(new_weights)
@@ -167,43 +156,43 @@ def compute_witness():
     zokrates_compute_witness.extend(args_parser(args).split(" "))
 
     t1 = time.time()
-    p, all_mem, max_mem = run_process(zokrates_compute_witness)
+    p, usage = run_process(zokrates_compute_witness, cwd=cwd)
     if p.returncode != 0:
         raise Exception(f"{p.stderr.decode()=}\n{p.stdout.decode()=}")
     t2 = time.time()
     diff = t2 - t1
     print(f"Computing witness for {batchsize} samples took {diff} seconds")
-    return diff, all_mem, max_mem
+    return diff, usage
 
 
-def generate_proof():
+def generate_proof(batchsize, cwd=None):
     zokrates_generate_proof = [
         zokrates,
         "generate-proof",
     ]
     t1 = time.time()
-    p, all_mem, max_mem = run_process(zokrates_generate_proof)
+    p, usage = run_process(zokrates_generate_proof, cwd=cwd)
     if p.returncode != 0:
         raise Exception(f"{p.stderr.decode()=}\n{p.stdout.decode()=}")
     t2 = time.time()
     diff = t2 - t1
     print(f"Generating proof for {batchsize} samples took {diff} seconds")
-    return diff, all_mem, max_mem
+    return diff, usage
 
 
-def export_verifier():
+def export_verifier(batchsize, cwd=None):
     zokrates_export_verifier = [
         zokrates,
         "export-verifier",
     ]
     t1 = time.time()
-    p, all_mem, max_mem = run_process(zokrates_export_verifier)
+    p, usage = run_process(zokrates_export_verifier, cwd=cwd)
     if p.returncode != 0:
         raise Exception(f"{p.stderr.decode()=}\n{p.stdout.decode()=}")
     t2 = time.time()
     diff = t2 - t1
     print(f"Exporting Verifier for {batchsize} samples took {diff} seconds")
-    return diff, all_mem, max_mem
+    return diff, usage
 
 
 def get_batchsize(zok_filepath):
@@ -214,7 +203,7 @@ def get_batchsize(zok_filepath):
 
 
 def calculate_average(analytics_filepath):
-    analytics_df = pd.read_csv(analytics_filepath)
+    analytics_df = pd.read_csv(analytics_filepath).drop(columns=["datetime"])
     grouped_df = analytics_df.groupby("batchsize")
     average_df = grouped_df.mean().round(2)
     average_df = average_df.rename(columns=lambda x: f"{x}_avg")
@@ -230,97 +219,78 @@ def calculate_average(analytics_filepath):
     return average_df
 
 
-zokrates = "zokrates"
-result_df = pd.DataFrame(
-    columns=[
-        "datetime",
-        "batchsize",
-        "t_compile",
-        "t_setup",
-        "t_compute_witness",
-        "t_generate_proof",
-        "t_export_verifier",
-        "max_mem_compile",
-        "max_mem_setup",
-        "max_mem_compute_witness",
-        "max_mem_generate_proof",
-        "max_mem_export_verifier",
-    ]
-)
-memory_usage_df = pd.DataFrame(
-    columns=[
-        "datetime",
-        "batchsize",
-        "all_mem_compile",
-        "all_mem_setup",
-        "all_mem_compute_witness",
-        "all_mem_generate_proof",
-        "all_mem_export_verifier",
-    ]
-)
-
-repeat = 3
-for i in range(repeat):
-    print(f"Analyzing zokrates files - Round {i+1}")
-    dt = datetime.datetime.now()
-    batchsize = get_batchsize(zok_filepath="./../zokrates/root.zok")
-    print(f"Detected batchsize: {batchsize}")
-
-    t_compile, all_mem_compile, max_mem_compile = compile()
-    t_setup, all_mem_setup, max_mem_setup = setup()
-    t_compute_witness, all_mem_compute_witness, max_mem_compute_witness = (
-        compute_witness()
-    )
-    t_generate_proof, all_mem_generate_proof, max_mem_generate_proof = generate_proof()
-    t_export_verifier, all_mem_export_verifier, max_mem_export_verifier = (
-        export_verifier()
-    )
-
-    result_df = result_df.append(
-        {
-            "datetime": dt,
-            "batchsize": batchsize,
-            "t_compile": t_compile,
-            "t_setup": t_setup,
-            "t_compute_witness": t_compute_witness,
-            "t_generate_proof": t_generate_proof,
-            "t_export_verifier": t_export_verifier,
-            "max_mem_compile": max_mem_compile,
-            "max_mem_setup": max_mem_setup,
-            "max_mem_compute_witness": max_mem_compute_witness,
-            "max_mem_generate_proof": max_mem_generate_proof,
-            "max_mem_export_verifier": max_mem_export_verifier,
-        },
-        ignore_index=True,
-    )
-    if i == 0:
-        memory_usage_df = memory_usage_df.append(
+def no_reserve(phase):
+    return contextlib.nullcontext()
+
+
+def run_phases(zok_filepath, batchsize, cwd=None, reserve=no_reserve):
+    # one benchmark run: {phase: seconds}, {phase: usage}. Each phase runs
+    # inside reserve(phase), a context manager the sweep uses to hold memory.
+    phases = {
+        "compile": lambda: compile(zok_filepath, batchsize, cwd),
+        "setup": lambda: setup(batchsize, cwd),
+        "compute_witness": lambda: compute_witness(batchsize, cwd),
+        "generate_proof": lambda: generate_proof(batchsize, cwd),
+        "export_verifier": lambda: export_verifier(batchsize, cwd),
+    }
+    times, usages = {}, {}
+    for phase, run_phase in phases.items():
+        with reserve(phase):
+            times[phase], usages[phase] = run_phase()
+    return times, usages
+
+
+def analyze(repeat, zok_filepath, timelines_path="timelines"):
+    results = []
+    memory_usage = []
+    for i in range(repeat):
+        print(f"Analyzing zokrates files - Round {i+1}")
+        dt = datetime.datetime.now()
+        batchsize = get_batchsize(zok_filepath=zok_filepath)
+        print(f"Detected batchsize: {batchsize}")
+        times, usages = run_phases(zok_filepath, batchsize)
+        # the RSS timelines of a run are in one .npz file, np.load(file)[phase]
+        timeline_file = os.path.join(
+            timelines_path, f"{dt:%Y%m%d-%H%M%S-%f}_bs{batchsize}.npz"
+        )
+        save_timelines(timeline_file, usages)
+        results.append(
             {
                 "datetime": dt,
                 "batchsize": batchsize,
-                "all_mem_compile": all_mem_compile,
-                "all_mem_setup": all_mem_setup,
-                "all_mem_compute_witness": all_mem_compute_witness,
-                "all_mem_generate_proof": all_mem_generate_proof,
-                "all_mem_export_verifier": all_mem_export_verifier,
-            },
-            ignore_index=True,
+                **{f"t_{phase}": t for phase, t in times.items()},
+                **usage_columns(usages),
+            }
         )
+        memory_usage.append(
+            {
+                "datetime": dt,
+                "batchsize": batchsize,
+                "timeline_file": timeline_file,
+            }
+        )
+    return pd.DataFrame(results), pd.DataFrame(memory_usage)
+
+
+def append_csv(df, file_path):
+    # earlier runs may have fewer columns
+    if os.path.isfile(file_path):
+        df = pd.concat([pd.read_csv(file_path), df])
+    df.to_csv(file_path, index=False)
+
+
+zokrates = "zokrates"
+
+if __name__ == "__main__":
+    repeat = 3
+    result_df, memory_usage_df = analyze(repeat, zok_filepath="./../zokrates/root.zok")
+
+    # analytics:
+    analytics_filepath = "analytics.csv"
+    append_csv(result_df, analytics_filepath)
+    # memory usage:
+    append_csv(memory_usage_df, "analytics_memory.csv")
 
-# analytics:
-analytics_filepath = "analytics.csv"
-if os.path.isfile(analytics_filepath):
-    result_df.to_csv(analytics_filepath, mode="a", header=False, index=False)
-else:
-    result_df.to_csv(analytics_filepath, index=False)
-# memory usage:
-memory_usage_filepath = "analytics_memory.csv"
-if os.path.isfile(memory_usage_filepath):
-    memory_usage_df.to_csv(memory_usage_filepath, mode="a", header=False, index=False)
-else:
-    memory_usage_df.to_csv(memory_usage_filepath, index=False)
-memory_usage_df.to_csv(memory_usage_filepath, index=False)
-
-# calculate average:
-average_df = calculate_average(analytics_filepath=analytics_filepath)
-print(average_df)
\ No newline at end of file
+    # calculate average:
+    average_df = calculate_average(analytics_filepath=analytics_filepath)
+    print(average_df)
@@ -0,0 +1,147 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+# Resource usage of a child process. Peak RSS and user/sys CPU time are exact:
+# they come from the kernel's rusage of the child, returned by wait4. While the
+# child runs, its RSS (and optionally its I/O counters) are sampled from /proc
+# into a timeline, downsampled to at most timeline_points points (the peak of
+# each interval) when it exits.
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+MB = 1024 * 1024
+
+
+def read_rss(pid):
+    # resident set size in bytes, None once the process has exited
+    try:
+        with open(f"/proc/{pid}/statm") as file:
+            return int(file.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError):
+        return None
+
+
+def read_io(pid):
+    # {"rchar", "wchar", "read_bytes", "write_bytes", ...} of /proc/<pid>/io
+    try:
+        with open(f"/proc/{pid}/io") as file:
+            return {
+                key: int(value)
+                for key, value in (line.split(": ") for line in file if ": " in line)
+            }
+    except OSError:
+        return None
+
+
+def downsample(timeline, points):
+    # keeps the first time and the peak RSS of each of `points` intervals
+    if len(timeline) <= points:
+        return timeline
+    buckets = np.array_split(timeline, points)
+    return np.array([[bucket[0, 0], bucket[:, 1].max()] for bucket in buckets])
+
+
+class Sampler(threading.Thread):
+    def __init__(self, pid, interval, io):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.io = io
+        self.samples = []
+        self.last_io = None
+        self.stopped = threading.Event()
+
+    def run(self):
+        start = time.perf_counter()
+        while not self.stopped.is_set():
+            rss = read_rss(self.pid)
+            # an exited child reports 0 until it is reaped:
+            if rss:
+                self.samples.append((time.perf_counter() - start, rss / MB))
+            if self.io:
+                self.last_io = read_io(self.pid) or self.last_io
+            self.stopped.wait(self.interval)
+
+
+def run(args, sample_interval=0.01, timeline_points=512, io=False, cwd=None):
+    # Runs args to completion. Returns the CompletedProcess and its usage:
+    # wall, user and sys seconds, max_rss in MB, block I/O in bytes (and the
+    # last /proc I/O counters with io=True) and timeline, an (n, 2) array of
+    # seconds since start and RSS in MB.
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=cwd
+    )
+    sampler = Sampler(process.pid, sample_interval, io)
+    sampler.start()
+    # drain the pipes so a chatty child does not block on a full pipe:
+    output = {}
+
+    def read(name):
+        output[name] = getattr(process, name).read()
+
+    readers = [
+        threading.Thread(target=read, args=(name,)) for name in ["stdout", "stderr"]
+    ]
+    for reader in readers:
+        reader.start()
+    _, status, rusage = os.wait4(process.pid, 0)
+    wall = time.perf_counter() - start
+    sampler.stopped.set()
+    sampler.join()
+    for reader in readers:
+        reader.join()
+    process.stdout.close()
+    process.stderr.close()
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS:
+    max_rss = rusage.ru_maxrss / (MB if sys.platform == "darwin" else 1024)
+    usage = {
+        "wall": wall,
+        "user": rusage.ru_utime,
+        "sys": rusage.ru_stime,
+        "max_rss": max_rss,
+        # ru_inblock/ru_oublock count 512 byte blocks:
+        "read_bytes": rusage.ru_inblock * 512,
+        "write_bytes": rusage.ru_oublock * 512,
+        "timeline": downsample(
+            np.array(sampler.samples, dtype=np.float64).reshape(-1, 2),
+            timeline_points,
+        ),
+    }
+    if io and sampler.last_io:
+        usage["rchar"] = sampler.last_io.get("rchar")
+        usage["wchar"] = sampler.last_io.get("wchar")
+    completed = subprocess.CompletedProcess(
+        args, process.returncode, output["stdout"], output["stderr"]
+    )
+    return completed, usage
+
+
+def usage_columns(usages):
+    # {phase: usage} -> flat analytics columns, e.g. max_mem_<phase>
+    columns = {}
+    for phase, usage in usages.items():
+        columns[f"max_mem_{phase}"] = usage["max_rss"]
+        columns[f"user_{phase}"] = usage["user"]
+        columns[f"sys_{phase}"] = usage["sys"]
+        columns[f"read_bytes_{phase}"] = usage["read_bytes"]
+        columns[f"write_bytes_{phase}"] = usage["write_bytes"]
+        for key in ["rchar", "wchar"]:
+            if key in usage:
+                columns[f"{key}_{phase}"] = usage[key]
+    return columns
+
+
+def save_timelines(file_path, usages):
+    # one (n, 2) float array per phase in a compressed .npz file, load with
+    # np.load(file_path)[phase]
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    np.savez_compressed(
+        file_path, **{phase: usage["timeline"] for phase, usage in usages.items()}
+    )
@@ -0,0 +1,399 @@
+import argparse
+import collections
+import contextlib
+import importlib.util
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+from resources import save_timelines
+
+# Benchmarks the client circuit for several batch sizes and the aggregator
+# circuit for several client counts. A circuit variant is root.zok with its
+# batch size (bs) or client count (c) replaced; each run of a variant compiles,
+# sets up, computes a witness, proves and exports the verifier in a work
+# directory of its own. Runs execute in parallel threads, and every phase first
+# reserves its expected peak memory from a shared budget. The expected peak is
+# learned from the finished runs and extrapolated to larger variants. Unknown
+# phases reserve the whole budget, so they run alone.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ZOKRATES_PATH = os.path.join(HERE, "..", "zokrates")
+PHASES = ["compile", "setup", "compute_witness", "generate_proof", "export_verifier"]
+METRICS = [
+    "seconds",
+    "max_rss_mb",
+    "user_seconds",
+    "sys_seconds",
+    "read_bytes",
+    "write_bytes",
+]
+KEYS = ["circuit", "batchsize", "client_number"]
+# circuit -> (analyze.py, root.zok, swept constant)
+CIRCUITS = {
+    "client": (
+        os.path.join(HERE, "analyze.py"),
+        os.path.join(ZOKRATES_PATH, "root.zok"),
+        re.compile(r"const u32\s+bs\s*=\s*\d+;"),
+    ),
+    "aggregator": (
+        os.path.join(HERE, "aggregator", "analyze.py"),
+        os.path.join(ZOKRATES_PATH, "aggregator", "root.zok"),
+        re.compile(r"const u32\s+c\s*=\s*\d+;"),
+    ),
+}
+# expected peaks are multiplied by this margin
+PEAK_MARGIN = 1.2
+
+
+def load_analyze(circuit):
+    # both analyze.py modules are called analyze, load them under the circuit
+    spec = importlib.util.spec_from_file_location(
+        f"{circuit}_analyze", CIRCUITS[circuit][0]
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def write_variant(circuit, size, file_path):
+    # root.zok of the circuit with bs (client) or c (aggregator) set to size;
+    # the lines keep the format get_batchsize/get_client_number read
+    _, source, constant = CIRCUITS[circuit]
+    with open(source) as file:
+        text = file.read()
+    if circuit == "client":
+        line = f"const u32  bs = {size};"
+    else:
+        line = f"const u32 c = {size};"
+    text, count = constant.subn(line, text)
+    if count != 1:
+        raise Exception(f"Expected one {constant.pattern} in {source}, found {count}")
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "w") as file:
+        file.write(text)
+    return file_path
+
+
+def available_memory_mb():
+    try:
+        with open("/proc/meminfo") as file:
+            for line in file:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024**2
+
+
+class MemoryBudget:
+    # Reservations are granted in request order, so a large phase is not
+    # starved by a stream of small ones. The amount is a callable, evaluated
+    # again whenever the budget changes or estimates improve.
+    def __init__(self, total_mb):
+        self.total_mb = total_mb
+        self.reserved_mb = 0.0
+        self.waiting = collections.deque()
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.condition.notify_all()
+
+    @contextlib.contextmanager
+    def reserve(self, amount):
+        ticket = object()
+        with self.condition:
+            self.waiting.append(ticket)
+            self.condition.wait_for(
+                lambda: self.waiting[0] is ticket
+                and self.reserved_mb + min(amount(), self.total_mb) <= self.total_mb
+            )
+            self.waiting.popleft()
+            mb = min(amount(), self.total_mb)
+            self.reserved_mb += mb
+            self.condition.notify_all()
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.reserved_mb -= mb
+                self.condition.notify_all()
+
+
+class PeakEstimator:
+    # peak RSS in MB per (circuit, phase) and variant size of the finished runs
+    def __init__(self):
+        self.peaks = {}
+        self.lock = threading.Lock()
+
+    def add(self, circuit, size, peaks):
+        with self.lock:
+            for phase, peak in peaks.items():
+                known = self.peaks.setdefault((circuit, phase), {})
+                known[size] = max(known.get(size, 0.0), peak)
+
+    def estimate(self, circuit, phase, size):
+        # None when nothing is known; larger variants are extrapolated linearly
+        # from the largest smaller one
+        with self.lock:
+            known = dict(self.peaks.get((circuit, phase), {}))
+        if not known:
+            return None
+        if size in known:
+            return known[size] * PEAK_MARGIN
+        smaller = [s for s in known if s < size]
+        reference = max(smaller) if smaller else min(known)
+        return known[reference] * max(size / reference, 1.0) * PEAK_MARGIN
+
+
+class Sweep:
+    def __init__(
+        self,
+        batchsizes,
+        client_numbers,
+        aggregator_batchsize,
+        repeat,
+        out_path,
+        memory_budget_mb,
+        keep_work=False,
+    ):
+        self.out_path = out_path
+        self.work_path = os.path.join(out_path, "work")
+        self.results_path = os.path.join(out_path, "results.csv")
+        self.keep_work = keep_work
+        self.budget = MemoryBudget(memory_budget_mb)
+        self.estimator = PeakEstimator()
+        self.modules = {circuit: load_analyze(circuit) for circuit in CIRCUITS}
+        # (circuit, batchsize, client_number, repeat); small variants first, so
+        # the peaks of the larger ones can be extrapolated
+        self.runs = sorted(
+            [
+                ("client", batchsize, None, i)
+                for batchsize in batchsizes
+                for i in range(repeat)
+            ]
+            + [
+                ("aggregator", aggregator_batchsize, client_number, i)
+                for client_number in client_numbers
+                for i in range(repeat)
+            ],
+            key=lambda run: (run[3], self.size(run), run[0]),
+        )
+
+    @staticmethod
+    def size(run):
+        circuit, batchsize, client_number, _ = run
+        return batchsize if circuit == "client" else client_number
+
+    @staticmethod
+    def variant(run):
+        circuit, batchsize, client_number, _ = run
+        if circuit == "client":
+            return f"client_bs{batchsize}"
+        return f"aggregator_c{client_number}_bs{batchsize}"
+
+    def set_zokrates(self, zokrates):
+        for module in self.modules.values():
+            module.zokrates = zokrates
+
+    def read_results(self):
+        if not os.path.exists(self.results_path):
+            return pd.DataFrame(columns=KEYS + ["repeat", "phase"] + METRICS)
+        return pd.read_csv(self.results_path)
+
+    def finished(self, results):
+        # runs with all phases in the results of an earlier, interrupted sweep
+        counts = results.fillna({"client_number": -1}).groupby(KEYS + ["repeat"])
+        return {
+            (circuit, batchsize, None if client_number == -1 else client_number, i)
+            for (circuit, batchsize, client_number, i), phases in counts["phase"]
+            if len(set(phases)) == len(PHASES)
+        }
+
+    def learn(self, results):
+        for (circuit, batchsize, client_number), df in results.groupby(
+            KEYS, dropna=False
+        ):
+            size = batchsize if circuit == "client" else client_number
+            peaks = df.groupby("phase")["max_rss_mb"].max().to_dict()
+            self.estimator.add(circuit, size, peaks)
+
+    def execute(self, run):
+        circuit, batchsize, client_number, i = run
+        size = self.size(run)
+        variant_path = os.path.join(self.work_path, self.variant(run))
+        zok_filepath = write_variant(
+            circuit, size, os.path.join(variant_path, f"root_{i}.zok")
+        )
+        cwd = os.path.join(variant_path, f"run_{i}")
+        os.makedirs(cwd, exist_ok=True)
+
+        def reserve(phase):
+            def amount():
+                estimate = self.estimator.estimate(circuit, phase, size)
+                return self.budget.total_mb if estimate is None else estimate
+
+            return self.budget.reserve(amount)
+
+        module = self.modules[circuit]
+        if circuit == "client":
+            times, usages = module.run_phases(
+                zok_filepath, batchsize, cwd=cwd, reserve=reserve
+            )
+        else:
+            times, usages = module.run_phases(
+                zok_filepath, batchsize, client_number, cwd=cwd, reserve=reserve
+            )
+        self.estimator.add(
+            circuit, size, {phase: usage["max_rss"] for phase, usage in usages.items()}
+        )
+        self.budget.notify()
+        save_timelines(
+            os.path.join(self.out_path, "timelines", f"{self.variant(run)}_{i}.npz"),
+            usages,
+        )
+        if not self.keep_work:
+            # proving keys of large circuits take gigabytes
+            shutil.rmtree(cwd)
+        return [
+            {
+                "circuit": circuit,
+                "batchsize": batchsize,
+                "client_number": client_number,
+                "repeat": i,
+                "phase": phase,
+                "seconds": times[phase],
+                "max_rss_mb": usages[phase]["max_rss"],
+                "user_seconds": usages[phase]["user"],
+                "sys_seconds": usages[phase]["sys"],
+                "read_bytes": usages[phase]["read_bytes"],
+                "write_bytes": usages[phase]["write_bytes"],
+            }
+            for phase in PHASES
+        ]
+
+    def run(self, workers):
+        os.makedirs(self.out_path, exist_ok=True)
+        results = self.read_results()
+        self.learn(results)
+        finished = self.finished(results)
+        runs = [run for run in self.runs if run not in finished]
+        print(f"{len(runs)} runs to do, {len(self.runs) - len(runs)} already done")
+        failed = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.execute, run): run for run in runs}
+            for done, future in enumerate(as_completed(futures), start=1):
+                run = futures[future]
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"[{done}/{len(runs)}] {self.variant(run)} run {run[3]}: {e}")
+                    continue
+                # written after every run, an interrupted sweep resumes from here
+                results = pd.concat([results, pd.DataFrame(rows)], ignore_index=True)
+                results.to_csv(self.results_path, index=False)
+                peak = max(row["max_rss_mb"] for row in rows)
+                seconds = sum(row["seconds"] for row in rows)
+                print(
+                    f"[{done}/{len(runs)}] {self.variant(run)} run {run[3]}: "
+                    f"{seconds:.1f} s, peak {peak:.0f} MB"
+                )
+        write_summaries(results, self.out_path)
+        return failed
+
+
+def summarize(results):
+    # mean and std of every metric per variant and phase
+    summary = results.groupby(KEYS + ["phase"], dropna=False)[METRICS].agg(
+        ["mean", "std"]
+    )
+    summary.columns = [f"{metric}_{stat}" for metric, stat in summary.columns]
+    summary["runs"] = results.groupby(KEYS + ["phase"], dropna=False).size()
+    return summary.reset_index()
+
+
+def final_analytics(summary, circuit):
+    # one row per variant with t_<phase>_avg/_std and max_mem_<phase>_avg/_std,
+    # the columns of analyze.py's final_analytics.csv that the plots read
+    df = summary[summary["circuit"] == circuit]
+    key = "batchsize" if circuit == "client" else "client_number"
+    columns = {
+        "seconds_mean": "t_{}_avg",
+        "seconds_std": "t_{}_std",
+        "max_rss_mb_mean": "max_mem_{}_avg",
+        "max_rss_mb_std": "max_mem_{}_std",
+    }
+    wide = df.pivot(index=key, columns="phase", values=list(columns))
+    wide.columns = [columns[metric].format(phase) for metric, phase in wide.columns]
+    return wide.round(2).reset_index()
+
+
+def write_summaries(results, out_path):
+    if results.empty:
+        return
+    # results read back or grown from an empty frame hold objects
+    results = results.infer_objects()
+    results["client_number"] = results["client_number"].astype("Int64")
+    summary = summarize(results)
+    summary.to_csv(os.path.join(out_path, "summary.csv"), index=False)
+    for circuit, file_name in [
+        ("client", "final_analytics.csv"),
+        ("aggregator", "aggregator_final_analytics.csv"),
+    ]:
+        if (summary["circuit"] == circuit).any():
+            final_analytics(summary, circuit).to_csv(
+                os.path.join(out_path, file_name), index=False
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the client and aggregator circuits over batch sizes "
+        "and client counts."
+    )
+    parser.add_argument("--batchsizes", type=int, nargs="*", default=[10, 20, 30, 40])
+    parser.add_argument("--clients", type=int, nargs="*", default=[2, 4, 6, 8])
+    parser.add_argument(
+        "--aggregator-batchsize",
+        type=int,
+        default=10,
+        help="batch size of the witness inputs of the aggregator circuit",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--memory-budget",
+        type=float,
+        help="GB the runs may use together (default 80%% of the available memory)",
+    )
+    parser.add_argument("--out", default="sweep")
+    parser.add_argument("--zokrates", default="zokrates")
+    parser.add_argument(
+        "--keep-work", action="store_true", help="keep the keys, proofs and witnesses"
+    )
+    args = parser.parse_args()
+
+    budget_mb = (
+        args.memory_budget * 1024
+        if args.memory_budget
+        else available_memory_mb() * 0.8
+    )
+    sweep = Sweep(
+        args.batchsizes,
+        args.clients,
+        args.aggregator_batchsize,
+        args.repeat,
+        args.out,
+        budget_mb,
+        keep_work=args.keep_work,
+    )
+    sweep.set_zokrates(args.zokrates)
+    print(f"Memory budget: {budget_mb / 1024:.1f} GB, {args.workers} workers")
+    failed = sweep.run(args.workers)
+    if failed:
+        raise SystemExit(f"{failed} runs failed, run the sweep again to retry them")